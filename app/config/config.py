@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Tuple
+from typing import Dict, List, Optional, Tuple
 from pydantic_settings import BaseSettings
 
 
@@ -10,6 +10,132 @@ class Settings(BaseSettings):
     PROJECT_NAME: str 
     SQLALCHEMY_DATABASE_URI: str
     SUPPORTED_LOCALES_STRING: str
+
+    # Database connection pool
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+
+    # Order sharding; without shard URIs orders stay in the main database. Shard ids are
+    # positions in the list, so only ever append to it. Orders map to buckets by a slot in
+    # their id, so the bucket count cannot change once orders are sharded. With the
+    # customer key a customer's orders share a bucket, so their listing reads one shard; it
+    # only finds orders placed under that key, so choose it before taking orders
+    ORDER_SHARD_URIS: List[str] = []
+    ORDER_SHARD_BUCKETS: int = 256
+    ORDER_SHARD_KEY: str = "order"
+    ORDER_SHARD_CHANNEL: str = "order_shards_changed"
+    ORDER_SHARD_SCATTER_THREADS: int = 8
+
+    # Admission control and load shedding
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 2.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+    # Only honour the client key header behind a proxy that sets it; otherwise clients
+    # could pick a fresh key per request and dodge the rate limit
+    ADMISSION_TRUST_CLIENT_KEY_HEADER: bool = False
+    ADMISSION_CLIENT_KEY_HEADER: str = "X-Client-Key"
+    # Limits per route class; lower priorities are admitted first, and a class is shed
+    # outright once the DB pool is busier than its shed_utilisation
+    ADMISSION_ROUTE_CLASSES: Dict[str, Dict[str, Optional[float]]] = {
+        "checkout": {"priority": 0, "max_concurrency": 15, "max_queue": 200, "rate": 2.0, "burst": 5},
+        "order_create": {"priority": 1, "max_concurrency": 10, "max_queue": 100, "rate": 2.0, "burst": 5,
+                         "shed_utilisation": 0.9},
+        "other": {"priority": 2, "max_concurrency": 8, "max_queue": 100, "rate": 10.0, "burst": 20,
+                  "shed_utilisation": 0.85},
+        "menu": {"priority": 3, "max_concurrency": 6, "max_queue": 50, "rate": 20.0, "burst": 40,
+                 "shed_utilisation": 0.75},
+    }
+
+    # Response compression
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_CACHE_SIZE: int = 256
+
+    # Order creation; group commit batches concurrent inserts into one transaction
+    ORDER_GROUP_COMMIT_ENABLED: bool = False
+    ORDER_GROUP_COMMIT_MAX_BATCH: int = 32
+    ORDER_GROUP_COMMIT_MAX_WAIT_MS: float = 5.0
+
+    # Menu search
+    MENU_CHANNEL: str = "menu_changed"
+
+    # Catalog imports upsert menus in batches of this many rows per statement
+    CATALOG_IMPORT_BATCH_SIZE: int = 5000
+    CATALOG_IMPORT_MAX_ITEMS: int = 200000
+
+    # Promotions are recompiled on every worker when this channel fires
+    PROMOTIONS_CHANNEL: str = "promotions_changed"
+
+    # Customer lookup
+    DEFAULT_PHONE_COUNTRY_CODE: str = "1"
+    CUSTOMER_LOOKUP_CACHE_SIZE: int = 1024
+    CUSTOMER_LOOKUP_CACHE_TTL_SECONDS: float = 30.0
+    CUSTOMER_ORDERS_CHANNEL: str = "customer_orders_changed"
+
+    # Order read cache
+    ORDER_CACHE_MAX_ENTRIES: int = 10000
+    ORDER_CACHE_MAX_BYTES: int = 8 * 1024 * 1024
+    ORDER_CACHE_TTL_SECONDS: float = 60.0
+
+    # Admin endpoints are disabled unless a token is configured
+    ADMIN_TOKEN: Optional[str] = None
+
+    # Order status streaming
+    ORDER_STATUS_CHANNEL: str = "order_status"
+    ORDER_EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    ORDER_EVENTS_QUEUE_SIZE: int = 16
+
+    # Order event log for downstream consumers
+    ORDER_LOG_CHANNEL: str = "order_log"
+    ORDER_LOG_BATCH_SIZE: int = 1000
+    ORDER_LOG_MAX_BATCH_SIZE: int = 10000
+    ORDER_LOG_MAX_WAIT_SECONDS: float = 30.0
+    ORDER_LOG_POLL_SECONDS: float = 1.0
+
+    # Delivery dispatch
+    GEOCODER_LOOKUP_PATH: Optional[str] = None
+    DISPATCH_DEPOT_LATITUDE: float = 0.0
+    DISPATCH_DEPOT_LONGITUDE: float = 0.0
+    DISPATCH_GRID_CELL_KM: float = 1.0
+    DISPATCH_BATCH_RADIUS_KM: float = 3.0
+    DISPATCH_TIME_WINDOW_MINUTES: float = 15.0
+    DISPATCH_MAX_DELIVERY_MINUTES: float = 45.0
+    DISPATCH_DRIVER_SPEED_KMH: float = 25.0
+    DISPATCH_STOP_MINUTES: float = 2.0
+    DISPATCH_DRIVER_CAPACITY: int = 5
+
+    # Kitchen scheduling
+    KITCHEN_CHANNEL: str = "kitchen_events"
+    KITCHEN_PREP_STATIONS: int = 2
+    KITCHEN_OVENS: int = 3
+    KITCHEN_PREP_MINUTES: float = 4.0
+    KITCHEN_BAKE_MINUTES: float = 8.0
+    KITCHEN_DEFAULT_DELIVERY_MINUTES: float = 20.0
+
+    # Demand forecasting for kitchen pre-prep; the season is one week of slots
+    FORECAST_SLOT_MINUTES: int = 15
+    FORECAST_SEASON_SLOTS: int = 7 * 24 * 4
+    FORECAST_HISTORY_DAYS: int = 365
+    FORECAST_REFIT_MINUTES: float = 60.0
+    FORECAST_MAX_HORIZON_SLOTS: int = 7 * 24 * 4
+
+    # Logging; records are queued and written as JSON lines by a background thread
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: Dict[str, str] = {}
+    LOG_JSON: bool = True
+    LOG_FILE: Optional[str] = None
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_DEBUG_SAMPLE_RATE: float = 0.01
+    LOG_REQUEST_ID_HEADER: str = "X-Request-ID"
+    LOG_ACCESS_ENABLED: bool = True
+
+    # Sampling profiler; requests opt in with the admin token, or a random fraction is profiled
+    PROFILER_SAMPLE_RATE: float = 0.0
+    PROFILER_INTERVAL_MS: float = 5.0
+    PROFILER_HEADER: str = "X-Profile"
+    PROFILER_LOCK_PATH: str = "/tmp/pizza-profiler.lock"
+    PROFILER_MAX_PROFILES: int = 20
+    PROFILER_MAX_WINDOW_SECONDS: float = 60.0
     
     @property
     def BASE_DIR(self) -> Path:
@@ -0,0 +1,283 @@
+"""Batched, resumable backfills that run while orders are being taken.
+
+A migration that adds a column commits its DDL first, then fills existing rows
+in short keyset-ordered transactions, so no lock is held for more than a chunk:
+
+    def upgrade():
+        op.add_column('orders', sa.Column('phone_e164', sa.String(), nullable=True))
+        with op.get_context().autocommit_block():
+            run_backfill(op.get_bind().engine, PHONE_NUMBERS)
+
+Each chunk updates its rows and records its checkpoint in one transaction, so
+an interrupted backfill resumes after the last committed key. `where` must
+select only rows that still need work, which keeps a rerun of a chunk harmless.
+"""
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection, Engine, Row
+from sqlalchemy.exc import OperationalError
+
+from app.db.models.backfill_checkpoint import backfill_checkpoints
+
+logger = logging.getLogger(__name__)
+
+LOCK_NOT_AVAILABLE = "55P03"
+
+REPLICATION_LAG = text(
+    "SELECT coalesce(extract(epoch FROM max(replay_lag)), 0) FROM pg_stat_replication"
+)
+ACTIVE_QUERIES = text(
+    "SELECT count(*) FROM pg_stat_activity WHERE state = 'active' AND pid <> pg_backend_pid()"
+)
+
+
+@dataclass(frozen=True)
+class Backfill:
+    """Rows of `table` matching `where`, visited in `key` order.
+
+    `apply` receives each chunk's rows (the key followed by `columns`) on the
+    chunk's connection and returns how many rows it updated.
+    """
+    name: str
+    table: str
+    where: str
+    apply: Callable[[Connection, Sequence[Row]], int]
+    columns: Sequence[str] = ()
+    key: str = "id"
+    key_type: str = "uuid"
+
+    def chunk_query(self, resume: bool):
+        after = f" AND {self.key} > CAST(:after AS {self.key_type})" if resume else ""
+        return text(
+            f"SELECT {', '.join([self.key, *self.columns])} FROM {self.table} "
+            f"WHERE ({self.where}){after} ORDER BY {self.key} LIMIT :batch_size"
+        )
+
+
+@dataclass
+class Throttle:
+    """How hard a backfill may push the primary.
+
+    Chunks are resized towards `target_seconds` each, and before every chunk
+    the backfill waits while replicas lag more than `max_replication_lag`
+    seconds or more than `max_active_queries` other queries are running.
+    """
+    pause: float = 0.05
+    target_seconds: float = 0.5
+    min_batch_size: int = 100
+    max_batch_size: int = 20000
+    max_replication_lag: Optional[float] = 5.0
+    max_active_queries: Optional[int] = None
+    backoff: float = 1.0
+    lock_timeout: str = "2s"
+    lock_retries: int = 5
+
+    def next_batch_size(self, batch_size: int, elapsed: float) -> int:
+        if elapsed <= 0:
+            return min(batch_size * 2, self.max_batch_size)
+        # Never grow more than twice per chunk so one fast chunk cannot overshoot
+        scaled = int(batch_size * min(self.target_seconds / elapsed, 2.0))
+        return max(self.min_batch_size, min(scaled, self.max_batch_size))
+
+    def wait(self, conn: Connection) -> float:
+        """Sleep until the database is healthy enough for another chunk"""
+        waited = 0.0
+        while self._overloaded(conn):
+            time.sleep(self.backoff)
+            waited += self.backoff
+        return waited
+
+    def _overloaded(self, conn: Connection) -> bool:
+        if self.max_replication_lag is not None:
+            if conn.execute(REPLICATION_LAG).scalar() > self.max_replication_lag:
+                return True
+        if self.max_active_queries is not None:
+            if conn.execute(ACTIVE_QUERIES).scalar() > self.max_active_queries:
+                return True
+        return False
+
+
+@dataclass
+class Progress:
+    name: str
+    estimated_rows: int
+    rows_scanned: int = 0
+    rows_updated: int = 0
+    chunks: int = 0
+    elapsed: float = 0.0
+    throttled: float = 0.0
+    last_key: Optional[str] = None
+
+    @property
+    def rate(self) -> float:
+        return self.rows_scanned / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        if not self.rate:
+            return None
+        return max(self.estimated_rows - self.rows_scanned, 0) / self.rate
+
+
+@dataclass
+class Estimate:
+    name: str
+    estimated_rows: int
+    sampled_rows: int
+    sampled_seconds: float
+    seconds: float
+
+
+def describe_progress(progress: Progress) -> str:
+    eta = f"{progress.eta:.0f}s" if progress.eta is not None else "unknown"
+    return (
+        f"{progress.name}: {progress.rows_updated} updated, {progress.rows_scanned}/~{progress.estimated_rows} "
+        f"scanned, {progress.rate:.0f} rows/s, eta {eta} (up to {progress.last_key})"
+    )
+
+
+def log_progress(progress: Progress) -> None:
+    logger.info(describe_progress(progress))
+
+
+def print_progress(progress: Progress) -> None:
+    print(describe_progress(progress))
+
+
+def estimate_rows(conn: Connection, backfill: Backfill) -> int:
+    """The planner's estimate of rows still to visit, without scanning the table"""
+    plan = conn.execute(
+        text(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {backfill.table} WHERE {backfill.where}")
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _run_chunk(conn: Connection, backfill: Backfill, throttle: Throttle,
+               after: Optional[str], batch_size: int) -> Tuple[Sequence[Row], int]:
+    conn.execute(text(f"SET LOCAL lock_timeout = '{throttle.lock_timeout}'"))
+    rows = conn.execute(
+        backfill.chunk_query(after is not None), {"after": after, "batch_size": batch_size}
+    ).all()
+    if not rows:
+        return rows, 0
+    return rows, backfill.apply(conn, rows)
+
+
+def with_lock_retries(throttle: Throttle, chunk: Callable[[], Any]) -> Any:
+    """Run `chunk`, retrying with backoff when it gives up waiting for a lock"""
+    for attempt in range(throttle.lock_retries + 1):
+        try:
+            return chunk()
+        except OperationalError as e:
+            if getattr(e.orig, "sqlstate", None) != LOCK_NOT_AVAILABLE or attempt == throttle.lock_retries:
+                raise
+            time.sleep(throttle.backoff * (attempt + 1))
+
+
+def _save_checkpoint(conn: Connection, name: str, last_key: Optional[str], rows_updated: int,
+                     finished: bool = False) -> None:
+    statement = insert(backfill_checkpoints).values(
+        name=name, last_key=last_key, rows_updated=rows_updated,
+        finished_at=func.now() if finished else None,
+    )
+    conn.execute(statement.on_conflict_do_update(
+        index_elements=[backfill_checkpoints.c.name],
+        set_={
+            "last_key": statement.excluded.last_key,
+            "rows_updated": statement.excluded.rows_updated,
+            "updated_at": func.now(),
+            "finished_at": statement.excluded.finished_at,
+        },
+    ))
+
+
+def run_backfill(engine: Engine, backfill: Backfill, throttle: Optional[Throttle] = None,
+                 batch_size: int = 1000, restart: bool = False,
+                 report: Callable[[Progress], None] = log_progress) -> Progress:
+    """Run `backfill` to completion, resuming from its checkpoint unless `restart`"""
+    throttle = throttle or Throttle()
+    with engine.begin() as conn:
+        checkpoint = conn.execute(
+            select(backfill_checkpoints).where(backfill_checkpoints.c.name == backfill.name)
+        ).first()
+        progress = Progress(backfill.name, estimate_rows(conn, backfill))
+    if checkpoint is not None and not restart:
+        if checkpoint.finished_at is not None:
+            progress.rows_updated = checkpoint.rows_updated
+            return progress
+        progress.last_key = checkpoint.last_key
+        progress.rows_updated = checkpoint.rows_updated
+
+    started = time.monotonic()
+    while True:
+        with engine.connect() as conn:
+            progress.throttled += throttle.wait(conn)
+
+        def chunk():
+            with engine.begin() as conn:
+                chunk_started = time.monotonic()
+                rows, updated = _run_chunk(conn, backfill, throttle, progress.last_key, batch_size)
+                if rows:
+                    _save_checkpoint(conn, backfill.name, str(rows[-1][0]), progress.rows_updated + updated)
+                return rows, updated, time.monotonic() - chunk_started
+
+        rows, updated, elapsed = with_lock_retries(throttle, chunk)
+        if not rows:
+            break
+        progress.rows_scanned += len(rows)
+        progress.rows_updated += updated
+        progress.chunks += 1
+        progress.last_key = str(rows[-1][0])
+        progress.elapsed = time.monotonic() - started
+        report(progress)
+        batch_size = throttle.next_batch_size(batch_size, elapsed)
+        time.sleep(throttle.pause)
+
+    with engine.begin() as conn:
+        _save_checkpoint(conn, backfill.name, progress.last_key, progress.rows_updated, finished=True)
+    progress.elapsed = time.monotonic() - started
+    return progress
+
+
+def dry_run(engine: Engine, backfill: Backfill, throttle: Optional[Throttle] = None,
+            batch_size: int = 1000, sample_chunks: int = 5) -> Estimate:
+    """Time a few chunks in rolled-back transactions and extrapolate to the whole table.
+
+    Pauses and adaptive chunk sizes are included in the estimate; time spent
+    waiting for replicas or load to settle is not, since it cannot be sampled.
+    """
+    throttle = throttle or Throttle()
+    with engine.connect() as conn:
+        estimated = estimate_rows(conn, backfill)
+    after = None
+    sampled_rows = 0
+    sampled_seconds = 0.0
+    for _ in range(sample_chunks):
+        with engine.connect() as conn:
+            transaction = conn.begin()
+            try:
+                chunk_started = time.monotonic()
+                rows, _ = _run_chunk(conn, backfill, throttle, after, batch_size)
+                elapsed = time.monotonic() - chunk_started
+            finally:
+                transaction.rollback()
+        if not rows:
+            break
+        sampled_rows += len(rows)
+        sampled_seconds += elapsed
+        after = str(rows[-1][0])
+        batch_size = throttle.next_batch_size(batch_size, elapsed)
+    if not sampled_rows:
+        # The planner's estimate can be stale; an empty first chunk means nothing is left
+        return Estimate(backfill.name, estimated, 0, 0.0, 0.0)
+    remaining_chunks = max(estimated, sampled_rows) / batch_size
+    seconds = max(estimated, sampled_rows) * sampled_seconds / sampled_rows + remaining_chunks * throttle.pause
+    return Estimate(backfill.name, estimated, sampled_rows, sampled_seconds, seconds)
@@ -2,18 +2,21 @@ import uuid
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import DateTime
+from sqlalchemy import DDL, DateTime, event, text
 from sqlalchemy.sql import func
 from sqlalchemy.ext.declarative import as_declarative, declared_attr
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+from app.tools.uuid7 import UUID7_FUNCTION_SQL, uuid7
+
 
 class Base(DeclarativeBase):
     __abstract__ = True
 
+    # Time-ordered so inserts append to the primary key index instead of splitting random pages
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        UUID(as_uuid=True), primary_key=True, default=uuid7, server_default=text("uuid_generate_v7()")
     )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=False), server_default=func.now(), nullable=False
@@ -23,6 +26,9 @@ class Base(DeclarativeBase):
     def __tablename__(cls) -> str:
         return cls.__name__.lower()
 
+# Tables created straight from the metadata need the id default's function too
+event.listen(Base.metadata, "before_create", DDL(UUID7_FUNCTION_SQL))
+
 class Serializable:
     """Serializable mixin for converting models to dictionaries."""
     
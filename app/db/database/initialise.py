@@ -1,3 +1,5 @@
+import logging
+
 from sqlalchemy.orm import Session
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import OperationalError
@@ -8,6 +10,8 @@ from app.db.models.size import Size
 from app.db.models.topping import Topping
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 def create_database() -> None:
     """Create the database if it doesn't exist"""
     default_engine = create_engine(settings.SQLALCHEMY_DATABASE_URI.replace('/pizza', '/postgres'))
@@ -29,7 +33,7 @@ def initialise(db: Session) -> None:
         # If database doesn't exist, create it
         create_database()
         Base.metadata.create_all(bind=engine)
-    print("Database initialised", db.query(Size).first())
+    logger.info("Database tables created")
     # Add initial data if tables are empty
     if not db.query(Size).first():
         sizes = [
@@ -1,6 +1,12 @@
+from app.db.models.backfill_checkpoint import backfill_checkpoints
+from app.db.models.menu_price import menu_prices
 from app.db.models.order import Order
+from app.db.models.order_event import order_event_cursors, order_events
+from app.db.models.order_item import OrderItem
+from app.db.models.order_shard import order_bucket_fences, order_shard_map
 from app.db.models.order_toppings import order_toppings
 from app.db.models.pizza import Pizza
+from app.db.models.promotion import Promotion
 from app.db.models.size import Size
 from app.db.models.topping import Topping
 
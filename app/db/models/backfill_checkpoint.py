@@ -0,0 +1,14 @@
+from app.db.database.base_class import Base
+from sqlalchemy import BigInteger, Column, DateTime, String, Table, func
+
+# Progress of each named backfill, written in the same transaction as its chunks
+backfill_checkpoints = Table(
+    'backfill_checkpoints',
+    Base.metadata,
+    Column('name', String, primary_key=True),
+    Column('last_key', String, nullable=True),
+    Column('rows_updated', BigInteger, nullable=False, server_default='0'),
+    Column('started_at', DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column('updated_at', DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column('finished_at', DateTime(timezone=True), nullable=True),
+)
@@ -0,0 +1,61 @@
+from app.db.database.base_class import Base
+from sqlalchemy import DDL, Column, DateTime, Float, Table, event, func
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.models.pizza import Pizza
+from app.db.models.size import Size
+from app.db.models.topping import Topping
+
+# Every price a menu item has had, from `valid_from` until the next row for the
+# item: base_price for pizzas, multiplier for sizes and price for toppings.
+# Written by triggers on the menu tables, so catalog imports and manual SQL are
+# recorded too. `valid_from` uses the same clock as orders.created_at.
+menu_prices = Table(
+    'menu_prices',
+    Base.metadata,
+    Column('item_id', UUID(as_uuid=True), primary_key=True),
+    Column('valid_from', DateTime, primary_key=True, server_default=func.localtimestamp()),
+    Column('price', Float, nullable=False),
+)
+
+PRICE_COLUMNS = {"pizzas": "base_price", "sizes": "multiplier", "toppings": "price"}
+
+RECORD_MENU_PRICES_SQL = """
+CREATE OR REPLACE FUNCTION record_menu_prices() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        EXECUTE format(
+            'INSERT INTO menu_prices (item_id, valid_from, price) '
+            'SELECT id, localtimestamp, %I FROM new_rows '
+            'ON CONFLICT (item_id, valid_from) DO UPDATE SET price = excluded.price',
+            TG_ARGV[0]);
+    ELSE
+        EXECUTE format(
+            'INSERT INTO menu_prices (item_id, valid_from, price) '
+            'SELECT new_rows.id, localtimestamp, new_rows.%1$I FROM new_rows JOIN old_rows USING (id) '
+            'WHERE new_rows.%1$I IS DISTINCT FROM old_rows.%1$I '
+            'ON CONFLICT (item_id, valid_from) DO UPDATE SET price = excluded.price',
+            TG_ARGV[0]);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def price_trigger_sql(table: str, column: str) -> list:
+    """Statement-level triggers recording `table`'s prices; one row per changed item per statement"""
+    return [
+        f"CREATE TRIGGER {table}_price_insert AFTER INSERT ON {table} "
+        f"REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION record_menu_prices('{column}')",
+        f"CREATE TRIGGER {table}_price_update AFTER UPDATE ON {table} "
+        f"REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+        f"FOR EACH STATEMENT EXECUTE FUNCTION record_menu_prices('{column}')",
+    ]
+
+
+# Tables created straight from the metadata get the triggers too; DDL formats with %
+event.listen(Base.metadata, "before_create", DDL(RECORD_MENU_PRICES_SQL.replace("%", "%%")))
+for _model in (Pizza, Size, Topping):
+    for _statement in price_trigger_sql(_model.__tablename__, PRICE_COLUMNS[_model.__tablename__]):
+        event.listen(_model.__table__, "after_create", DDL(_statement))
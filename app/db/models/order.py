@@ -1,8 +1,9 @@
-from sqlalchemy import Column, String, Float, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, DateTime, String, Float, ForeignKey, Index, text, Enum as SQLEnum
 from sqlalchemy.orm import relationship, Mapped, mapped_column
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from app.db.models.order_toppings import order_toppings
 from app.db.database.base_class import Base, Serializable
+from datetime import datetime
 from enum import Enum
 
 class PaymentMethod(str, Enum):
@@ -10,25 +11,59 @@ class PaymentMethod(str, Enum):
     CREDIT_CARD = "credit_card"
     DEBIT_CARD = "debit_card"
 
+class OrderStatus(str, Enum):
+    PENDING = "pending"
+    CONFIRMED = "confirmed"
+    READY = "ready"
+    OUT_FOR_DELIVERY = "out_for_delivery"
+    DELIVERED = "delivered"
+    CANCELLED = "cancelled"
+
 class Order(Base, Serializable):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_pizza_id", "pizza_id"),
+        Index("ix_orders_size_id", "size_id"),
+        Index("ix_orders_created_at", "created_at"),
+        Index("ix_orders_phone_e164", "phone_e164", postgresql_using="hash"),
+        # Walks one bucket at a time when buckets move between shards
+        Index("ix_orders_slot", text("order_slot(id)"), "id"),
+        # Only the kitchen and dispatch work queues filter on status
+        Index(
+            "ix_orders_status_active", "status",
+            postgresql_where=text("status IN ('CONFIRMED', 'READY')"),
+        ),
+    )
     
     customer_name: Mapped[str] = mapped_column(String, nullable=False)
     phone_number: Mapped[str] = mapped_column(String, nullable=False)
+    phone_e164: Mapped[str] = mapped_column(String, nullable=True)
     address: Mapped[str] = mapped_column(String, nullable=False)
+    # Pizza, size and toppings of the first line, kept for single-pizza readers
     pizza_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("pizzas.id"))
     size_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("sizes.id"))
     payment_method: Mapped[str] = mapped_column(SQLEnum(PaymentMethod), nullable=False)
     total_price: Mapped[float] = mapped_column(Float, nullable=False)
+    # Promotions applied at pricing time; total_price is already net of them
+    discount_total: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, server_default="0")
+    discounts: Mapped[list] = mapped_column(JSONB, nullable=False, default=list, server_default="[]")
+    status: Mapped[str] = mapped_column(
+        SQLEnum(OrderStatus), nullable=False, default=OrderStatus.PENDING, server_default=OrderStatus.PENDING.name
+    )
+    latitude: Mapped[float] = mapped_column(Float, nullable=True)
+    longitude: Mapped[float] = mapped_column(Float, nullable=True)
+    # When the order last became READY; dispatch deadlines run from here, also after a restart
+    ready_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
 
     # Relationships
     pizza = relationship("Pizza", back_populates="orders")
     size = relationship("Size", back_populates="orders")
     toppings = relationship("Topping", secondary=order_toppings, backref="orders", cascade="all, delete")
+    items = relationship("OrderItem", order_by="OrderItem.position", cascade="all, delete-orphan")
 
     def calculate_total_price(self) -> float:
         """Calculate the total price of an order including pizza, size and toppings"""
         total = self.pizza.base_price * self.size.multiplier
         if self.toppings:
             total += sum(topping.price for topping in self.toppings)
-        return total
\ No newline at end of file
+        return total
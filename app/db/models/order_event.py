@@ -0,0 +1,28 @@
+from app.db.database.base_class import Base
+from sqlalchemy import BigInteger, Column, DateTime, Identity, Index, String, Table, func, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+# Append-only log of order changes, written in the same transaction as the change.
+# `txid` is the writing transaction's id; readers only go up to the oldest
+# transaction still running, so an event can never appear behind a cursor.
+order_events = Table(
+    'order_events',
+    Base.metadata,
+    Column('seq', BigInteger, Identity(), primary_key=True),
+    Column('txid', BigInteger, nullable=False, server_default=text('(pg_current_xact_id()::text::bigint)')),
+    Column('order_id', UUID(as_uuid=True), nullable=False),
+    Column('event_type', String, nullable=False),
+    Column('payload', JSONB, nullable=False),
+    Column('created_at', DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Index('ix_order_events_txid_seq', 'txid', 'seq'),
+)
+
+# Last position each downstream consumer has acknowledged
+order_event_cursors = Table(
+    'order_event_cursors',
+    Base.metadata,
+    Column('consumer', String, primary_key=True),
+    Column('txid', BigInteger, nullable=False),
+    Column('seq', BigInteger, nullable=False),
+    Column('updated_at', DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
@@ -0,0 +1,28 @@
+from typing import List
+from uuid import UUID as PyUUID
+
+from sqlalchemy import Float, ForeignKey, Index, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.database.base_class import Base, Serializable
+
+class OrderItem(Base, Serializable):
+    """One line of an order; prices are per line, net of its promotions"""
+    __tablename__ = "order_items"
+    __table_args__ = (
+        Index("ix_order_items_order_id", "order_id"),
+    )
+
+    order_id: Mapped[PyUUID] = mapped_column(UUID(as_uuid=True), ForeignKey("orders.id"), nullable=False)
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    pizza_id: Mapped[PyUUID] = mapped_column(UUID(as_uuid=True), ForeignKey("pizzas.id"), nullable=False)
+    size_id: Mapped[PyUUID] = mapped_column(UUID(as_uuid=True), ForeignKey("sizes.id"), nullable=False)
+    # Stored inline so a whole cart is written without a link row per topping
+    topping_ids: Mapped[List[PyUUID]] = mapped_column(
+        ARRAY(UUID(as_uuid=True)), nullable=False, default=list, server_default="{}"
+    )
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    unit_price: Mapped[float] = mapped_column(Float, nullable=False)
+    discount_total: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, server_default="0")
+    discounts: Mapped[list] = mapped_column(JSONB, nullable=False, default=list, server_default="[]")
+    total_price: Mapped[float] = mapped_column(Float, nullable=False)
@@ -0,0 +1,58 @@
+from app.db.database.base_class import Base
+from sqlalchemy import DDL, Column, DateTime, Integer, Table, event, func
+
+# Which shard holds each order bucket; only the main database's copy is read
+order_shard_map = Table(
+    'order_shard_map',
+    Base.metadata,
+    Column('bucket', Integer, primary_key=True, autoincrement=False),
+    Column('shard', Integer, nullable=False),
+    Column('updated_at', DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
+
+# Slot ranges a shard has handed to another shard. Once a range is fenced the
+# shard refuses order writes in it, so a worker still routing by an old map
+# fails instead of writing where nobody will read.
+order_bucket_fences = Table(
+    'order_bucket_fences',
+    Base.metadata,
+    Column('first_slot', Integer, primary_key=True, autoincrement=False),
+    Column('last_slot', Integer, nullable=False),
+    Column('moved_to', Integer, nullable=False),
+    Column('fenced_at', DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
+
+# The last two bytes of an order id, which place it in a bucket
+ORDER_SLOT_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION order_slot(id uuid) RETURNS integer AS $$
+    SELECT get_byte(uuid_send(id), 14) * 256 + get_byte(uuid_send(id), 15)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE
+"""
+
+# SQLSTATE of a write refused by a fence
+BUCKET_MOVED = "55B01"
+
+# Installed on a shard the first time it hands a bucket away, so shards that
+# never do pay nothing on order writes
+FENCE_ORDERS_SQL = [
+    f"""
+    CREATE OR REPLACE FUNCTION refuse_fenced_orders() RETURNS trigger AS $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM new_rows JOIN order_bucket_fences AS fence
+                ON order_slot(new_rows.id) BETWEEN fence.first_slot AND fence.last_slot
+        ) THEN
+            RAISE EXCEPTION 'Order bucket has moved to another shard' USING ERRCODE = '{BUCKET_MOVED}';
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "CREATE OR REPLACE TRIGGER orders_fence_insert AFTER INSERT ON orders "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION refuse_fenced_orders()",
+    "CREATE OR REPLACE TRIGGER orders_fence_update AFTER UPDATE ON orders "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION refuse_fenced_orders()",
+]
+
+# The orders slot index needs the function first
+event.listen(Base.metadata, "before_create", DDL(ORDER_SLOT_FUNCTION_SQL))
@@ -1,11 +1,12 @@
 from app.db.database.base_class import Base
-from sqlalchemy import Column, ForeignKey, Table
+from sqlalchemy import Column, ForeignKey, Index, Table
 from sqlalchemy.dialects.postgresql import UUID
 
 # Association table for order-topping many-to-many relationship
 order_toppings = Table(
     'order_toppings',
     Base.metadata,
-    Column('order_id', UUID(as_uuid=True), ForeignKey('orders.id')),
-    Column('topping_id', UUID(as_uuid=True), ForeignKey('toppings.id'))
-)
\ No newline at end of file
+    Column('order_id', UUID(as_uuid=True), ForeignKey('orders.id'), primary_key=True),
+    Column('topping_id', UUID(as_uuid=True), ForeignKey('toppings.id'), primary_key=True),
+    Index('ix_order_toppings_topping_id', 'topping_id')
+)
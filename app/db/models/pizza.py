@@ -1,9 +1,13 @@
 from app.db.database.base_class import Serializable, Base
-from sqlalchemy import Column, String, Float
+from sqlalchemy import Column, String, Float, Index
 from sqlalchemy.orm import relationship, mapped_column, Mapped, Session
 
 class Pizza(Base, Serializable):
     __tablename__ = "pizzas"
+    # Names are the natural key catalog imports upsert on
+    __table_args__ = (
+        Index("ix_pizzas_name", "name", unique=True),
+    )
 
     name: Mapped[str] = mapped_column(String, nullable=False)
     description: Mapped[str] = mapped_column(String, nullable=True)
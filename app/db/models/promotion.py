@@ -0,0 +1,32 @@
+from datetime import datetime, time
+from enum import Enum
+from uuid import UUID as PyUUID
+
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, String, Time, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.database.base_class import Base, Serializable
+
+class PromotionKind(str, Enum):
+    PERCENT_OFF = "percent_off"
+    AMOUNT_OFF = "amount_off"
+    FREE_TOPPING = "free_topping"
+
+class Promotion(Base, Serializable):
+    """A discount rule; empty pizza, size or topping conditions match anything"""
+    __tablename__ = "promotions"
+
+    name: Mapped[str] = mapped_column(String, nullable=False)
+    kind: Mapped[PromotionKind] = mapped_column(SQLEnum(PromotionKind), nullable=False)
+    value: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    pizza_id: Mapped[PyUUID] = mapped_column(UUID(as_uuid=True), ForeignKey("pizzas.id"), nullable=True)
+    size_id: Mapped[PyUUID] = mapped_column(UUID(as_uuid=True), ForeignKey("sizes.id"), nullable=True)
+    # The order must include this topping; free topping rules make it free
+    topping_id: Mapped[PyUUID] = mapped_column(UUID(as_uuid=True), ForeignKey("toppings.id"), nullable=True)
+    # Bit 0 is Monday; empty means every day
+    weekdays: Mapped[int] = mapped_column(Integer, nullable=True)
+    start_time: Mapped[time] = mapped_column(Time, nullable=True)
+    end_time: Mapped[time] = mapped_column(Time, nullable=True)
+    starts_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    ends_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True, server_default="true")
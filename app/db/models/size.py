@@ -1,9 +1,13 @@
 from app.db.database.base_class import Base, Serializable
-from sqlalchemy import Column, String, Float
+from sqlalchemy import Column, String, Float, Index
 from sqlalchemy.orm import relationship, mapped_column, Mapped, Session
 
 class Size(Base, Serializable):
     __tablename__ = "sizes"
+    # Names are the natural key catalog imports upsert on
+    __table_args__ = (
+        Index("ix_sizes_name", "name", unique=True),
+    )
 
     name: Mapped[str] = mapped_column(String, nullable=False)
     multiplier: Mapped[float] = mapped_column(Float, nullable=False)
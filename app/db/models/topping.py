@@ -1,9 +1,13 @@
-from sqlalchemy import Column, String, Float
+from sqlalchemy import Column, String, Float, Index
 from sqlalchemy.orm import relationship, mapped_column, Mapped, Session
 from app.db.database.base_class import Serializable, Base
 
 class Topping(Base, Serializable):
     __tablename__ = "toppings"
+    # Names are the natural key catalog imports upsert on
+    __table_args__ = (
+        Index("ix_toppings_name", "name", unique=True),
+    )
 
     name: Mapped[str] = mapped_column(String, nullable=False)
     price: Mapped[float] = mapped_column(Float, nullable=False)
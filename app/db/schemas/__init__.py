@@ -1,19 +1,63 @@
 from app.db.schemas.pizza import (
     OrderCreate,
+    CartItem,
+    CartOrderCreate,
     DeliveryDetails,
     PizzaResponse,
     SizeResponse,
     ToppingResponse,
     OrderResponse,
-    CreateOrderResponse
+    OrderItemResponse,
+    CreateOrderResponse,
+    CheckoutOrderResponse,
+    CustomerOrdersResponse,
+    AppliedDiscount,
+    PromotionCreate,
+    PromotionResponse,
+    OrderEvent,
+    OrderEventPage,
+    OrderEventAck,
+    MenuSearchResult,
+    ForecastSeries,
+    ForecastResponse,
+    ProfileWindow,
+    CatalogPizza,
+    CatalogSize,
+    CatalogTopping,
+    CatalogImport,
+    DriverRequest,
+    DeliveryStop,
+    DeliveryRunResponse
 )
 
 __all__ = [
     "OrderCreate",
+    "CartItem",
+    "CartOrderCreate",
     "OrderResponse",
+    "OrderItemResponse",
     "DeliveryDetails",
     "PizzaResponse",
     "SizeResponse",
     "ToppingResponse",
-    "CreateOrderResponse"
+    "CreateOrderResponse",
+    "CheckoutOrderResponse",
+    "CustomerOrdersResponse",
+    "AppliedDiscount",
+    "PromotionCreate",
+    "PromotionResponse",
+    "OrderEvent",
+    "OrderEventPage",
+    "OrderEventAck",
+    "MenuSearchResult",
+    "ForecastSeries",
+    "ForecastResponse",
+    "ProfileWindow",
+    "CatalogPizza",
+    "CatalogSize",
+    "CatalogTopping",
+    "CatalogImport",
+    "DriverRequest",
+    "DeliveryStop",
+    "DeliveryRunResponse"
 ]
\ No newline at end of file
@@ -7,5 +7,5 @@ class BaseResponse(BaseModel, Generic[DataT]):
     """Base response model for API endpoints."""
     
     message: str = Field(..., description="Response message")
-    status: int = Field(..., ge=100, le=599, description="HTTP status code")
+    status: int = Field(..., description="Application status code, 0 on success")
     data: Optional[DataT] = Field(None, description="Response data")
@@ -1,15 +1,11 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
 from typing import List, Optional
-from datetime import datetime
-from app.db.models.order import PaymentMethod
-from enum import Enum
+from datetime import datetime, time
+from app.db.models.order import PaymentMethod, OrderStatus
+from app.db.models.promotion import PromotionKind
 from uuid import UUID
 from app.db.schemas.base import BaseResponse
-
-class OrderStatus(Enum):
-    PENDING = "pending"
-    CONFIRMED = "confirmed"
-    CANCELLED = "cancelled"
+from app.config import settings
 
 class PizzaBase(BaseModel):
     name: str
@@ -44,6 +40,13 @@ class ToppingResponse(ToppingBase):
     class Config:
         from_attributes = True
 
+class MenuSearchResult(BaseModel):
+    kind: str
+    id: UUID
+    name: str
+    description: Optional[str] = None
+    score: float
+
 class OrderCreate(BaseModel):
     customer_name: str
     phone_number: str
@@ -53,6 +56,19 @@ class OrderCreate(BaseModel):
     topping_ids: List[UUID]
     payment_method: PaymentMethod
 
+class CartItem(BaseModel):
+    pizza_id: UUID
+    size_id: UUID
+    topping_ids: List[UUID] = []
+    quantity: int = Field(1, ge=1, le=20)
+
+class CartOrderCreate(BaseModel):
+    customer_name: str
+    phone_number: str
+    address: str
+    payment_method: PaymentMethod
+    items: List[CartItem] = Field(..., min_length=1, max_length=50)
+
 class DeliveryDetails(BaseModel):
     name: str
     address: str
@@ -60,6 +76,28 @@ class DeliveryDetails(BaseModel):
     email: Optional[EmailStr]
     payment_method: PaymentMethod
     special_instructions: Optional[str]
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+class AppliedDiscount(BaseModel):
+    promotion_id: UUID
+    name: str
+    amount: float
+
+class OrderItemResponse(BaseModel):
+    id: UUID
+    position: int
+    pizza_id: UUID
+    size_id: UUID
+    topping_ids: List[UUID]
+    quantity: int
+    unit_price: float
+    discount_total: float
+    discounts: List[AppliedDiscount]
+    total_price: float
+
+    class Config:
+        from_attributes = True
 
 class OrderResponse(BaseModel):
     id: UUID
@@ -70,12 +108,128 @@ class OrderResponse(BaseModel):
     size_id: UUID
     payment_method: PaymentMethod
     total_price: float
+    discount_total: float = 0.0
+    discounts: List[AppliedDiscount] = []
+    items: List[OrderItemResponse] = []
+    status: OrderStatus
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     
     class Config:
         from_attributes = True
 
-class CreateOrderResponse(BaseResponse):
-    data: Optional[OrderResponse] = None
+class CheckoutOrderResponse(OrderResponse):
+    eta: Optional[datetime] = None
 
+class CustomerOrdersResponse(BaseModel):
+    orders: List[OrderResponse]
+    next_cursor: Optional[str] = None
 
+class OrderEvent(BaseModel):
+    seq: int
+    order_id: UUID
+    event_type: str
+    payload: dict
+    created_at: datetime
+
+class OrderEventPage(BaseModel):
+    events: List[OrderEvent]
+    cursor: str
+
+class OrderEventAck(BaseModel):
+    cursor: str
+
+class PromotionCreate(BaseModel):
+    name: str
+    kind: PromotionKind
+    value: float = Field(0.0, ge=0, description="Percent for percent_off, currency for amount_off")
+    pizza_id: Optional[UUID] = None
+    size_id: Optional[UUID] = None
+    topping_id: Optional[UUID] = None
+    weekdays: Optional[List[int]] = Field(None, description="0 is Monday; empty means every day")
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+
+    @field_validator("weekdays")
+    @classmethod
+    def check_weekdays(cls, weekdays: Optional[List[int]]) -> Optional[List[int]]:
+        if weekdays and not all(0 <= weekday <= 6 for weekday in weekdays):
+            raise ValueError("weekdays must be between 0 (Monday) and 6 (Sunday)")
+        return weekdays
+
+    @model_validator(mode="after")
+    def check_kind(self) -> "PromotionCreate":
+        if self.kind == PromotionKind.FREE_TOPPING and self.topping_id is None:
+            raise ValueError("free_topping promotions need a topping_id")
+        if self.kind == PromotionKind.PERCENT_OFF and self.value > 100:
+            raise ValueError("percent_off value cannot exceed 100")
+        return self
+
+class PromotionResponse(PromotionCreate):
+    id: UUID
+    active: bool
 
+    @field_validator("weekdays", mode="before")
+    @classmethod
+    def expand_weekdays(cls, weekdays):
+        if isinstance(weekdays, int):
+            return [weekday for weekday in range(7) if weekdays >> weekday & 1]
+        return weekdays
+
+    class Config:
+        from_attributes = True
+
+class CreateOrderResponse(BaseResponse):
+    data: Optional[OrderResponse] = None
+
+class ForecastSeries(BaseModel):
+    pizza_id: UUID
+    size_id: UUID
+    expected: List[float]
+
+class ForecastResponse(BaseModel):
+    starts_at: datetime
+    slot_minutes: int
+    fitted_at: datetime
+    series: List[ForecastSeries]
+
+class CatalogPizza(BaseModel):
+    name: str = Field(..., min_length=1, max_length=200)
+    description: Optional[str] = None
+    base_price: float = Field(..., ge=0)
+    image: Optional[str] = None
+
+class CatalogSize(BaseModel):
+    name: str = Field(..., min_length=1, max_length=200)
+    multiplier: float = Field(..., gt=0)
+
+class CatalogTopping(BaseModel):
+    name: str = Field(..., min_length=1, max_length=200)
+    price: float = Field(..., ge=0)
+    icon: Optional[str] = None
+
+class CatalogImport(BaseModel):
+    pizzas: List[CatalogPizza] = []
+    sizes: List[CatalogSize] = []
+    toppings: List[CatalogTopping] = []
+
+class ProfileWindow(BaseModel):
+    seconds: float = Field(10.0, gt=0, le=settings.PROFILER_MAX_WINDOW_SECONDS)
+    interval_ms: float = Field(settings.PROFILER_INTERVAL_MS, ge=1, le=100)
+
+class DriverRequest(BaseModel):
+    driver_id: str
+    capacity: Optional[int] = None
+
+class DeliveryStop(BaseModel):
+    order_id: UUID
+    latitude: float
+    longitude: float
+    eta: datetime
+
+class DeliveryRunResponse(BaseModel):
+    driver_id: str
+    distance_km: float
+    stops: List[DeliveryStop]
@@ -1,10 +1,20 @@
+import logging
+
 from app.db.database.initialise import initialise
 from app.db.database.session import SessionLocal
+from app.services.order_shards import order_shards
 from sqlalchemy.orm import Session
 
+logger = logging.getLogger(__name__)
+
 def init(db:Session) -> None:
-    print("Initialising database...")
+    logger.info("Initialising database")
     initialise(db)
+    if order_shards.sharded:
+        logger.info("Preparing %d order shards", len(order_shards.shards))
+        order_shards.create_tables()
+        order_shards.replicate_catalog()
+        order_shards.reload()
 
 
 def main() -> None:
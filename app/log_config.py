@@ -0,0 +1,180 @@
+"""Non-blocking structured logging.
+
+Request threads only filter a record and put it on a bounded queue; a
+background thread formats it as a JSON line and writes it to the sink. A
+slow or stalled sink fills the queue instead of stalling requests, and
+records that find the queue full are dropped and counted.
+
+Every record carries the id of the request it was logged under, set by
+`RequestIdMiddleware`. DEBUG records are sampled per request, so a request
+that is kept keeps all of its debug lines.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import zlib
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, Tuple
+
+from app.config import settings
+
+request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+# Attributes every record has; anything else was passed in `extra`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+
+_writer: Optional["QueueWriter"] = None
+_configure_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with `extra` fields at the top level"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", "-") != "-":
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """Keep a fraction of DEBUG records, deciding once per request.
+
+    Kept records are tagged with `sample_rate` so counts can be scaled back up.
+    Records logged outside a request are sampled independently.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self._threshold = int(rate * 0x10000)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        current = request_id.get()
+        if current is None:
+            keep = random.random() < self.rate
+        else:
+            keep = (zlib.crc32(current.encode()) & 0xFFFF) < self._threshold
+        if keep:
+            record.sample_rate = self.rate
+        return keep
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the writer thread without ever waiting for it"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        # Updated without a lock; an approximate count is all it is used for
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Interpolate now, while the arguments still hold their values; the
+        # formatting and any traceback rendering happen on the writer thread
+        record.msg = record.getMessage()
+        record.args = None
+        record.request_id = request_id.get() or "-"
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class QueueWriter(QueueListener):
+    """Writes queued records to the sink and reports records dropped on a full queue"""
+
+    def __init__(self, source: NonBlockingQueueHandler, sink: logging.Handler):
+        super().__init__(source.queue, sink, respect_handler_level=True)
+        self.source = source
+        self._reported = 0
+
+    def handle(self, record: logging.LogRecord) -> None:
+        dropped = self.source.dropped
+        if dropped > self._reported:
+            super().handle(logging.makeLogRecord({
+                "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                "msg": f"Dropped {dropped - self._reported} log records, the log queue was full",
+                "request_id": "-", "dropped": dropped - self._reported,
+            }))
+            self._reported = dropped
+        super().handle(record)
+
+    def enqueue_sentinel(self) -> None:
+        # Stopping waits for room, so everything queued before it is written
+        self.queue.put(self._sentinel)
+
+
+def build_pipeline(sink: logging.Handler, queue_size: int = settings.LOG_QUEUE_SIZE,
+                   debug_sample_rate: float = settings.LOG_DEBUG_SAMPLE_RATE,
+                   ) -> Tuple[NonBlockingQueueHandler, QueueWriter]:
+    """A queue handler for request threads and the (unstarted) writer draining it into `sink`"""
+    handler = NonBlockingQueueHandler(queue.Queue(queue_size))
+    handler.addFilter(DebugSampler(debug_sample_rate))
+    return handler, QueueWriter(handler, sink)
+
+
+def configure_logging() -> logging.Logger:
+    """Route all logging through the queue; safe to call more than once"""
+    global _writer
+    with _configure_lock:
+        if _writer is None:
+            if settings.LOG_FILE:
+                sink = logging.FileHandler(settings.LOG_FILE)
+            else:
+                sink = logging.StreamHandler(sys.stdout)
+            sink.setFormatter(JsonFormatter() if settings.LOG_JSON else logging.Formatter(TEXT_FORMAT))
+            handler, _writer = build_pipeline(sink)
+
+            root = logging.getLogger()
+            for existing in root.handlers[:]:
+                root.removeHandler(existing)
+            root.addHandler(handler)
+            root.setLevel(settings.LOG_LEVEL.upper())
+            for name, level in settings.LOG_LEVELS.items():
+                logging.getLogger(name).setLevel(level.upper())
+            # uvicorn installs its own handlers, which write on the calling thread
+            for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+                logging.getLogger(name).handlers.clear()
+                logging.getLogger(name).propagate = True
+            # RequestIdMiddleware writes the access log, with the request id and duration, and
+            # LOG_ACCESS_ENABLED only switches that record; uvicorn's own would duplicate it
+            logging.getLogger("uvicorn.access").disabled = True
+
+            _writer.start()
+            atexit.register(shutdown_logging)
+    return logging.getLogger("app")
+
+
+def shutdown_logging() -> None:
+    """Write out everything still queued and stop the writer thread"""
+    global _writer
+    with _configure_lock:
+        if _writer is None:
+            return
+        _writer.stop()
+        logging.getLogger().removeHandler(_writer.source)
+        _writer = None
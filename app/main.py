@@ -1,3 +1,5 @@
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
@@ -6,30 +8,56 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.routes.v1 import api_router
+from app.middleware import AdmissionControlMiddleware, CompressionMiddleware, ProfilingMiddleware, RequestIdMiddleware
 from app.config import settings
+from app.log_config import configure_logging, shutdown_logging
 from app.initialiser import init
 from app.db.database.session import SessionLocal
+from app.services.notifications import listener
+from app.services.dispatch_service import DispatchService
+from app.services.forecast_service import ForecastService
+from app.services.kitchen_service import KitchenService
+
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator:
     """Manage application lifespan and database connections."""
     db = SessionLocal()
+    forecast_refits = None
     try:
         init(db)
+        DispatchService.load_pending(db)
+        KitchenService.load_pending(db)
+        await listener.start()
+        forecast_refits = asyncio.create_task(ForecastService.run_refits())
         yield
-    except Exception as e:
-        print(f"Error during initialization: {e}")
+    except Exception:
+        logger.exception("Error during initialization")
         raise
     finally:
+        if forecast_refits is not None:
+            forecast_refits.cancel()
+        await listener.stop()
         db.close()
+        shutdown_logging()
 
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application."""
+    configure_logging()
     app = FastAPI(
         title=settings.PROJECT_NAME,
         lifespan=lifespan
     )
 
+    # Compress large responses; menu lists are served from stored variants
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(CompressionMiddleware)
+
+    # Shed load before requests queue for threadpool and DB pool slots
+    if settings.ADMISSION_CONTROL_ENABLED:
+        app.add_middleware(AdmissionControlMiddleware)
+
     # Configure CORS
     app.add_middleware(
         CORSMiddleware,
@@ -39,6 +67,12 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Profiles cover admission queueing as well as handling
+    app.add_middleware(ProfilingMiddleware)
+
+    # Outermost, so shed and rejected requests are logged with an id too
+    app.add_middleware(RequestIdMiddleware)
+
     # Include routers
     app.include_router(api_router, prefix=settings.API_V1_STR)
     
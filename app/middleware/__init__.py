@@ -0,0 +1,4 @@
+from app.middleware.admission import AdmissionControlMiddleware, admission_controller
+from app.middleware.compression import CompressionMiddleware, negotiate, precompressed_cache
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.request_id import RequestIdMiddleware
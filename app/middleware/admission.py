@@ -0,0 +1,293 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class RouteClass:
+    """Admission policy for a group of routes.
+
+    Lower `priority` values are admitted first. `shed_utilisation` is the
+    fraction of DB capacity in use above which new requests of this class are
+    rejected straight away, which keeps headroom for higher priority traffic.
+    """
+
+    name: str
+    priority: int
+    max_concurrency: int
+    max_queue: int
+    rate: float
+    burst: int
+    shed_utilisation: Optional[float] = None
+
+    @classmethod
+    def from_settings(cls, name: str, limits: Dict[str, Optional[float]]) -> "RouteClass":
+        return cls(
+            name,
+            priority=int(limits["priority"]),
+            max_concurrency=int(limits["max_concurrency"]),
+            max_queue=int(limits["max_queue"]),
+            rate=float(limits["rate"]),
+            burst=int(limits["burst"]),
+            shed_utilisation=limits.get("shed_utilisation"),
+        )
+
+
+ROUTE_CLASSES: Dict[str, RouteClass] = {
+    name: RouteClass.from_settings(name, limits) for name, limits in settings.ADMISSION_ROUTE_CLASSES.items()
+}
+
+MENU_PATHS = ("/pizzas/", "/sizes/", "/toppings/", "/menu/")
+ORDER_CREATE_PATHS = ("/orders/", "/orders/cart/")
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Map a request to its route class, or None when it is not admission controlled"""
+    if path.startswith(settings.API_V1_STR):
+        path = path[len(settings.API_V1_STR):]
+    if path.endswith("/events"):
+        # Long-lived streams never touch the pool after their first read
+        return None
+    if path.startswith("/order-log/"):
+        # A handful of downstream consumers that long-poll between short reads
+        return None
+    if method == "POST" and path.startswith("/checkout/"):
+        return "checkout"
+    if method == "POST" and path in ORDER_CREATE_PATHS:
+        return "order_create"
+    if method == "GET" and path.startswith(MENU_PATHS):
+        return "menu"
+    return "other"
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of being queued"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Service overloaded")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Consume a token, returning 0 on success or the seconds until one is available"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class ClientRateLimiter:
+    """Token buckets per (client key, route class), bounded with LRU eviction"""
+
+    def __init__(self, max_clients: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self._max_clients = max_clients
+        self._clock = clock
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+
+    def check(self, client_key: str, route_class: RouteClass) -> float:
+        now = self._clock()
+        key = (client_key, route_class.name)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(route_class.rate, route_class.burst, now)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self._max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.take(now)
+
+
+class AdmissionController:
+    """Priority gate bounding concurrent requests per route class and overall.
+
+    Waiting requests are kept in one heap ordered by class priority and arrival,
+    so a freed slot always goes to the most important request that can use it.
+    """
+
+    def __init__(
+        self,
+        route_classes: Dict[str, RouteClass] = ROUTE_CLASSES,
+        capacity: int = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+        queue_timeout: float = settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        retry_after: float = settings.ADMISSION_RETRY_AFTER_SECONDS,
+        pool_utilisation: Optional[Callable[[], float]] = None,
+    ):
+        self.route_classes = route_classes
+        self.capacity = capacity
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.rate_limiter = ClientRateLimiter()
+        self._pool_utilisation = pool_utilisation
+        self._in_use = 0
+        self._active = {name: 0 for name in route_classes}
+        self._queued = {name: 0 for name in route_classes}
+        self._waiters: List[Tuple[int, int, str, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self.stats = {name: {"admitted": 0, "queued": 0, "shed": 0, "rate_limited": 0} for name in route_classes}
+
+    def utilisation(self) -> float:
+        utilisation = self._in_use / self.capacity
+        if self._pool_utilisation is not None:
+            utilisation = max(utilisation, self._pool_utilisation())
+        return utilisation
+
+    def check_rate(self, client_key: str, name: str) -> float:
+        wait = self.rate_limiter.check(client_key, self.route_classes[name])
+        if wait:
+            self.stats[name]["rate_limited"] += 1
+        return wait
+
+    async def acquire(self, name: str) -> None:
+        route_class = self.route_classes[name]
+        if route_class.shed_utilisation is not None and self.utilisation() >= route_class.shed_utilisation:
+            self._shed(name)
+        if self._has_room(route_class) and not self._has_waiters_ahead(route_class.priority):
+            self._grant(name)
+            return
+        if self._queued[name] >= route_class.max_queue:
+            self._shed(name)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (route_class.priority, next(self._sequence), name, future))
+        self._queued[name] += 1
+        self.stats[name]["queued"] += 1
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._queued[name] -= 1
+            self._shed(name)
+        except BaseException:
+            if future.cancelled():
+                self._queued[name] -= 1
+            else:
+                # Granted just as the caller went away; hand the slot on
+                self.release(name)
+            raise
+
+    def release(self, name: str) -> None:
+        self._in_use -= 1
+        self._active[name] -= 1
+        self._wake()
+
+    def _has_room(self, route_class: RouteClass) -> bool:
+        return self._in_use < self.capacity and self._active[route_class.name] < route_class.max_concurrency
+
+    def _has_waiters_ahead(self, priority: int) -> bool:
+        while self._waiters and self._waiters[0][3].done():
+            heapq.heappop(self._waiters)
+        return bool(self._waiters) and self._waiters[0][0] <= priority
+
+    def _grant(self, name: str) -> None:
+        self._in_use += 1
+        self._active[name] += 1
+        self.stats[name]["admitted"] += 1
+
+    def _shed(self, name: str) -> None:
+        self.stats[name]["shed"] += 1
+        raise Overloaded(self.retry_after)
+
+    def _wake(self) -> None:
+        blocked = []
+        while self._waiters and self._in_use < self.capacity:
+            waiter = heapq.heappop(self._waiters)
+            priority, _, name, future = waiter
+            if future.done():
+                continue
+            if not self._has_room(self.route_classes[name]):
+                blocked.append(waiter)
+                continue
+            self._queued[name] -= 1
+            self._grant(name)
+            future.set_result(None)
+        for waiter in blocked:
+            heapq.heappush(self._waiters, waiter)
+
+    def snapshot(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "in_use": self._in_use,
+            "utilisation": round(self.utilisation(), 3),
+            "classes": {
+                name: {"active": self._active[name], "queued": self._queued[name], **self.stats[name]}
+                for name in self.route_classes
+            },
+        }
+
+
+def _pool_utilisation() -> float:
+    from app.db.database.session import engine
+
+    return engine.pool.checkedout() / (settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+
+
+admission_controller = AdmissionController(pool_utilisation=_pool_utilisation)
+
+
+class AdmissionControlMiddleware:
+    """Rate limits and admits requests before they reach the threadpool and DB pool"""
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController = admission_controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        name = classify(scope["method"], scope["path"])
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        wait = self.controller.check_rate(self._client_key(scope), name)
+        if wait:
+            response = JSONResponse(
+                {"detail": "Too many requests"}, status_code=429,
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(name)
+        except Overloaded as e:
+            response = JSONResponse(
+                {"detail": "Service temporarily overloaded"}, status_code=503,
+                headers={"Retry-After": str(math.ceil(e.retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name)
+
+    @staticmethod
+    def _client_key(scope: Scope) -> str:
+        if settings.ADMISSION_TRUST_CLIENT_KEY_HEADER:
+            header = settings.ADMISSION_CLIENT_KEY_HEADER.lower().encode()
+            for key, value in scope.get("headers", ()):
+                if key == header:
+                    return value.decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "anonymous"
@@ -0,0 +1,271 @@
+import gzip
+import hashlib
+import zlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.services.notifications import listener
+from app.tools.cache import LRUCache
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+class StreamCompressor(ABC):
+    """Incremental compressor; `compress` returns output that can be sent right away"""
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        ...
+
+    @abstractmethod
+    def finish(self) -> bytes:
+        ...
+
+
+class _GzipStream(StreamCompressor):
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream(StreamCompressor):
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdStream(StreamCompressor):
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+@dataclass(frozen=True)
+class Codec:
+    """A content coding with a fast level for per-request work and a slow one for stored variants"""
+
+    name: str
+    compress: Callable[[bytes, int], bytes]
+    stream: Callable[[int], StreamCompressor]
+    level: int
+    stored_level: int
+
+
+def _available_codecs() -> Tuple[Codec, ...]:
+    codecs = []
+    if zstandard is not None:
+        codecs.append(Codec(
+            "zstd", lambda data, level: zstandard.ZstdCompressor(level=level).compress(data),
+            _ZstdStream, level=3, stored_level=19,
+        ))
+    if brotli is not None:
+        codecs.append(Codec(
+            "br", lambda data, level: brotli.compress(data, quality=level),
+            _BrotliStream, level=4, stored_level=11,
+        ))
+    codecs.append(Codec(
+        "gzip", lambda data, level: gzip.compress(data, compresslevel=level, mtime=0),
+        _GzipStream, level=6, stored_level=9,
+    ))
+    return tuple(codecs)
+
+
+# Most preferred first; gzip is always available
+CODECS = _available_codecs()
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    accepted = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def negotiate(header: str, codecs: Sequence[Codec] = CODECS) -> Optional[Codec]:
+    """The codec the client rates highest, using server preference to break ties"""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for codec in codecs:
+        quality = accepted.get(codec.name, wildcard)
+        if quality > best_quality:
+            best, best_quality = codec, quality
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) or content_type.split(";")[0].endswith(("+json", "+xml"))
+
+
+# Catalog reads return the same few bodies over and over; menu search does not
+CATALOG_PATHS = ("/pizzas/", "/sizes/", "/toppings/")
+
+# Stored variants keyed by (codec, body digest), so a catalog response is only
+# compressed once however many requests serve it
+precompressed_cache: LRUCache[bytes] = LRUCache(maxsize=settings.COMPRESSION_CACHE_SIZE)
+
+
+def is_catalog_read(method: str, path: str) -> bool:
+    if path.startswith(settings.API_V1_STR):
+        path = path[len(settings.API_V1_STR):]
+    return method == "GET" and path.startswith(CATALOG_PATHS)
+
+
+class CompressionMiddleware:
+    """Compresses eligible responses with the best codec the client accepts.
+
+    Single-message responses under `minimum_size` are sent as they are.
+    Streaming responses are compressed chunk by chunk and flushed after each
+    one so clients see events as soon as they are produced. Catalog
+    responses are compressed once at a high level and then served from
+    `precompressed_cache`.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = settings.COMPRESSION_MINIMUM_SIZE,
+        codecs: Sequence[Codec] = CODECS,
+        cache: LRUCache[bytes] = precompressed_cache,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.codecs = codecs
+        self.cache = cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        codec = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.codecs)
+        if codec is None:
+            await self.app(scope, receive, send)
+            return
+        cacheable = is_catalog_read(scope["method"], scope["path"])
+        responder = _CompressionResponder(send, codec, self.minimum_size, self.cache if cacheable else None)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send: Send, codec: Codec, minimum_size: int, cache: Optional[LRUCache[bytes]]):
+        self._send = send
+        self._codec = codec
+        self._minimum_size = minimum_size
+        self._cache = cache
+        self._start: Optional[Message] = None
+        self._compressor: Optional[StreamCompressor] = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+        if self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._compressor is not None:
+            chunk = self._compressor.compress(body) if body else b""
+            if not more_body:
+                chunk += self._compressor.finish()
+            await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+            return
+
+        headers = MutableHeaders(scope=self._start)
+        if "content-encoding" in headers or not is_compressible(headers.get("content-type", "")):
+            await self._pass(message)
+            return
+        headers.add_vary_header("Accept-Encoding")
+        if not more_body:
+            if len(body) < self._minimum_size:
+                await self._pass(message)
+                return
+            body = self._compress_whole(body)
+            headers["Content-Encoding"] = self._codec.name
+            headers["Content-Length"] = str(len(body))
+            await self._send(self._start)
+            await self._send({"type": "http.response.body", "body": body})
+            return
+
+        del headers["Content-Length"]
+        headers["Content-Encoding"] = self._codec.name
+        self._compressor = self._codec.stream(self._codec.level)
+        await self._send(self._start)
+        await self._send({"type": "http.response.body", "body": self._compressor.compress(body), "more_body": True})
+
+    async def _pass(self, message: Message) -> None:
+        self._passthrough = True
+        await self._send(self._start)
+        await self._send(message)
+
+    def _compress_whole(self, body: bytes) -> bytes:
+        if self._cache is None:
+            return self._codec.compress(body, self._codec.level)
+        key = (self._codec.name, hashlib.blake2b(body, digest_size=16).digest())
+        compressed = self._cache.get(key)
+        if compressed is None:
+            compressed = self._codec.compress(body, self._codec.stored_level)
+            self._cache.set(key, compressed)
+        return compressed
+
+
+def _discard_stored_variants(payload: dict) -> None:
+    # Variants of the old menu can never be served again
+    precompressed_cache.clear()
+
+
+listener.add_handler(settings.MENU_CHANNEL, _discard_stored_variants)
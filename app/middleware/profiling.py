@@ -0,0 +1,71 @@
+import random
+import secrets
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.log_config import request_id
+from app.services.profiler import Profiler, profiler
+
+
+class ProfilingMiddleware:
+    """Profiles requests that ask for it with the admin token, plus a random sample.
+
+    A request sending PROFILER_HEADER together with a valid X-Admin-Token is
+    sampled for its whole lifetime, and so is a PROFILER_SAMPLE_RATE fraction
+    of all requests. The capture id comes back in the same header. Requests
+    are served normally when another capture is already running on the host.
+    """
+
+    def __init__(self, app: ASGIApp, profiler: Profiler = profiler,
+                 sample_rate: float = settings.PROFILER_SAMPLE_RATE,
+                 interval: float = settings.PROFILER_INTERVAL_MS / 1000,
+                 header: str = settings.PROFILER_HEADER):
+        self.app = app
+        self.profiler = profiler
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.header = header
+        self._header_key = header.lower().encode()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        self.profiler.in_flight += 1
+        try:
+            if not (self._requested(scope) or (self.sample_rate and random.random() < self.sample_rate)):
+                await self.app(scope, receive, send)
+                return
+            profile = self.profiler.start(
+                "request", self.interval, target=f"{scope['method']} {scope['path']}",
+                request_id=request_id.get(),
+            )
+            if profile is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_with_id(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).append(self.header, profile.id)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_id)
+            finally:
+                # Never block the event loop on the sampler thread
+                self.profiler.stop(profile, wait=False)
+        finally:
+            self.profiler.in_flight -= 1
+
+    def _requested(self, scope: Scope) -> bool:
+        wanted = token = None
+        for key, value in scope.get("headers", ()):
+            if key == self._header_key:
+                wanted = value
+            elif key == b"x-admin-token":
+                token = value
+        if wanted is None or token is None or not settings.ADMIN_TOKEN:
+            return False
+        return secrets.compare_digest(token, settings.ADMIN_TOKEN.encode())
@@ -0,0 +1,64 @@
+import logging
+import re
+import time
+import uuid
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.log_config import request_id
+
+logger = logging.getLogger(__name__)
+
+# Ids from a proxy or client are kept only if they are short and plain
+VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+
+class RequestIdMiddleware:
+    """Tags each request with an id for log correlation and writes its access log line.
+
+    An acceptable incoming id is kept so ids assigned upstream carry through,
+    otherwise one is generated. The id is echoed in the response headers.
+    """
+
+    def __init__(self, app: ASGIApp, header: str = settings.LOG_REQUEST_ID_HEADER,
+                 access_log: bool = settings.LOG_ACCESS_ENABLED):
+        self.app = app
+        self.header = header
+        self._header_key = header.lower().encode()
+        self.access_log = access_log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        current = self._incoming(scope) or uuid.uuid4().hex
+        token = request_id.set(current)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append(self.header, current)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            if self.access_log:
+                logger.info("%s %s %d", scope["method"], scope["path"], status, extra={
+                    "method": scope["method"], "path": scope["path"], "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                })
+            request_id.reset(token)
+
+    def _incoming(self, scope: Scope) -> Optional[str]:
+        for key, value in scope.get("headers", ()):
+            if key == self._header_key:
+                value = value.decode("latin-1")
+                return value if VALID_REQUEST_ID.fullmatch(value) else None
+        return None
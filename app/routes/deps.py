@@ -1,6 +1,12 @@
-from typing import Generator
+import secrets
+from typing import Generator, Optional
+from uuid import UUID
 
+from fastapi import Header, HTTPException
+
+from app.config import settings
 from app.db.database.session import SessionLocal
+from app.services.order_shards import order_shards
 
 
 def get_db() -> Generator:
@@ -9,3 +15,20 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+def get_order_db(order_id: UUID) -> Generator:
+    """A session on the shard holding the path's order"""
+    try:
+        db = order_shards.session_for(order_id)
+        yield db
+    finally:
+        db.close()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Gate operational endpoints behind ADMIN_TOKEN; they do not exist without one"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
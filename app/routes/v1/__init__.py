@@ -1,5 +1,10 @@
 from fastapi import APIRouter
-from app.routes.v1 import pizza
+from app.routes.v1 import pizza, dispatch, kitchen, customers, order_log, admin
 
 api_router = APIRouter()
-api_router.include_router(pizza.router, tags=["pizza"])
\ No newline at end of file
+api_router.include_router(pizza.router, tags=["pizza"])
+api_router.include_router(dispatch.router, tags=["dispatch"])
+api_router.include_router(kitchen.router, tags=["kitchen"])
+api_router.include_router(customers.router, tags=["customers"])
+api_router.include_router(order_log.router, tags=["order-log"])
+api_router.include_router(admin.router, tags=["admin"])
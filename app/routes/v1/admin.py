@@ -0,0 +1,165 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from uuid import UUID
+
+from app.routes.deps import get_db, require_admin
+from app.middleware.compression import precompressed_cache
+from app.services.catalog_service import CatalogService
+from app.services.customer_service import customer_orders_cache
+from app.services.order_cache import order_responses
+from app.services.order_shards import order_shards
+from app.services.profiler import profiler
+from app.services.promotion_service import PromotionService
+from app.db.schemas.pizza import CatalogImport, ProfileWindow, PromotionCreate, PromotionResponse
+from app.db.schemas.base import BaseResponse
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/admin/caches", response_model=BaseResponse)
+def get_cache_stats():
+    return BaseResponse(
+        message="Cache statistics retrieved successfully",
+        status=0,
+        data={
+            "orders": order_responses.cache.snapshot(),
+            "customer_orders": customer_orders_cache.snapshot(),
+            "precompressed": precompressed_cache.snapshot(),
+        }
+    )
+
+@router.get("/admin/shards", response_model=BaseResponse)
+def get_shards():
+    """Buckets per order shard as this worker routes them"""
+    try:
+        owners = order_shards.owners()
+        return BaseResponse(
+            message="Order shards retrieved successfully",
+            status=0,
+            data={
+                "key": order_shards.key,
+                "buckets": order_shards.buckets,
+                "shards": [{"id": shard.id, "buckets": int((owners == shard.id).sum())} for shard in order_shards.shards],
+            }
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get order shards: {str(e)}")
+
+@router.post("/admin/catalog/import", response_model=BaseResponse)
+def import_catalog(catalog: CatalogImport, dry_run: bool = Query(False), db: Session = Depends(get_db)):
+    try:
+        return BaseResponse(
+            message="Catalog import checked" if dry_run else "Catalog imported successfully",
+            status=0,
+            data=CatalogService.import_catalog(db, catalog, dry_run)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to import catalog: {str(e)}")
+
+@router.post("/admin/catalog/import/csv", response_model=BaseResponse)
+async def import_catalog_csv(request: Request, dry_run: bool = Query(False), db: Session = Depends(get_db)):
+    """Import a CSV body (text/csv) in the format of CatalogService.parse_csv"""
+    try:
+        content = (await request.body()).decode("utf-8-sig")
+        catalog = await run_in_threadpool(CatalogService.parse_csv, content)
+        counts = await run_in_threadpool(CatalogService.import_catalog, db, catalog, dry_run)
+        return BaseResponse(
+            message="Catalog import checked" if dry_run else "Catalog imported successfully",
+            status=0,
+            data=counts
+        )
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to import catalog: {str(e)}")
+
+@router.get("/admin/promotions", response_model=BaseResponse)
+def get_promotions(db: Session = Depends(get_db)):
+    try:
+        return BaseResponse(
+            message="Promotions retrieved successfully",
+            status=0,
+            data=[PromotionResponse.model_validate(promotion) for promotion in PromotionService.list_promotions(db)]
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get promotions: {str(e)}")
+
+@router.post("/admin/promotions", response_model=BaseResponse)
+def create_promotion(promotion: PromotionCreate, db: Session = Depends(get_db)):
+    try:
+        created = PromotionService.create_promotion(db, promotion)
+        return BaseResponse(
+            message="Promotion created successfully",
+            status=0,
+            data=PromotionResponse.model_validate(created)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.delete("/admin/promotions/{promotion_id}", response_model=BaseResponse)
+def deactivate_promotion(promotion_id: UUID, db: Session = Depends(get_db)):
+    try:
+        promotion = PromotionService.deactivate_promotion(db, promotion_id)
+        if not promotion:
+            raise HTTPException(status_code=404, detail="Promotion not found")
+        return BaseResponse(
+            message="Promotion deactivated",
+            status=0,
+            data=PromotionResponse.model_validate(promotion)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to deactivate promotion: {str(e)}")
+
+@router.get("/admin/profiles", response_model=BaseResponse)
+def get_profiles():
+    return BaseResponse(
+        message="Profiles retrieved successfully",
+        status=0,
+        data=[profile.summary() for profile in profiler.list()]
+    )
+
+@router.post("/admin/profiles", response_model=BaseResponse)
+def start_profile(window: ProfileWindow):
+    profile = profiler.start("window", window.interval_ms / 1000, seconds=window.seconds)
+    if profile is None:
+        raise HTTPException(status_code=409, detail="A profile is already being captured on this host")
+    return BaseResponse(
+        message="Profiling started",
+        status=0,
+        data=profile.summary()
+    )
+
+@router.get("/admin/profiles/{profile_id}", response_model=BaseResponse)
+def get_profile(profile_id: str, limit: int = Query(30, ge=1, le=500)):
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return BaseResponse(
+        message="Profile retrieved successfully",
+        status=0,
+        data={**profile.summary(), "functions": profile.functions(limit)}
+    )
+
+@router.get("/admin/profiles/{profile_id}/collapsed", response_class=PlainTextResponse)
+def get_profile_stacks(profile_id: str):
+    """Folded stacks for flamegraph.pl, speedscope and similar tools"""
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile.collapsed())
+
+@router.delete("/admin/profiles/{profile_id}", response_model=BaseResponse)
+def stop_profile(profile_id: str):
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return BaseResponse(
+        message="Profiling stopped",
+        status=0,
+        data=profiler.stop(profile).summary()
+    )
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.routes.deps import get_db
+from app.services.customer_service import CustomerService
+from app.db.schemas.base import BaseResponse
+from app.tools.phone import normalize_phone
+
+router = APIRouter()
+
+@router.get("/customers/{phone}/orders", response_model=BaseResponse)
+def get_customer_orders(
+    phone: str,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    phone_e164 = normalize_phone(phone)
+    if not phone_e164:
+        raise HTTPException(status_code=400, detail="Invalid phone number")
+    try:
+        page = CustomerService.get_orders(db, phone_e164, limit, cursor)
+        return BaseResponse(
+            message="Customer orders retrieved successfully",
+            status=0,
+            data=page
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get customer orders: {str(e)}")
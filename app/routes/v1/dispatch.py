@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from uuid import UUID
+
+from app.routes.deps import get_db, get_order_db
+from app.services.dispatch_service import DispatchService
+from app.db.schemas.pizza import DriverRequest, OrderResponse
+from app.db.schemas.base import BaseResponse
+
+router = APIRouter()
+
+@router.post("/dispatch/orders/{order_id}/ready", response_model=BaseResponse)
+def mark_order_ready(order_id: UUID, db: Session = Depends(get_order_db)):
+    try:
+        order = DispatchService.mark_ready(db, order_id)
+        if not order:
+            raise HTTPException(status_code=404, detail="Order not found")
+        return BaseResponse(
+            message="Order ready for delivery",
+            status=0,
+            data=OrderResponse.model_validate(order)
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to mark order ready: {str(e)}")
+
+@router.post("/dispatch/next-batch", response_model=BaseResponse)
+def next_delivery_batch(driver: DriverRequest, db: Session = Depends(get_db)):
+    try:
+        run = DispatchService.next_batch(db, driver.driver_id, driver.capacity)
+        return BaseResponse(
+            message="Delivery batch assigned" if run.stops else "No orders waiting for delivery",
+            status=0,
+            data=run
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to assign delivery batch: {str(e)}")
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from uuid import UUID
+
+from app.config import settings
+from app.routes.deps import get_db, get_order_db
+from app.services.forecast_service import ForecastService
+from app.services.kitchen_service import KitchenService
+from app.db.schemas.pizza import OrderResponse
+from app.db.schemas.base import BaseResponse
+
+router = APIRouter()
+
+@router.post("/kitchen/orders/{order_id}/prepped", response_model=BaseResponse)
+def order_prepped(order_id: UUID, db: Session = Depends(get_order_db)):
+    try:
+        if not KitchenService.prep_done(db, order_id):
+            raise HTTPException(status_code=404, detail="Order not found")
+        return BaseResponse(message="Order prep recorded", status=0)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to record prep: {str(e)}")
+
+@router.post("/kitchen/orders/{order_id}/complete", response_model=BaseResponse)
+def order_baked(order_id: UUID, db: Session = Depends(get_order_db)):
+    try:
+        order = KitchenService.complete(db, order_id)
+        if not order:
+            raise HTTPException(status_code=404, detail="Order not found")
+        return BaseResponse(
+            message="Order ready for delivery",
+            status=0,
+            data=OrderResponse.model_validate(order)
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to complete order: {str(e)}")
+
+
+@router.get("/forecast", response_model=BaseResponse)
+def get_forecast(
+    horizon: int = Query(16, ge=1, le=settings.FORECAST_MAX_HORIZON_SLOTS),
+    pizza_id: Optional[UUID] = None,
+    db: Session = Depends(get_db)
+):
+    """Expected pizzas per pizza and size for the next `horizon` slots"""
+    try:
+        return BaseResponse(
+            message="Demand forecast",
+            status=0,
+            data=ForecastService.forecast(db, horizon, pizza_id)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to forecast demand: {str(e)}")
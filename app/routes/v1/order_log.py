@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.config import settings
+from app.routes.deps import get_db
+from app.services.order_log import OrderLogService, decode_cursor, encode_cursor
+from app.db.schemas.pizza import OrderEventAck
+from app.db.schemas.base import BaseResponse
+
+router = APIRouter()
+
+@router.get("/order-log/{consumer}/", response_model=BaseResponse)
+async def read_order_log(
+    consumer: str,
+    limit: int = Query(settings.ORDER_LOG_BATCH_SIZE, ge=1, le=settings.ORDER_LOG_MAX_BATCH_SIZE),
+    wait: float = Query(0, ge=0, le=settings.ORDER_LOG_MAX_WAIT_SECONDS),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Next batch after the consumer's acknowledged position, or after `cursor` when given.
+
+    Nothing moves until the consumer acknowledges the returned cursor, so
+    delivery is at least once.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        page = await OrderLogService.poll(db, consumer, limit, wait, after)
+        return BaseResponse(
+            message="Order events retrieved successfully",
+            status=0,
+            data=page
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to read order events: {str(e)}")
+
+@router.post("/order-log/{consumer}/ack", response_model=BaseResponse)
+def acknowledge_order_log(consumer: str, ack: OrderEventAck, db: Session = Depends(get_db)):
+    try:
+        position = OrderLogService.acknowledge(db, consumer, ack.cursor)
+        return BaseResponse(
+            message="Order log position stored",
+            status=0,
+            data=OrderEventAck(cursor=encode_cursor(position))
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to store order log position: {str(e)}")
@@ -1,16 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
-from app.routes.deps import get_db
+from app.routes.deps import get_db, get_order_db
 from app.services.pizza_service import PizzaService
 from app.services.checkout_service import CheckoutService
+from app.services.menu_search_service import MenuSearchService
+from app.services.order_cache import order_responses
+from app.services.order_shards import order_shards
 from app.db.schemas.pizza import (
-    OrderCreate, DeliveryDetails,
-    PizzaResponse, SizeResponse, ToppingResponse, OrderResponse, CreateOrderResponse
+    OrderCreate, CartOrderCreate, DeliveryDetails,
+    PizzaResponse, SizeResponse, ToppingResponse, OrderResponse, CreateOrderResponse,
+    CheckoutOrderResponse
 )
 from app.db.schemas.base import BaseResponse
+from app.services.order_status_broker import order_status_broker, TERMINAL_STATUSES, RESYNC
+from app.config import settings
 
 router = APIRouter()
 
@@ -35,6 +45,21 @@ def get_toppings(db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get toppings: {str(e)}")
 
+@router.get("/menu/search", response_model=BaseResponse)
+def search_menu(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    try:
+        return BaseResponse(
+            message="Menu search results",
+            status=0,
+            data=MenuSearchService.search(db, q, limit)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to search menu: {str(e)}")
+
 @router.post("/orders/", response_model=BaseResponse)
 def create_order(order: OrderCreate, db: Session = Depends(get_db)):
     try:
@@ -47,27 +72,101 @@ def create_order(order: OrderCreate, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/orders/{order_id}/", response_model=OrderResponse)
-def get_order(order_id: UUID, db: Session = Depends(get_db)):
+@router.post("/orders/cart/", response_model=BaseResponse)
+def create_cart_order(cart: CartOrderCreate, db: Session = Depends(get_db)):
     try:
+        created_order = PizzaService.create_cart_order(db, cart)
+        return BaseResponse(
+            message="Order created successfully",
+            status=0,
+            data=OrderResponse.model_validate(created_order)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _order_body(order_id: UUID) -> Optional[bytes]:
+    with order_shards.session_for(order_id) as db:
         order = PizzaService.get_order(db, order_id)
         if not order:
-            raise HTTPException(status_code=404, detail="Order not found")
+            return None
         return BaseResponse(
             message="Order retrieved successfully",
             status=0,
             data=OrderResponse.model_validate(order)
-        )
+        ).model_dump_json().encode()
+
+@router.get("/orders/{order_id}/", response_model=BaseResponse)
+def get_order(order_id: UUID):
+    # Hot orders are served as stored bytes, without a session or serialization
+    try:
+        body = order_responses.load(order_id, lambda: _order_body(order_id))
+        if body is None:
+            raise HTTPException(status_code=404, detail="Order not found")
+        return Response(content=body, media_type="application/json")
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get order: {str(e)}")
 
-@router.post("/checkout/{order_id}/", response_model=OrderResponse)
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.get("/orders/{order_id}/events")
+async def order_events(order_id: UUID, request: Request, db: Session = Depends(get_order_db)):
+    # Subscribe before reading so a change racing the initial read is not lost
+    queue = order_status_broker.subscribe(order_id)
+    try:
+        order = await run_in_threadpool(PizzaService.get_order, db, order_id)
+        if not order:
+            raise HTTPException(status_code=404, detail="Order not found")
+        status = order.status
+    except HTTPException:
+        order_status_broker.unsubscribe(order_id, queue)
+        raise
+    except Exception as e:
+        order_status_broker.unsubscribe(order_id, queue)
+        raise HTTPException(status_code=500, detail=f"Failed to get order: {str(e)}")
+    finally:
+        # Release the connection; the stream itself never touches the database
+        db.close()
+
+    async def stream():
+        current = {"order_id": str(order_id), "status": status.value}
+        try:
+            yield _sse("status", current)
+            while current["status"] not in TERMINAL_STATUSES:
+                if await request.is_disconnected():
+                    break
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), timeout=settings.ORDER_EVENTS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is RESYNC:
+                    with order_shards.session_for(order_id) as session:
+                        order = await run_in_threadpool(PizzaService.get_order, session, order_id)
+                    if not order:
+                        break
+                    event = {"order_id": str(order_id), "status": order.status.value}
+                if event["status"] != current["status"]:
+                    current = event
+                    yield _sse("status", current)
+        finally:
+            order_status_broker.unsubscribe(order_id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/checkout/{order_id}/", response_model=BaseResponse)
 def checkout_order(
     order_id: UUID,
     delivery_details: DeliveryDetails,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_order_db)
 ):
     try:
         order = CheckoutService.process_checkout(db, order_id, delivery_details)
@@ -76,7 +175,7 @@ def checkout_order(
         return BaseResponse(
             message="Order processed successfully",
             status=0,
-            data=OrderResponse.model_validate(order)
+            data=CheckoutOrderResponse.model_validate(order)
         )
     except HTTPException:
         raise
@@ -0,0 +1,73 @@
+"""Check every order's stored totals against menu prices as of its date.
+
+Reads orders in keyset chunks, each in its own short snapshot, and prices
+them from menu_prices with NumPy (see app.services.order_audit). With
+--repair, mismatched orders and their lines are rewritten in small throttled
+transactions that skip any order changed since it was read, and each repair
+is recorded as a `repriced` order event. Cached order responses on running
+workers pick up repaired totals once they expire. Order shards are audited
+one after another, each only in the buckets it owns; --after and --until
+apply to each.
+
+    python -m app.scripts.audit_order_totals --report mismatches.csv
+    python -m app.scripts.audit_order_totals --repair --pause 0.05
+"""
+import argparse
+import csv
+from dataclasses import astuple, fields
+from uuid import UUID
+
+from app.db.backfill import Throttle
+from app.services.order_audit import Mismatch, run_audit
+from app.services.order_shards import order_shards
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunk-size", type=int, default=50000, help="orders read per query")
+    parser.add_argument("--after", type=UUID, default=None, help="resume after this order id")
+    parser.add_argument("--until", type=UUID, default=None, help="stop at this order id")
+    parser.add_argument("--report", default=None, help="write mismatched orders to this CSV file")
+    parser.add_argument("--repair", action="store_true", help="rewrite mismatched totals")
+    parser.add_argument("--repair-batch-size", type=int, default=500, help="orders repaired per transaction")
+    parser.add_argument("--pause", type=float, default=0.05, help="seconds to sleep between repair batches")
+    parser.add_argument("--lock-timeout", default="2s")
+    parser.add_argument("--max-replication-lag", type=float, default=5.0, help="seconds")
+    parser.add_argument("--max-active-queries", type=int, default=None)
+    args = parser.parse_args()
+    throttle = Throttle(
+        pause=args.pause,
+        lock_timeout=args.lock_timeout,
+        max_replication_lag=args.max_replication_lag,
+        max_active_queries=args.max_active_queries,
+    )
+
+    report_file = open(args.report, "w", newline="") if args.report else None
+    try:
+        on_mismatch = None
+        if report_file is not None:
+            writer = csv.writer(report_file)
+            writer.writerow([field.name for field in fields(Mismatch)])
+
+            def on_mismatch(mismatches):
+                writer.writerows(astuple(mismatch) for mismatch in mismatches)
+
+        for shard in order_shards.shards:
+            report = run_audit(
+                shard.engine, args.chunk_size, repair=args.repair, throttle=throttle,
+                repair_batch_size=args.repair_batch_size, after=args.after, until=args.until,
+                on_mismatch=on_mismatch, where=order_shards.owned_sql(shard),
+            )
+            print(
+                f"Shard {shard.id} done in {report.elapsed:.1f}s: {report.orders} orders and {report.lines} lines, "
+                f"{report.mismatched_orders} orders mismatched ({report.total_difference:+.2f}), "
+                f"{report.unpriceable_orders} with unknown items, {report.empty_orders} without lines, "
+                f"{report.repaired_orders} repaired"
+            )
+    finally:
+        if report_file is not None:
+            report_file.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Backfill orders.phone_e164 in small batches.
+
+Runs on the batched backfill framework in app.db.backfill: each chunk is its
+own short transaction with a lock timeout, resumes from its checkpoint after
+an interruption and slows down while replicas lag. Order shards are
+backfilled one after another, each in the buckets it owns and with its own
+checkpoint; copies of moved buckets are fenced and left alone.
+
+    python -m app.scripts.backfill_phone_numbers --batch-size 5000 --pause 0.05
+    python -m app.scripts.backfill_phone_numbers --dry-run
+"""
+import argparse
+from dataclasses import replace
+from typing import Sequence
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Row
+
+from app.db.backfill import Backfill, Throttle, dry_run, print_progress, run_backfill
+from app.services.order_shards import Shard, order_shards
+from app.tools.phone import normalize_phone
+
+UPDATE_BATCH = text("""
+    UPDATE orders SET phone_e164 = batch.phone_e164
+    FROM unnest(CAST(:ids AS uuid[]), CAST(:phones AS text[])) AS batch(id, phone_e164)
+    WHERE orders.id = batch.id AND orders.phone_e164 IS NULL
+""")
+
+
+def normalize_batch(conn: Connection, rows: Sequence[Row]) -> int:
+    normalized = [(row.id, normalize_phone(row.phone_number)) for row in rows]
+    normalized = [(order_id, phone) for order_id, phone in normalized if phone]
+    if not normalized:
+        return 0
+    ids, phones = zip(*normalized)
+    return conn.execute(UPDATE_BATCH, {"ids": list(ids), "phones": list(phones)}).rowcount
+
+
+PHONE_NUMBERS = Backfill(
+    name="orders.phone_e164",
+    table="orders",
+    where="phone_e164 IS NULL",
+    columns=("phone_number",),
+    apply=normalize_batch,
+)
+
+
+def shard_phone_numbers(shard: Shard) -> Backfill:
+    """The backfill limited to the buckets `shard` owns"""
+    return replace(PHONE_NUMBERS, where=f"{PHONE_NUMBERS.where} AND ({order_shards.owned_sql(shard)})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--pause", type=float, default=0.05, help="seconds to sleep between batches")
+    parser.add_argument("--lock-timeout", default="2s")
+    parser.add_argument("--max-replication-lag", type=float, default=5.0, help="seconds")
+    parser.add_argument("--max-active-queries", type=int, default=None)
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+    parser.add_argument("--dry-run", action="store_true", help="time a sample of batches and roll them back")
+    args = parser.parse_args()
+    throttle = Throttle(
+        pause=args.pause,
+        lock_timeout=args.lock_timeout,
+        max_replication_lag=args.max_replication_lag,
+        max_active_queries=args.max_active_queries,
+    )
+    for shard in order_shards.shards:
+        if args.dry_run:
+            estimate = dry_run(shard.engine, shard_phone_numbers(shard), throttle, args.batch_size)
+            print(
+                f"Shard {shard.id}: ~{estimate.estimated_rows} orders to visit; {estimate.sampled_rows} sampled in "
+                f"{estimate.sampled_seconds:.2f}s; estimated {estimate.seconds:.0f}s"
+            )
+            continue
+        progress = run_backfill(
+            shard.engine, shard_phone_numbers(shard), throttle, args.batch_size,
+            restart=args.restart, report=print_progress,
+        )
+        print(f"Shard {shard.id} done, {progress.rows_updated} orders backfilled")
+
+
+if __name__ == "__main__":
+    main()
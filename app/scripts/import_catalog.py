@@ -0,0 +1,44 @@
+"""Import pizzas, sizes and toppings from a CSV or JSON menu file.
+
+Items are upserted by name in one transaction; unchanged items are not
+rewritten and one menu change notification is sent at the end. CSV files
+have a `type` column (pizza, size or topping), JSON files match the
+CatalogImport schema.
+
+    python -m app.scripts.import_catalog menus/store-42.csv
+    python -m app.scripts.import_catalog menus/store-42.json --dry-run
+"""
+import argparse
+import time
+from pathlib import Path
+
+from app.db.database.session import SessionLocal
+from app.db.schemas.pizza import CatalogImport
+from app.services.catalog_service import CatalogService
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=("csv", "json"), help="defaults to the file extension")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change and roll back")
+    args = parser.parse_args()
+    file_format = args.format or args.path.suffix.lstrip(".").lower()
+    if file_format not in ("csv", "json"):
+        parser.error(f"cannot tell the format of {args.path}; pass --format")
+
+    started = time.perf_counter()
+    content = args.path.read_text(encoding="utf-8-sig")
+    if file_format == "csv":
+        catalog = CatalogService.parse_csv(content)
+    else:
+        catalog = CatalogImport.model_validate_json(content)
+    with SessionLocal() as db:
+        counts = CatalogService.import_catalog(db, catalog, dry_run=args.dry_run)
+    for key, table_counts in counts.items():
+        print(f"{key:>9}: " + ", ".join(f"{count} {name}" for name, count in table_counts.items()))
+    print(f"{'Checked' if args.dry_run else 'Imported'} in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
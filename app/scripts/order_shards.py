@@ -0,0 +1,72 @@
+"""Inspect and rebalance order shards.
+
+`move` and `rebalance` copy buckets to their new shard while orders keep
+being taken and flip the map once the copy has caught up (see
+app.services.shard_rebalance). The old shard keeps its copy until `purge`
+deletes it, which is refused until the bucket has been gone for the grace
+period, so workers holding an old map have seen the fence by then.
+
+    python -m app.scripts.order_shards status
+    python -m app.scripts.order_shards sync-catalog
+    python -m app.scripts.order_shards move 17 2
+    python -m app.scripts.order_shards rebalance --dry-run
+    python -m app.scripts.order_shards purge 17 0 --grace 600
+"""
+import argparse
+
+from app.db.backfill import Throttle
+from app.services.order_shards import order_shards
+from app.services.shard_rebalance import move_bucket, plan_rebalance, purge_bucket, shard_status
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=2000, help="orders copied or purged per transaction")
+    parser.add_argument("--pause", type=float, default=0.05, help="seconds to sleep between batches")
+    parser.add_argument("--lock-timeout", default="2s")
+    parser.add_argument("--max-replication-lag", type=float, default=5.0, help="seconds")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="buckets per shard")
+    commands.add_parser("sync-catalog", help="copy the catalog to every shard")
+    move = commands.add_parser("move", help="move one bucket to a shard")
+    move.add_argument("bucket", type=int)
+    move.add_argument("shard", type=int)
+    rebalance = commands.add_parser("rebalance", help="even out buckets across all shards")
+    rebalance.add_argument("--dry-run", action="store_true", help="print the moves without making them")
+    purge = commands.add_parser("purge", help="delete a moved bucket's old copy")
+    purge.add_argument("bucket", type=int)
+    purge.add_argument("shard", type=int)
+    purge.add_argument("--grace", type=float, default=600, help="seconds since the bucket left the shard")
+    args = parser.parse_args()
+    throttle = Throttle(pause=args.pause, lock_timeout=args.lock_timeout, max_replication_lag=args.max_replication_lag)
+
+    if not order_shards.sharded and args.command != "status":
+        parser.error("ORDER_SHARD_URIS is not set")
+    if args.command == "status":
+        for shard_id, buckets in shard_status():
+            print(f"shard {shard_id}: {buckets} of {order_shards.buckets} buckets")
+    elif args.command == "sync-catalog":
+        for shard_id, written in order_shards.replicate_catalog().items():
+            print(f"shard {shard_id}: {written} catalog rows written")
+    elif args.command == "move":
+        try:
+            move_bucket(args.bucket, args.shard, throttle, args.batch_size)
+        except ValueError as e:
+            parser.error(str(e))
+    elif args.command == "rebalance":
+        moves = plan_rebalance(order_shards.owners(), len(order_shards.shards))
+        for bucket, source, target in moves:
+            print(f"bucket {bucket}: shard {source} -> {target}")
+            if not args.dry_run:
+                move_bucket(bucket, target, throttle, args.batch_size)
+        print(f"{len(moves)} buckets {'to move' if args.dry_run else 'moved'}")
+    elif args.command == "purge":
+        try:
+            deleted = purge_bucket(args.bucket, args.shard, args.grace, throttle, args.batch_size)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Deleted {deleted} orders of bucket {args.bucket} from shard {args.shard}")
+
+
+if __name__ == "__main__":
+    main()
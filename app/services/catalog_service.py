@@ -0,0 +1,143 @@
+import csv
+import io
+from dataclasses import dataclass
+from typing import Dict, List, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Table, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
+
+from app.config import settings
+from app.db.models.pizza import Pizza
+from app.db.models.size import Size
+from app.db.models.topping import Topping
+from app.db.schemas.pizza import CatalogImport, CatalogPizza, CatalogSize, CatalogTopping
+from app.services.notifications import notify
+from app.services.order_shards import order_shards
+
+CSV_COLUMNS = ("type", "name", "description", "base_price", "image", "multiplier", "price", "icon")
+
+
+@dataclass(frozen=True)
+class CatalogTable:
+    """A menu table imported by name, with the columns an import may set"""
+    key: str
+    kind: str
+    table: Table
+    schema: Type[BaseModel]
+    columns: Tuple[str, ...]
+
+    def upsert_statement(self) -> TextClause:
+        """Insert new names and update changed ones from parallel arrays, one statement per batch.
+
+        Optional columns keep their current value when the import leaves them
+        empty. The WHERE on the update skips rows whose values already match,
+        so an unchanged row writes no new tuple. RETURNING then yields only
+        rows that were written; `xmax = 0` marks the inserted ones.
+        """
+        dialect = postgresql.dialect()
+        columns = ("name",) + self.columns
+        arrays = ", ".join(
+            f"CAST(:{column} AS {self.table.c[column].type.compile(dialect)}[])" for column in columns
+        )
+        values = {
+            column: (f"COALESCE(excluded.{column}, {self.table.name}.{column})"
+                     if self.table.c[column].nullable else f"excluded.{column}")
+            for column in self.columns
+        }
+        current = ", ".join(f"{self.table.name}.{column}" for column in self.columns)
+        incoming = ", ".join(values.values())
+        return text(f"""
+            INSERT INTO {self.table.name} ({", ".join(columns)})
+            SELECT * FROM unnest({arrays})
+            ON CONFLICT (name) DO UPDATE SET {", ".join(f"{column} = {value}" for column, value in values.items())}
+            WHERE ({current}) IS DISTINCT FROM ({incoming})
+            RETURNING xmax = 0 AS inserted
+        """)
+
+
+CATALOG_TABLES = (
+    CatalogTable("pizzas", "pizza", Pizza.__table__, CatalogPizza, ("description", "base_price", "image")),
+    CatalogTable("sizes", "size", Size.__table__, CatalogSize, ("multiplier",)),
+    CatalogTable("toppings", "topping", Topping.__table__, CatalogTopping, ("price", "icon")),
+)
+UPSERTS = {catalog_table.key: catalog_table.upsert_statement() for catalog_table in CATALOG_TABLES}
+
+
+class CatalogService:
+    @staticmethod
+    def parse_csv(content: str) -> CatalogImport:
+        """Read a menu from CSV with a `type` column of pizza, size or topping.
+
+        The other columns are those of CSV_COLUMNS that apply to the type;
+        empty cells are treated as missing.
+        """
+        kinds = {catalog_table.kind: catalog_table for catalog_table in CATALOG_TABLES}
+        items: Dict[str, List[BaseModel]] = {catalog_table.key: [] for catalog_table in CATALOG_TABLES}
+        reader = csv.DictReader(io.StringIO(content))
+        missing = {"type", "name"} - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"CSV is missing columns: {', '.join(sorted(missing))}")
+        for row in reader:
+            kind = (row.get("type") or "").strip().lower()
+            catalog_table = kinds.get(kind)
+            if catalog_table is None:
+                raise ValueError(f"Line {reader.line_num}: unknown type {kind!r}")
+            values = {
+                column: value.strip() for column in ("name",) + catalog_table.columns
+                if (value := row.get(column)) is not None and value.strip()
+            }
+            try:
+                items[catalog_table.key].append(catalog_table.schema.model_validate(values))
+            except ValidationError as e:
+                raise ValueError(f"Line {reader.line_num}: {e}")
+        return CatalogImport(**items)
+
+    @staticmethod
+    def import_catalog(db: Session, catalog: CatalogImport, dry_run: bool = False) -> Dict[str, Dict[str, int]]:
+        """Upsert every item by name in one transaction and notify once if anything changed.
+
+        Items missing from the import are left alone; orders may reference
+        them. With `dry_run` the same statements run and are rolled back, so
+        the counts show what an import would change.
+        """
+        total = sum(len(getattr(catalog, catalog_table.key)) for catalog_table in CATALOG_TABLES)
+        if total > settings.CATALOG_IMPORT_MAX_ITEMS:
+            raise ValueError(f"Catalog has {total} items, more than {settings.CATALOG_IMPORT_MAX_ITEMS}")
+
+        batch_size = settings.CATALOG_IMPORT_BATCH_SIZE
+        counts = {}
+        try:
+            for catalog_table in CATALOG_TABLES:
+                items = getattr(catalog, catalog_table.key)
+                # Postgres cannot upsert one key twice in a statement; the last listing wins
+                latest = list({item.name: item for item in items}.values())
+                table_counts = {"inserted": 0, "updated": 0, "unchanged": 0, "duplicates": len(items) - len(latest)}
+                for start in range(0, len(latest), batch_size):
+                    batch = latest[start:start + batch_size]
+                    written = db.execute(UPSERTS[catalog_table.key], {
+                        column: [getattr(item, column) for item in batch]
+                        for column in ("name",) + catalog_table.columns
+                    }).scalars().all()
+                    inserted = sum(written)
+                    table_counts["inserted"] += inserted
+                    table_counts["updated"] += len(written) - inserted
+                    table_counts["unchanged"] += len(batch) - len(written)
+                counts[catalog_table.key] = table_counts
+
+            changed = sum(table_counts["inserted"] + table_counts["updated"] for table_counts in counts.values())
+            if dry_run:
+                db.rollback()
+                return counts
+            if changed:
+                notify(db, settings.MENU_CHANNEL, {"source": "catalog_import", "changed": changed})
+            db.commit()
+            if changed:
+                # Orders on other shards need the new items before they can reference them
+                order_shards.replicate_catalog()
+            return counts
+        except Exception:
+            db.rollback()
+            raise
@@ -1,7 +1,17 @@
+import time
 from sqlalchemy.orm import Session
+from typing import Optional
 from uuid import UUID
-from app.db.models.order import Order
+from app.config import settings
+from app.db.models.order import Order, OrderStatus
 from app.db.schemas.pizza import DeliveryDetails
+from app.services.customer_service import CustomerService
+from app.services.geocoding import Coordinates, get_geocoder
+from app.services.kitchen_service import KitchenService
+from app.services.notifications import notify
+from app.services.order_cache import order_responses
+from app.services.order_log import OrderLogService
+from app.services.pizza_service import PizzaService
 
 class CheckoutService:
     @staticmethod
@@ -9,6 +19,41 @@ class CheckoutService:
         order = db.query(Order).filter(Order.id == order_id).first()
         if order:
             # Add delivery details processing logic here
-            # For example, update order status, save delivery details, etc.
+            # For example, save delivery details, etc.
+            coordinates = CheckoutService.resolve_coordinates(delivery_details)
+            if coordinates:
+                order.latitude, order.longitude = coordinates
+            if order.status == OrderStatus.PENDING:
+                at = time.time()
+                order = PizzaService.update_order_status(
+                    db, order, OrderStatus.CONFIRMED,
+                    extra={"at": at, "size_multiplier": order.size.multiplier}
+                )
+                KitchenService.schedule(order, at)
+            elif coordinates:
+                OrderLogService.append(
+                    db, order.id, "delivery_updated", {"latitude": order.latitude, "longitude": order.longitude}
+                )
+                # Re-announce the unchanged status so every worker sees the new address
+                payload = {
+                    "order_id": str(order.id), "status": order.status.value,
+                    "latitude": order.latitude, "longitude": order.longitude,
+                }
+                if order.ready_at is not None:
+                    # Keeps a ready order's dispatch deadline where it was
+                    payload["at"] = order.ready_at.timestamp()
+                notify(db, settings.ORDER_STATUS_CHANNEL, payload)
+                CustomerService.announce(db, [order.phone_e164])
+                db.commit()
+                order_responses.invalidate(order.id)
+                CustomerService.invalidate(order.phone_e164)
+            order.eta = KitchenService.estimate_delivery(order)
             return order
-        return None 
\ No newline at end of file
+        return None
+
+    @staticmethod
+    def resolve_coordinates(delivery_details: DeliveryDetails) -> Optional[Coordinates]:
+        """Use client-supplied coordinates, falling back to the configured geocoder"""
+        if delivery_details.latitude is not None and delivery_details.longitude is not None:
+            return delivery_details.latitude, delivery_details.longitude
+        return get_geocoder().geocode(delivery_details.address)
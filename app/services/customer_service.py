@@ -0,0 +1,142 @@
+import base64
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, selectinload
+
+from app.config import settings
+from app.db.models.order import Order
+from app.db.schemas.pizza import CustomerOrdersResponse, OrderResponse
+from app.services.notifications import listener, notify
+from app.services.order_shards import Shard, merge_ordered, order_shards
+from app.tools.cache import LRUCache
+
+# Recent lookups per normalized phone, keyed inside by (cursor, limit)
+customer_orders_cache: LRUCache[dict] = LRUCache(
+    settings.CUSTOMER_LOOKUP_CACHE_SIZE, ttl=settings.CUSTOMER_LOOKUP_CACHE_TTL_SECONDS
+)
+
+
+class _LookupGenerations:
+    """Invalidations per phone, so a lookup racing one is not stored.
+
+    As in OrderResponseCache, a phone only carries a generation while a
+    lookup of it is in flight; dropping the whole cache bumps the epoch.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._epoch = 0
+        self._loading: Dict[str, int] = {}
+        self._generations: Dict[str, int] = {}
+
+    def start(self, phone_e164: str) -> Tuple[int, int]:
+        with self.lock:
+            self._loading[phone_e164] = self._loading.get(phone_e164, 0) + 1
+            return self.current(phone_e164)
+
+    def current(self, phone_e164: str) -> Tuple[int, int]:
+        return self._epoch, self._generations.get(phone_e164, 0)
+
+    def finish(self, phone_e164: str) -> None:
+        with self.lock:
+            self._loading[phone_e164] -= 1
+            if not self._loading[phone_e164]:
+                del self._loading[phone_e164]
+                self._generations.pop(phone_e164, None)
+
+    def bump(self, phone_e164: str) -> None:
+        if phone_e164 in self._loading:
+            self._generations[phone_e164] = self._generations.get(phone_e164, 0) + 1
+
+    def bump_all(self) -> None:
+        self._epoch += 1
+
+
+_lookups = _LookupGenerations()
+
+
+def encode_cursor(created_at: datetime, order_id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{order_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    created_at, order_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    return datetime.fromisoformat(created_at), UUID(order_id)
+
+
+class CustomerService:
+    @staticmethod
+    def get_orders(db: Session, phone_e164: str, limit: int, cursor: Optional[str] = None) -> CustomerOrdersResponse:
+        """Most recent orders for a phone number, newest first, paginated by keyset"""
+        seen = _lookups.start(phone_e164)
+        try:
+            pages = customer_orders_cache.get(phone_e164)
+            if pages is not None and (cursor, limit) in pages:
+                return pages[(cursor, limit)]
+            page = CustomerService._read_page(db, phone_e164, limit, cursor)
+            # Cached page dicts are shared with concurrent readers, so store a new one, and only
+            # if no invalidation of this phone landed while the page was read
+            with _lookups.lock:
+                if _lookups.current(phone_e164) == seen:
+                    customer_orders_cache.set(phone_e164, {**(pages or {}), (cursor, limit): page})
+            return page
+        finally:
+            _lookups.finish(phone_e164)
+
+    @staticmethod
+    def _read_page(db: Session, phone_e164: str, limit: int, cursor: Optional[str]) -> CustomerOrdersResponse:
+        after = decode_cursor(cursor) if cursor else None
+
+        def newest(shard: Shard, session: Session) -> List[Tuple[datetime, UUID, OrderResponse]]:
+            query = session.query(Order).options(selectinload(Order.items)).filter(
+                Order.phone_e164 == phone_e164, order_shards.owned(shard, Order.id)
+            )
+            if after:
+                query = query.filter(tuple_(Order.created_at, Order.id) < after)
+            orders: List[Order] = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1).all()
+            return [(order.created_at, order.id, OrderResponse.model_validate(order)) for order in orders]
+
+        orders = merge_ordered(
+            order_shards.map_shards(newest, db, order_shards.customer_shards(phone_e164)),
+            key=lambda row: row[:2], reverse=True, limit=limit + 1,
+        )
+        return CustomerOrdersResponse(
+            orders=[response for _, _, response in orders[:limit]],
+            next_cursor=encode_cursor(*orders[limit - 1][:2]) if len(orders) > limit else None,
+        )
+
+    @staticmethod
+    def invalidate(phone_e164: Optional[str]) -> None:
+        if phone_e164:
+            with _lookups.lock:
+                _lookups.bump(phone_e164)
+                customer_orders_cache.pop(phone_e164)
+
+    @staticmethod
+    def announce(db: Session, phones: Iterable[Optional[str]]) -> None:
+        """Queue invalidations for every worker on the caller's transaction"""
+        for phone_e164 in dict.fromkeys(phone for phone in phones if phone):
+            notify(db, settings.CUSTOMER_ORDERS_CHANNEL, {"phone_e164": phone_e164})
+
+    @staticmethod
+    def handle_notification(payload: dict) -> None:
+        try:
+            CustomerService.invalidate(payload["phone_e164"])
+        except (KeyError, TypeError):
+            return
+
+    @staticmethod
+    def handle_reconnect() -> None:
+        # Changes made while the listener was down were never announced
+        with _lookups.lock:
+            _lookups.bump_all()
+            customer_orders_cache.clear()
+
+
+listener.add_handler(settings.CUSTOMER_ORDERS_CHANNEL, CustomerService.handle_notification)
+listener.add_reconnect_handler(CustomerService.handle_reconnect)
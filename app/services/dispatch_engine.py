@@ -0,0 +1,217 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+KM_PER_DEGREE = 111.32
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Equirectangular distance, accurate to well under 1% at city scale"""
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return math.hypot(x, y) * 6371.0
+
+
+@dataclass
+class PendingDelivery:
+    order_id: UUID
+    latitude: float
+    longitude: float
+    ready_at: float
+    deadline: float
+    load: int = 1
+    sequence: int = 0
+
+
+@dataclass
+class Stop:
+    order_id: UUID
+    latitude: float
+    longitude: float
+    eta: float
+
+
+@dataclass
+class DeliveryRun:
+    stops: List[Stop] = field(default_factory=list)
+    distance_km: float = 0.0
+    # What the run was planned from, to re-plan or restore it
+    deliveries: List[PendingDelivery] = field(default_factory=list)
+    start: float = 0.0
+
+
+class GridIndex:
+    """Uniform grid over lat/lon with cells of roughly `cell_km` square"""
+
+    def __init__(self, cell_km: float, reference_latitude: float):
+        self._lat_step = cell_km / KM_PER_DEGREE
+        self._lon_step = cell_km / (KM_PER_DEGREE * max(math.cos(math.radians(reference_latitude)), 0.01))
+        self._cell_km = cell_km
+        self._cells: Dict[Tuple[int, int], Dict[UUID, PendingDelivery]] = {}
+        self._cell_of: Dict[UUID, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return math.floor(latitude / self._lat_step), math.floor(longitude / self._lon_step)
+
+    def insert(self, delivery: PendingDelivery) -> None:
+        self.remove(delivery.order_id)
+        cell = self._cell(delivery.latitude, delivery.longitude)
+        self._cells.setdefault(cell, {})[delivery.order_id] = delivery
+        self._cell_of[delivery.order_id] = cell
+
+    def remove(self, order_id: UUID) -> None:
+        cell = self._cell_of.pop(order_id, None)
+        if cell is None:
+            return
+        bucket = self._cells[cell]
+        del bucket[order_id]
+        if not bucket:
+            del self._cells[cell]
+
+    def within(self, latitude: float, longitude: float, radius_km: float) -> List[Tuple[float, PendingDelivery]]:
+        """Deliveries within `radius_km`, nearest first"""
+        row, col = self._cell(latitude, longitude)
+        reach = math.ceil(radius_km / self._cell_km)
+        found = []
+        for r in range(row - reach, row + reach + 1):
+            for c in range(col - reach, col + reach + 1):
+                for delivery in self._cells.get((r, c), {}).values():
+                    distance = distance_km(latitude, longitude, delivery.latitude, delivery.longitude)
+                    if distance <= radius_km:
+                        found.append((distance, delivery))
+        found.sort(key=lambda item: item[0])
+        return found
+
+
+class DispatchEngine:
+    """Groups ready orders into driver runs.
+
+    The most urgent order seeds each run. Its neighbours from the spatial index
+    are then added nearest first while they fit the driver's capacity, share
+    the seed's delivery window and do not make any stop later than it would
+    otherwise have been.
+    """
+
+    def __init__(
+        self,
+        depot: Tuple[float, float],
+        cell_km: float = 1.0,
+        batch_radius_km: float = 3.0,
+        window_minutes: float = 15.0,
+        max_delivery_minutes: float = 45.0,
+        speed_kmh: float = 25.0,
+        stop_minutes: float = 2.0,
+        max_candidates: int = 50,
+    ):
+        self.depot = depot
+        self.batch_radius_km = batch_radius_km
+        self.window = window_minutes * 60
+        self.max_delivery = max_delivery_minutes * 60
+        self.speed = speed_kmh / 3600
+        self.stop_time = stop_minutes * 60
+        self.max_candidates = max_candidates
+        self._index = GridIndex(cell_km, depot[0])
+        self._pending: Dict[UUID, PendingDelivery] = {}
+        self._urgency: List[Tuple[float, int, UUID]] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, order_id: UUID, latitude: float, longitude: float,
+            ready_at: Optional[float] = None, load: int = 1) -> None:
+        ready_at = time.time() if ready_at is None else ready_at
+        delivery = PendingDelivery(
+            order_id, latitude, longitude, ready_at, ready_at + self.max_delivery, load, next(self._sequence)
+        )
+        with self._lock:
+            self._pending[order_id] = delivery
+            self._index.insert(delivery)
+            heapq.heappush(self._urgency, (delivery.deadline, delivery.sequence, order_id))
+
+    def remove(self, order_id: UUID) -> bool:
+        with self._lock:
+            return self._discard(order_id)
+
+    def restore(self, deliveries: List[PendingDelivery]) -> None:
+        """Put back deliveries taken by `next_batch`, keeping their original deadlines"""
+        for delivery in deliveries:
+            self.add(delivery.order_id, delivery.latitude, delivery.longitude, delivery.ready_at, delivery.load)
+
+    def plan(self, deliveries: List[PendingDelivery], start: float) -> DeliveryRun:
+        """Route `deliveries` from the depot starting at `start`, without touching the pending set"""
+        return self._route(deliveries, start)[0]
+
+    def _discard(self, order_id: UUID) -> bool:
+        if self._pending.pop(order_id, None) is None:
+            return False
+        self._index.remove(order_id)
+        return True
+
+    def _pop_most_urgent(self) -> Optional[PendingDelivery]:
+        while self._urgency:
+            _, sequence, order_id = heapq.heappop(self._urgency)
+            delivery = self._pending.get(order_id)
+            if delivery is not None and delivery.sequence == sequence:
+                return delivery
+        return None
+
+    def _route(self, deliveries: List[PendingDelivery], start: float) -> Tuple[DeliveryRun, float]:
+        """Nearest-neighbour route from the depot, with total lateness in seconds"""
+        run = DeliveryRun(deliveries=list(deliveries), start=start)
+        lateness = 0.0
+        latitude, longitude = self.depot
+        clock = start
+        remaining = list(deliveries)
+        while remaining:
+            leg, nearest = min(
+                ((distance_km(latitude, longitude, d.latitude, d.longitude), d) for d in remaining),
+                key=lambda item: item[0],
+            )
+            remaining.remove(nearest)
+            clock += leg / self.speed
+            run.distance_km += leg
+            run.stops.append(Stop(nearest.order_id, nearest.latitude, nearest.longitude, clock))
+            lateness += max(0.0, clock - nearest.deadline)
+            clock += self.stop_time
+            latitude, longitude = nearest.latitude, nearest.longitude
+        return run, lateness
+
+    def next_batch(self, capacity: int, now: Optional[float] = None) -> DeliveryRun:
+        """Remove and return the next run for a driver that can carry `capacity` units"""
+        now = time.time() if now is None else now
+        with self._lock:
+            seed = self._pop_most_urgent()
+            if seed is None:
+                return DeliveryRun()
+            batch = [seed]
+            load = seed.load
+            run, lateness = self._route(batch, now)
+            candidates = self._index.within(seed.latitude, seed.longitude, self.batch_radius_km)
+            for _, candidate in candidates[:self.max_candidates]:
+                if load >= capacity:
+                    break
+                if candidate is seed or load + candidate.load > capacity:
+                    continue
+                if abs(candidate.deadline - seed.deadline) > self.window:
+                    continue
+                trial_run, trial_lateness = self._route(batch + [candidate], now)
+                # Allow the candidate's own lateness if it would be late on its own run too
+                solo_lateness = self._route([candidate], now)[1]
+                if trial_lateness > lateness + solo_lateness:
+                    continue
+                batch.append(candidate)
+                load += candidate.load
+                run, lateness = trial_run, trial_lateness
+            for delivery in batch:
+                self._discard(delivery.order_id)
+            return run
@@ -0,0 +1,146 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models.order import Order, OrderStatus
+from app.db.schemas.pizza import DeliveryRunResponse, DeliveryStop
+from app.services.customer_service import CustomerService
+from app.services.dispatch_engine import DispatchEngine
+from app.services.notifications import listener, notify
+from app.services.order_cache import order_responses
+from app.services.order_log import OrderLogService
+from app.services.order_shards import Shard, order_shards
+from app.services.pizza_service import PizzaService
+
+logger = logging.getLogger(__name__)
+
+dispatch_engine = DispatchEngine(
+    depot=(settings.DISPATCH_DEPOT_LATITUDE, settings.DISPATCH_DEPOT_LONGITUDE),
+    cell_km=settings.DISPATCH_GRID_CELL_KM,
+    batch_radius_km=settings.DISPATCH_BATCH_RADIUS_KM,
+    window_minutes=settings.DISPATCH_TIME_WINDOW_MINUTES,
+    max_delivery_minutes=settings.DISPATCH_MAX_DELIVERY_MINUTES,
+    speed_kmh=settings.DISPATCH_DRIVER_SPEED_KMH,
+    stop_minutes=settings.DISPATCH_STOP_MINUTES,
+)
+
+
+class DispatchService:
+    @staticmethod
+    def load_pending(db: Session) -> int:
+        """Seed the worker's dispatch engine with orders already waiting for a driver, from every shard"""
+        def waiting(shard: Shard, session: Session) -> list:
+            return session.query(
+                Order.id, Order.latitude, Order.longitude, func.coalesce(Order.ready_at, Order.created_at)
+            ).filter(
+                Order.status == OrderStatus.READY,
+                Order.latitude.isnot(None),
+                Order.longitude.isnot(None),
+                order_shards.owned(shard, Order.id),
+            ).all()
+
+        rows = [row for shard_rows in order_shards.map_shards(waiting, db) for row in shard_rows]
+        for order_id, latitude, longitude, ready_at in rows:
+            # Deadlines keep running from when the order became ready, not from the restart
+            dispatch_engine.add(order_id, latitude, longitude, ready_at.timestamp())
+        return len(rows)
+
+    @staticmethod
+    def mark_ready(db: Session, order_id: UUID) -> Optional[Order]:
+        order = PizzaService.get_order(db, order_id)
+        if not order:
+            return None
+        if order.status != OrderStatus.CONFIRMED:
+            raise ValueError(f"Order is {order.status.value}, only confirmed orders can be marked ready")
+        return PizzaService.update_order_status(db, order, OrderStatus.READY)
+
+    @staticmethod
+    def next_batch(db: Session, driver_id: str, capacity: Optional[int] = None) -> DeliveryRunResponse:
+        """Plan the next run and claim its orders, dropping any another worker got first"""
+        run = dispatch_engine.next_batch(capacity or settings.DISPATCH_DRIVER_CAPACITY)
+        claimed: Set[UUID] = set()
+        try:
+            DispatchService._claim(db, [stop.order_id for stop in run.stops], claimed)
+        except Exception:
+            # The engine already dropped the run; put back whatever no shard committed
+            dispatch_engine.restore([delivery for delivery in run.deliveries if delivery.order_id not in claimed])
+            if not claimed:
+                raise
+            # Orders claimed on other shards are out for delivery now, so the driver still takes them
+            logger.exception("Claiming part of a delivery run failed")
+        if len(claimed) < len(run.stops):
+            run = dispatch_engine.plan(
+                [delivery for delivery in run.deliveries if delivery.order_id in claimed], run.start
+            )
+        return DeliveryRunResponse(
+            driver_id=driver_id,
+            distance_km=round(run.distance_km, 3),
+            stops=[
+                DeliveryStop(
+                    order_id=stop.order_id,
+                    latitude=stop.latitude,
+                    longitude=stop.longitude,
+                    eta=datetime.fromtimestamp(stop.eta, tz=timezone.utc),
+                )
+                for stop in run.stops
+            ],
+        )
+
+    @staticmethod
+    def _claim(db: Session, order_ids: List[UUID], claimed: Set[UUID]) -> Set[UUID]:
+        """Claim a run's orders in one transaction per shard they live on.
+
+        Each shard's claims are added to `claimed` as they commit, so a caller
+        seeing a later shard fail knows which orders are already taken.
+        """
+        by_shard: Dict[int, List[UUID]] = {}
+        for order_id in order_ids:
+            by_shard.setdefault(order_shards.shard_for(order_id).id, []).append(order_id)
+        for shard_order_ids in by_shard.values():
+            with order_shards.order_session(db, shard_order_ids[0]) as session:
+                claimed |= DispatchService._claim_on_shard(session, shard_order_ids)
+        return claimed
+
+    @staticmethod
+    def _claim_on_shard(db: Session, order_ids: List[UUID]) -> Set[UUID]:
+        rows = db.execute(
+            update(Order)
+            .where(Order.id.in_(order_ids), Order.status == OrderStatus.READY)
+            .values(status=OrderStatus.OUT_FOR_DELIVERY)
+            .returning(Order.id, Order.phone_e164)
+        ).all()
+        claimed = {row.id for row in rows}
+        for order_id in claimed:
+            notify(db, settings.ORDER_STATUS_CHANNEL, {
+                "order_id": str(order_id), "status": OrderStatus.OUT_FOR_DELIVERY.value
+            })
+        OrderLogService.append_many(db, [
+            (order_id, "status_changed", {"status": OrderStatus.OUT_FOR_DELIVERY.value})
+            for order_id in claimed
+        ])
+        CustomerService.announce(db, [row.phone_e164 for row in rows])
+        db.commit()
+        for row in rows:
+            order_responses.invalidate(row.id)
+            CustomerService.invalidate(row.phone_e164)
+        return claimed
+
+    @staticmethod
+    def handle_status_notification(payload: dict) -> None:
+        """Keep every worker's engine in step with status changes made anywhere"""
+        try:
+            order_id = UUID(payload["order_id"])
+        except (KeyError, TypeError, ValueError):
+            return
+        if payload.get("status") == OrderStatus.READY.value and payload.get("latitude") is not None:
+            dispatch_engine.add(order_id, payload["latitude"], payload["longitude"], payload.get("at"))
+        else:
+            dispatch_engine.remove(order_id)
+
+
+listener.add_handler(settings.ORDER_STATUS_CHANNEL, DispatchService.handle_status_notification)
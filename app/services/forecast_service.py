@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import BigInteger, Text, cast, func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.db.database.session import SessionLocal
+from app.db.models.order import Order, OrderStatus
+from app.db.models.order_item import OrderItem
+from app.db.schemas.pizza import ForecastResponse, ForecastSeries
+from app.services.forecasting import HoltWinters, fit_holt_winters
+from app.services.order_shards import Shard, order_shards
+
+logger = logging.getLogger(__name__)
+
+SeriesKey = Tuple[UUID, UUID]
+EPOCH = datetime(1970, 1, 1)
+
+
+def slot_start(slot: int) -> datetime:
+    return EPOCH + timedelta(minutes=slot * settings.FORECAST_SLOT_MINUTES)
+
+
+@dataclass
+class History:
+    """Pizzas sold per (pizza, size) series and slot; column 0 is `start_slot`"""
+    keys: List[SeriesKey]
+    counts: np.ndarray
+    start_slot: int
+
+
+@dataclass
+class ForecastModel:
+    keys: List[SeriesKey]
+    fit: HoltWinters
+    # First slot not in the history, i.e. the slot that was current when fitting
+    end_slot: int
+    fitted_at: datetime
+    # Database clock at fit time, so requests need no query to find the current slot
+    fitted_monotonic: float
+    fitted_seconds_into_slot: float
+
+    def current_slot(self) -> int:
+        elapsed = self.fitted_seconds_into_slot + time.monotonic() - self.fitted_monotonic
+        return self.end_slot + int(elapsed // (settings.FORECAST_SLOT_MINUTES * 60))
+
+
+class ForecastService:
+    _model: Optional[ForecastModel] = None
+    _fit_lock = threading.Lock()
+
+    @staticmethod
+    def load_history(db: Session, end_slot: int) -> History:
+        """Stream a year of sales per (pizza, size) and slot into a dense array"""
+        slot_minutes = settings.FORECAST_SLOT_MINUTES
+        season = settings.FORECAST_SEASON_SLOTS
+        since = end_slot - settings.FORECAST_HISTORY_DAYS * 24 * 60 // slot_minutes
+        slot = cast(func.floor(func.extract("epoch", Order.created_at) / (slot_minutes * 60)), BigInteger)
+
+        def shard_sales(shard: Shard, session: Session) -> List[Tuple[SeriesKey, np.ndarray, np.ndarray]]:
+            sales = (
+                select(
+                    OrderItem.pizza_id, OrderItem.size_id, slot.label("slot"),
+                    func.sum(OrderItem.quantity).label("sold"),
+                )
+                .join(Order, Order.id == OrderItem.order_id)
+                .where(
+                    Order.created_at >= slot_start(since),
+                    Order.created_at < slot_start(end_slot),
+                    Order.status != OrderStatus.CANCELLED,
+                    order_shards.owned(shard, Order.id),
+                )
+                .group_by(OrderItem.pizza_id, OrderItem.size_id, slot)
+                .subquery()
+            )
+            # One row per series with its slots and sales as text lists, which NumPy
+            # parses far faster than Python can build a row per slot. Both
+            # aggregates see the group's rows in the same order.
+            query = select(
+                sales.c.pizza_id, sales.c.size_id,
+                func.string_agg(cast(sales.c.slot, Text), ","), func.string_agg(cast(sales.c.sold, Text), ","),
+            ).group_by(sales.c.pizza_id, sales.c.size_id)
+            return [
+                ((pizza_id, size_id), np.fromstring(series_slots, dtype=np.int64, sep=","),
+                 np.fromstring(series_sold, dtype=np.float64, sep=","))
+                for rows in session.execute(query, execution_options={"yield_per": 100}).partitions()
+                for pizza_id, size_id, series_slots, series_sold in rows
+            ]
+
+        index: Dict[SeriesKey, int] = {}
+        series, slots, sold = [], [], []
+        for shard_rows in order_shards.map_shards(shard_sales, db):
+            for key, series_slots, series_sold in shard_rows:
+                series.append(np.full(len(series_slots), index.setdefault(key, len(index))))
+                slots.append(series_slots)
+                sold.append(series_sold)
+        keys: List[SeriesKey] = list(index)
+        slots = np.concatenate(slots) if slots else np.zeros(0, dtype=np.int64)
+
+        # Start at the first sale, but always keep one full season to initialise from
+        start_slot = min(int(slots.min()) if len(slots) else end_slot, end_slot - season)
+        counts = np.zeros((len(keys), end_slot - start_slot))
+        if len(slots):
+            # A series sold on several shards has a slot from each of them
+            np.add.at(counts, (np.concatenate(series), slots - start_slot), np.concatenate(sold))
+        return History(keys=keys, counts=counts, start_slot=start_slot)
+
+    @staticmethod
+    def refit(db: Session) -> ForecastModel:
+        slot_seconds = settings.FORECAST_SLOT_MINUTES * 60
+        now = db.execute(select(func.localtimestamp())).scalar()
+        epoch = (now - EPOCH).total_seconds()
+        end_slot = int(epoch // slot_seconds)
+        history = ForecastService.load_history(db, end_slot)
+        model = ForecastModel(
+            keys=history.keys,
+            fit=fit_holt_winters(history.counts, settings.FORECAST_SEASON_SLOTS),
+            end_slot=end_slot,
+            fitted_at=now,
+            fitted_monotonic=time.monotonic(),
+            fitted_seconds_into_slot=epoch - end_slot * slot_seconds,
+        )
+        ForecastService._model = model
+        return model
+
+    @staticmethod
+    def get_model(db: Session) -> ForecastModel:
+        model = ForecastService._model
+        if model is not None:
+            return model
+        with ForecastService._fit_lock:
+            if ForecastService._model is None:
+                ForecastService.refit(db)
+            return ForecastService._model
+
+    @staticmethod
+    def forecast(db: Session, horizon: int, pizza_id: Optional[UUID] = None) -> ForecastResponse:
+        """Expected pizzas per series for `horizon` slots from the current one"""
+        model = ForecastService.get_model(db)
+        current = model.current_slot()
+        expected = np.round(model.fit.forecast(current - model.end_slot, horizon), 2)
+        return ForecastResponse(
+            starts_at=slot_start(current),
+            slot_minutes=settings.FORECAST_SLOT_MINUTES,
+            fitted_at=model.fitted_at,
+            series=[
+                ForecastSeries(pizza_id=key[0], size_id=key[1], expected=values)
+                for key, values in zip(model.keys, expected.tolist())
+                if pizza_id is None or key[0] == pizza_id
+            ],
+        )
+
+    @staticmethod
+    def _scheduled_refit() -> None:
+        with SessionLocal() as db:
+            with ForecastService._fit_lock:
+                ForecastService.refit(db)
+
+    @staticmethod
+    async def run_refits() -> None:
+        """Refit on a schedule; requests keep reading the previous model meanwhile"""
+        while True:
+            try:
+                await run_in_threadpool(ForecastService._scheduled_refit)
+            except Exception:
+                logger.exception("Forecast refit failed")
+            await asyncio.sleep(settings.FORECAST_REFIT_MINUTES * 60)
@@ -0,0 +1,97 @@
+import itertools
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+# Smoothing parameters tried for every series; each series keeps the
+# combination with the lowest one-step-ahead squared error
+ALPHAS = (0.02, 0.05, 0.1, 0.2)
+BETAS = (0.0, 0.002)
+GAMMAS = (0.02, 0.05, 0.1, 0.2)
+
+
+@dataclass
+class HoltWinters:
+    """Additive Holt-Winters state for many series, as of the slot after the history.
+
+    `seasonal` is (season, series); column `j` of every array is series `j`.
+    Row `r` of `seasonal` is the effect at history offsets congruent to `r`.
+    """
+    level: np.ndarray
+    trend: np.ndarray
+    seasonal: np.ndarray
+    alpha: np.ndarray
+    beta: np.ndarray
+    gamma: np.ndarray
+    sse: np.ndarray
+    observed: int
+
+    @property
+    def season(self) -> int:
+        return self.seasonal.shape[0]
+
+    def forecast(self, ahead: int, horizon: int) -> np.ndarray:
+        """(series, horizon) expected values starting `ahead` slots past the history"""
+        steps = np.arange(ahead + 1, ahead + horizon + 1)
+        seasonal = self.seasonal[(self.observed + steps - 1) % self.season]
+        values = self.level[:, None] + self.trend[:, None] * steps[None, :] + seasonal.T
+        # Demand is never negative however the smoothed components drift
+        return np.maximum(values, 0.0)
+
+
+def fit_holt_winters(history: np.ndarray, season: int, alphas: Sequence[float] = ALPHAS,
+                     betas: Sequence[float] = BETAS, gammas: Sequence[float] = GAMMAS) -> HoltWinters:
+    """Fit additive Holt-Winters to every row of a (series, slots) history at once.
+
+    Every candidate parameter combination runs for every series in the same
+    array, so each time step is a handful of NumPy operations over
+    (candidates, series) whatever the number of series. The first season
+    initialises the state and is not scored.
+    """
+    series, slots = history.shape
+    if slots < season:
+        raise ValueError(f"Need at least one season ({season} slots) of history, got {slots}")
+    candidates = np.array([
+        (alpha, beta, gamma)
+        for alpha, beta, gamma in itertools.product(alphas, betas, gammas)
+        # Keeps the error-correction form stable
+        if beta <= alpha and gamma <= 1 - alpha
+    ])
+    alpha = candidates[:, 0:1]
+    beta = candidates[:, 1:2]
+    gamma = candidates[:, 2:3]
+    count = len(candidates)
+
+    observations = np.ascontiguousarray(history.T, dtype=np.float64)
+    first = observations[:season].mean(axis=0)
+    if slots >= 2 * season:
+        initial_trend = (observations[season:2 * season].mean(axis=0) - first) / season
+    else:
+        initial_trend = np.zeros(series)
+    level = np.repeat(first[None, :], count, axis=0)
+    trend = np.repeat(initial_trend[None, :], count, axis=0)
+    seasonal = np.repeat((observations[:season] - first)[:, None, :], count, axis=1)
+    sse = np.zeros((count, series))
+
+    for t in range(slots):
+        effect = seasonal[t % season]
+        error = observations[t] - (level + trend + effect)
+        if t >= season:
+            sse += error * error
+        level += trend + alpha * error
+        trend += beta * error
+        effect += gamma * error
+
+    best = sse.argmin(axis=0)
+    columns = np.arange(series)
+    return HoltWinters(
+        level=level[best, columns],
+        trend=trend[best, columns],
+        seasonal=seasonal[:, best, columns],
+        alpha=alpha[best, 0],
+        beta=beta[best, 0],
+        gamma=gamma[best, 0],
+        sse=sse[best, columns],
+        observed=slots,
+    )
@@ -0,0 +1,63 @@
+import csv
+import re
+from pathlib import Path
+from typing import Dict, Optional, Protocol, Tuple
+
+from app.config import settings
+
+Coordinates = Tuple[float, float]
+
+
+def normalise_address(address: str) -> str:
+    """Lowercase an address and strip punctuation and repeated whitespace"""
+    return " ".join(re.sub(r"[^\w\s]", " ", address.lower()).split())
+
+
+class Geocoder(Protocol):
+    def geocode(self, address: str) -> Optional[Coordinates]:
+        ...
+
+
+class NullGeocoder:
+    """Geocoder used when no lookup source is configured"""
+
+    def geocode(self, address: str) -> Optional[Coordinates]:
+        return None
+
+
+class LookupTableGeocoder:
+    """Resolves addresses from a local CSV with address, latitude and longitude columns"""
+
+    def __init__(self, table: Dict[str, Coordinates]):
+        self._table = table
+
+    @classmethod
+    def from_csv(cls, path: Path) -> "LookupTableGeocoder":
+        with open(path, newline="", encoding="utf-8") as handle:
+            table = {
+                normalise_address(row["address"]): (float(row["latitude"]), float(row["longitude"]))
+                for row in csv.DictReader(handle)
+            }
+        return cls(table)
+
+    def geocode(self, address: str) -> Optional[Coordinates]:
+        return self._table.get(normalise_address(address))
+
+
+_geocoder: Optional[Geocoder] = None
+
+
+def get_geocoder() -> Geocoder:
+    global _geocoder
+    if _geocoder is None:
+        if settings.GEOCODER_LOOKUP_PATH:
+            _geocoder = LookupTableGeocoder.from_csv(Path(settings.GEOCODER_LOOKUP_PATH))
+        else:
+            _geocoder = NullGeocoder()
+    return _geocoder
+
+
+def set_geocoder(geocoder: Geocoder) -> None:
+    """Plug in a different geocoder, e.g. one backed by an external service"""
+    global _geocoder
+    _geocoder = geocoder
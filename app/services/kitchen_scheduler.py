@@ -0,0 +1,134 @@
+import heapq
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+
+@dataclass
+class Station:
+    """A prep station or oven.
+
+    Bookings are stored in the station's planned timeline; `shift` is how far
+    reality has drifted from it, so one completion moves every remaining
+    booking on the station without touching them.
+    """
+
+    index: int
+    planned_free: float
+    shift: float = 0.0
+    version: int = 0
+
+    @property
+    def free_at(self) -> float:
+        return self.planned_free + self.shift
+
+
+class Stage:
+    """A pool of identical stations kept in a heap by the time they become free"""
+
+    def __init__(self, count: int, now: float):
+        self.stations = [Station(index, now) for index in range(count)]
+        self._heap: List[Tuple[float, int, int]] = [(now, 0, index) for index in range(count)]
+        heapq.heapify(self._heap)
+
+    def earliest(self) -> Station:
+        while True:
+            free_at, version, index = self._heap[0]
+            station = self.stations[index]
+            if version == station.version:
+                return station
+            heapq.heappop(self._heap)
+
+    def book(self, station: Station, start: float, duration: float) -> float:
+        """Book `duration` seconds from `start`, returning the planned end"""
+        planned_end = start - station.shift + duration
+        station.planned_free = max(station.planned_free, planned_end)
+        self._reposition(station)
+        return planned_end
+
+    def drift(self, station: Station, planned_end: float, actual_end: float) -> None:
+        """Move the station's remaining bookings by how late or early a booking finished"""
+        station.shift += actual_end - (planned_end + station.shift)
+        self._reposition(station)
+
+    def _reposition(self, station: Station) -> None:
+        # Superseded heap entries are skipped lazily by `earliest`
+        station.version += 1
+        heapq.heappush(self._heap, (station.free_at, station.version, station.index))
+        if len(self._heap) > 8 * len(self.stations) + 64:
+            self._heap = [(s.free_at, s.version, s.index) for s in self.stations]
+            heapq.heapify(self._heap)
+
+
+@dataclass
+class KitchenJob:
+    order_id: UUID
+    prep_station: int
+    prep_end: float
+    oven: int
+    bake_end: float
+    prepped: bool = False
+
+
+class KitchenScheduler:
+    """Assigns orders to a prep station and then an oven, earliest free first.
+
+    Slot lengths scale with the size multiplier, so a large occupies an oven
+    longer than a small. Assigning, completing and querying an order are all
+    O(log n) or better; the plan is never rebuilt.
+    """
+
+    def __init__(self, prep_stations: int, ovens: int, prep_minutes: float, bake_minutes: float, now: float):
+        self.prep_seconds = prep_minutes * 60
+        self.bake_seconds = bake_minutes * 60
+        self._prep = Stage(prep_stations, now)
+        self._ovens = Stage(ovens, now)
+        self._jobs: Dict[UUID, KitchenJob] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def assign(self, order_id: UUID, size_multiplier: float, at: float) -> float:
+        """Schedule an order, returning when it will come out of the oven"""
+        with self._lock:
+            job = self._jobs.get(order_id)
+            if job is None:
+                prep = self._prep.earliest()
+                prep_start = max(at, prep.free_at)
+                prep_end = self._prep.book(prep, prep_start, self.prep_seconds * size_multiplier)
+                oven = self._ovens.earliest()
+                bake_start = max(prep_end + prep.shift, oven.free_at)
+                bake_end = self._ovens.book(oven, bake_start, self.bake_seconds * size_multiplier)
+                job = KitchenJob(order_id, prep.index, prep_end, oven.index, bake_end)
+                self._jobs[order_id] = job
+            return self._ready_at(job)
+
+    def ready_at(self, order_id: UUID) -> Optional[float]:
+        with self._lock:
+            job = self._jobs.get(order_id)
+            return self._ready_at(job) if job else None
+
+    def prep_done(self, order_id: UUID, at: float) -> None:
+        with self._lock:
+            job = self._jobs.get(order_id)
+            if job is None or job.prepped:
+                return
+            self._prep.drift(self._prep.stations[job.prep_station], job.prep_end, at)
+            job.prepped = True
+
+    def complete(self, order_id: UUID, at: float) -> None:
+        """Record an order leaving the oven and shift that oven's remaining bookings"""
+        with self._lock:
+            job = self._jobs.pop(order_id, None)
+            if job is None:
+                return
+            self._ovens.drift(self._ovens.stations[job.oven], job.bake_end, at)
+
+    def discard(self, order_id: UUID) -> None:
+        with self._lock:
+            self._jobs.pop(order_id, None)
+
+    def _ready_at(self, job: KitchenJob) -> float:
+        return job.bake_end + self._ovens.stations[job.oven].shift
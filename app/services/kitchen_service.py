@@ -0,0 +1,110 @@
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models.order import Order, OrderStatus
+from app.db.models.size import Size
+from app.services.dispatch_engine import distance_km
+from app.services.dispatch_service import DispatchService
+from app.services.kitchen_scheduler import KitchenScheduler
+from app.services.notifications import listener, notify
+from app.services.order_shards import Shard, merge_ordered, order_shards
+from app.services.pizza_service import PizzaService
+
+kitchen_scheduler = KitchenScheduler(
+    prep_stations=settings.KITCHEN_PREP_STATIONS,
+    ovens=settings.KITCHEN_OVENS,
+    prep_minutes=settings.KITCHEN_PREP_MINUTES,
+    bake_minutes=settings.KITCHEN_BAKE_MINUTES,
+    now=time.time(),
+)
+
+
+class KitchenService:
+    @staticmethod
+    def load_pending(db: Session) -> int:
+        """Schedule confirmed orders that are still waiting for the kitchen, oldest first across shards"""
+        def waiting(shard: Shard, session: Session) -> list:
+            return session.query(Order.created_at, Order.id, Size.multiplier).join(
+                Size, Order.size_id == Size.id
+            ).filter(
+                Order.status == OrderStatus.CONFIRMED, order_shards.owned(shard, Order.id)
+            ).order_by(Order.created_at).all()
+
+        rows = merge_ordered(order_shards.map_shards(waiting, db), key=lambda row: row.created_at)
+        now = time.time()
+        for _, order_id, multiplier in rows:
+            kitchen_scheduler.assign(order_id, multiplier, now)
+        return len(rows)
+
+    @staticmethod
+    def schedule(order: Order, at: float) -> None:
+        kitchen_scheduler.assign(order.id, order.size.multiplier, at)
+
+    @staticmethod
+    def estimate_delivery(order: Order) -> Optional[datetime]:
+        """Oven exit time plus the drive from the depot to the order's address"""
+        ready_at = kitchen_scheduler.ready_at(order.id)
+        if ready_at is None:
+            return None
+        if order.latitude is not None and order.longitude is not None:
+            distance = distance_km(
+                settings.DISPATCH_DEPOT_LATITUDE, settings.DISPATCH_DEPOT_LONGITUDE,
+                order.latitude, order.longitude,
+            )
+            travel = distance / settings.DISPATCH_DRIVER_SPEED_KMH * 3600
+        else:
+            travel = settings.KITCHEN_DEFAULT_DELIVERY_MINUTES * 60
+        return datetime.fromtimestamp(ready_at + travel, tz=timezone.utc)
+
+    @staticmethod
+    def prep_done(db: Session, order_id: UUID) -> Optional[Order]:
+        """Hand a confirmed order from the prep station to the ovens on every scheduler"""
+        order = PizzaService.get_order(db, order_id)
+        if not order:
+            return None
+        if order.status != OrderStatus.CONFIRMED:
+            raise ValueError(f"Order is {order.status.value}, only confirmed orders can be prepped")
+        notify(db, settings.KITCHEN_CHANNEL, {"order_id": str(order.id), "event": "prepped", "at": time.time()})
+        db.commit()
+        return order
+
+    @staticmethod
+    def complete(db: Session, order_id: UUID) -> Optional[Order]:
+        """Take an order out of the oven; the READY notification updates every scheduler"""
+        order = DispatchService.mark_ready(db, order_id)
+        if order:
+            kitchen_scheduler.complete(order.id, time.time())
+        return order
+
+    @staticmethod
+    def handle_status_notification(payload: dict) -> None:
+        try:
+            order_id = UUID(payload["order_id"])
+        except (KeyError, TypeError, ValueError):
+            return
+        status = payload.get("status")
+        at = payload.get("at") or time.time()
+        if status == OrderStatus.CONFIRMED.value and "size_multiplier" in payload:
+            kitchen_scheduler.assign(order_id, payload["size_multiplier"], at)
+        elif status == OrderStatus.READY.value:
+            kitchen_scheduler.complete(order_id, at)
+        elif status == OrderStatus.CANCELLED.value:
+            kitchen_scheduler.discard(order_id)
+
+    @staticmethod
+    def handle_kitchen_notification(payload: dict) -> None:
+        try:
+            order_id = UUID(payload["order_id"])
+        except (KeyError, TypeError, ValueError):
+            return
+        if payload.get("event") == "prepped":
+            kitchen_scheduler.prep_done(order_id, payload.get("at") or time.time())
+
+
+listener.add_handler(settings.ORDER_STATUS_CHANNEL, KitchenService.handle_status_notification)
+listener.add_handler(settings.KITCHEN_CHANNEL, KitchenService.handle_kitchen_notification)
@@ -0,0 +1,206 @@
+import heapq
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+# How much a match counts for depending on where the token was found
+FIELD_WEIGHTS = {"name": 1.0, "description": 0.4}
+EXACT_SCORE = 3.0
+PREFIX_SCORE = 2.0
+FUZZY_SCORE = 1.5
+MIN_SIMILARITY = 0.3
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    return _TOKEN.findall(value.lower()) if value else []
+
+
+def trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass(frozen=True)
+class MenuDocument:
+    kind: str
+    id: UUID
+    name: str
+    description: Optional[str] = None
+
+    def fields(self) -> Iterable[Tuple[str, str]]:
+        yield "name", self.name
+        if self.description:
+            yield "description", self.description
+
+
+class _TrieNode:
+    __slots__ = ("children", "tokens")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.tokens: Set[str] = set()
+
+
+class MenuSearchIndex:
+    """In-memory search over menu items.
+
+    Every distinct token is stored once: a prefix trie maps prefixes to the
+    tokens under them, trigram postings map trigrams to tokens for typo
+    tolerance, and each token keeps the documents and fields it occurs in.
+    Documents are added and removed one at a time, so menu changes never
+    require a rebuild.
+    """
+
+    def __init__(self):
+        # Internal maps are keyed by the UUID's integer value, which hashes
+        # far faster than the UUID object on the scoring path
+        self._documents: Dict[int, MenuDocument] = {}
+        self._names: Dict[int, str] = {}
+        self._order: Dict[int, Tuple[int, str]] = {}
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._trie = _TrieNode()
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, document_id: UUID) -> bool:
+        return document_id.int in self._documents
+
+    def get(self, document_id: UUID) -> Optional[MenuDocument]:
+        return self._documents.get(document_id.int)
+
+    def ids(self) -> Set[UUID]:
+        return {document.id for document in self._documents.values()}
+
+    def upsert(self, document: MenuDocument) -> None:
+        key = document.id.int
+        with self._lock:
+            if self._documents.get(key) == document:
+                return
+            self.remove(document.id)
+            self._documents[key] = document
+            name = self._names[key] = " ".join(tokenize(document.name))
+            self._order[key] = (len(name), name)
+            for field, value in document.fields():
+                for token in tokenize(value):
+                    postings = self._postings.get(token)
+                    if postings is None:
+                        postings = self._postings[token] = {}
+                        self._add_token(token)
+                    postings[key] = max(postings.get(key, 0.0), FIELD_WEIGHTS[field])
+
+    def remove(self, document_id: UUID) -> None:
+        key = document_id.int
+        with self._lock:
+            document = self._documents.pop(key, None)
+            if document is None:
+                return
+            del self._names[key]
+            del self._order[key]
+            for _, value in document.fields():
+                for token in tokenize(value):
+                    postings = self._postings.get(token)
+                    if postings is None:
+                        continue
+                    postings.pop(key, None)
+                    if not postings:
+                        del self._postings[token]
+                        self._remove_token(token)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[MenuDocument, float]]:
+        """Documents matching every query token by prefix or close spelling, best first"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self._lock:
+            scores: Optional[Dict[int, float]] = None
+            for term in terms:
+                term_scores = self._score_term(term)
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {key: score + term_scores[key] for key, score in scores.items() if key in term_scores}
+                if not scores:
+                    return []
+            query_text = " ".join(terms)
+            names = self._names
+            for key in scores:
+                if names[key].startswith(query_text):
+                    scores[key] += 1.0
+            # Only documents scoring at least the limit-th best can place, and
+            # among those ties go to the shorter, then alphabetically first, name
+            cutoff = heapq.nlargest(limit, scores.values())[-1]
+            order = self._order
+            top = sorted((-score, order[key], key) for key, score in scores.items() if score >= cutoff)[:limit]
+            return [(self._documents[key], -score) for score, _, key in top]
+
+    def _score_term(self, term: str) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+
+        def credit(token: str, base: float) -> None:
+            postings = self._postings[token]
+            if not scores:
+                scores.update({key: base * weight for key, weight in postings.items()})
+                return
+            current = scores.get
+            for key, weight in postings.items():
+                score = base * weight
+                if score > current(key, 0.0):
+                    scores[key] = score
+
+        prefixed = self._prefixed(term)
+        for token in prefixed:
+            credit(token, EXACT_SCORE if token == term else PREFIX_SCORE)
+        if len(term) < 3:
+            return scores
+
+        # Fuzzy matches only ever score below prefix matches, so skip those tokens
+        term_trigrams = trigrams(term)
+        shared: Dict[str, int] = {}
+        for trigram in term_trigrams:
+            for token in self._trigrams.get(trigram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        for token, count in shared.items():
+            if token in prefixed:
+                continue
+            similarity = count / (len(term_trigrams) + len(token) + 1 - count)
+            if similarity >= MIN_SIMILARITY:
+                credit(token, FUZZY_SCORE * similarity)
+        return scores
+
+    def _prefixed(self, prefix: str) -> Set[str]:
+        node = self._trie
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+        return node.tokens
+
+    def _add_token(self, token: str) -> None:
+        node = self._trie
+        for char in token:
+            node = node.children.setdefault(char, _TrieNode())
+            node.tokens.add(token)
+        for trigram in trigrams(token):
+            self._trigrams.setdefault(trigram, set()).add(token)
+
+    def _remove_token(self, token: str) -> None:
+        path = [self._trie]
+        for char in token:
+            path.append(path[-1].children[char])
+        for depth in range(len(token), 0, -1):
+            node = path[depth]
+            node.tokens.discard(token)
+            if not node.tokens:
+                del path[depth - 1].children[token[depth - 1]]
+        for trigram in trigrams(token):
+            tokens = self._trigrams[trigram]
+            tokens.discard(token)
+            if not tokens:
+                del self._trigrams[trigram]
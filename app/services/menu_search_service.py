@@ -0,0 +1,67 @@
+import threading
+from typing import List
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models.pizza import Pizza
+from app.db.models.topping import Topping
+from app.db.schemas.pizza import MenuSearchResult
+from app.services.menu_search import MenuDocument, MenuSearchIndex
+from app.services.notifications import listener
+
+menu_index = MenuSearchIndex()
+
+
+class MenuSearchService:
+    _stale = True
+    _refresh_lock = threading.Lock()
+
+    @staticmethod
+    def search(db: Session, query: str, limit: int) -> List[MenuSearchResult]:
+        if MenuSearchService._stale:
+            MenuSearchService.refresh(db)
+        return [
+            MenuSearchResult(kind=document.kind, id=document.id, name=document.name,
+                             description=document.description, score=round(score, 3))
+            for document, score in menu_index.search(query, limit)
+        ]
+
+    @staticmethod
+    def refresh(db: Session) -> int:
+        """Bring the index in line with the menu tables, touching only rows that changed"""
+        with MenuSearchService._refresh_lock:
+            if not MenuSearchService._stale:
+                return 0
+            # Clear first so a change notified mid-refresh triggers another one
+            MenuSearchService._stale = False
+            try:
+                documents = [
+                    MenuDocument("pizza", pizza_id, name, description)
+                    for pizza_id, name, description in db.query(Pizza.id, Pizza.name, Pizza.description)
+                ] + [
+                    MenuDocument("topping", topping_id, name)
+                    for topping_id, name in db.query(Topping.id, Topping.name)
+                ]
+            except Exception:
+                MenuSearchService._stale = True
+                raise
+            changed = 0
+            current = set()
+            for document in documents:
+                current.add(document.id)
+                if menu_index.get(document.id) != document:
+                    menu_index.upsert(document)
+                    changed += 1
+            for document_id in menu_index.ids() - current:
+                menu_index.remove(document_id)
+                changed += 1
+            return changed
+
+    @staticmethod
+    def mark_stale(payload: object = None) -> None:
+        MenuSearchService._stale = True
+
+
+listener.add_handler(settings.MENU_CHANNEL, MenuSearchService.mark_stale)
+listener.add_reconnect_handler(MenuSearchService.mark_stale)
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+import psycopg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Any], Union[None, Awaitable[None]]]
+
+
+def notify(db: Session, channel: str, payload: Any) -> None:
+    """Queue a NOTIFY on the session's transaction.
+
+    Postgres only delivers the notification once the transaction commits, so
+    listeners never observe changes that end up being rolled back.
+    """
+    db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": channel, "payload": json.dumps(payload, default=str)},
+    )
+
+
+class NotificationListener:
+    """One LISTEN connection per database per worker, fanning notifications out to handlers.
+
+    Handlers are registered per channel before `start` is called and run on the
+    event loop, so they must be quick and non-blocking. Every order shard gets
+    a connection of its own besides the main database, since a notification
+    only reaches listeners on the database it was sent on. Reconnect handlers
+    run after a connection has been re-established, so subscribers can resync
+    anything they may have missed while it was down.
+    """
+
+    def __init__(self, dsn: Optional[str] = None, reconnect_delay: float = 1.0):
+        self._dsns = [dsn] if dsn is not None else None
+        self._reconnect_delay = reconnect_delay
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._reconnect_handlers: List[Callable[[], None]] = []
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def dsns(self) -> List[str]:
+        if self._dsns is None:
+            uris = list(dict.fromkeys([settings.SQLALCHEMY_DATABASE_URI, *settings.ORDER_SHARD_URIS]))
+            # psycopg wants a plain libpq URL without the SQLAlchemy driver suffix
+            self._dsns = [
+                make_url(uri).set(drivername="postgresql").render_as_string(hide_password=False) for uri in uris
+            ]
+        return self._dsns
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def add_handler(self, channel: str, handler: Handler) -> None:
+        if self.running:
+            raise RuntimeError("Handlers must be registered before the listener starts")
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def add_reconnect_handler(self, handler: Callable[[], None]) -> None:
+        self._reconnect_handlers.append(handler)
+
+    async def start(self) -> None:
+        if self._handlers and not self.running:
+            self._tasks = [asyncio.create_task(self._run(dsn)) for dsn in self.dsns]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    async def dispatch(self, channel: str, payload: str) -> None:
+        try:
+            data = json.loads(payload) if payload else None
+        except ValueError:
+            data = payload
+        for handler in self._handlers.get(channel, ()):
+            try:
+                result = handler(data)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception:
+                logger.exception("Notification handler for %s failed", channel)
+
+    async def _run(self, dsn: str) -> None:
+        connected_before = False
+        while True:
+            try:
+                conn = await psycopg.AsyncConnection.connect(dsn, autocommit=True)
+                async with conn:
+                    for channel in self._handlers:
+                        await conn.execute(f'LISTEN "{channel}"')
+                    if connected_before:
+                        for handler in self._reconnect_handlers:
+                            handler()
+                    connected_before = True
+                    async for notification in conn.notifies():
+                        await self.dispatch(notification.channel, notification.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Notification listener disconnected: %s", e)
+                await asyncio.sleep(self._reconnect_delay)
+
+
+listener = NotificationListener()
@@ -0,0 +1,394 @@
+"""Audit stored order totals against menu prices as of each order's date.
+
+Orders are read in keyset chunks. The server returns each chunk as a few
+comma-separated text columns, one per field, with menu item ids already
+replaced by dense indexes through a temporary table, and NumPy parses them
+directly. Expected prices for the whole chunk are then gathered from the
+price history with one sorted search per item kind, and summed per line and
+per order with bincount, so the work per order is a few array operations
+rather than Python.
+
+Totals are rebuilt the way `price_cart` builds them: pizza base price times
+size multiplier plus topping prices, rounded per unit, times quantity, less
+the line's stored discount. Discounts themselves are taken as stored, since
+promotions are not versioned.
+"""
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.backfill import Throttle, with_lock_retries
+from app.services.order_log import OrderLogService
+
+FIRST_ID = "00000000-0000-0000-0000-000000000000"
+LAST_ID = "ffffffff-ffff-ffff-ffff-ffffffffffff"
+# Stored and expected amounts may differ by less than half a cent
+TOLERANCE = 0.005
+# Enough for a default chunk's sorts to stay in memory
+WORK_MEM = "64MB"
+
+PRICE_HISTORY = text("""
+    SELECT string_agg(item_id::text, ',' ORDER BY item_id, valid_from),
+           string_agg((extract(epoch FROM valid_from) * 1000)::bigint::text, ',' ORDER BY item_id, valid_from),
+           string_agg(price::text, ',' ORDER BY item_id, valid_from),
+           (extract(epoch FROM localtimestamp) * 1000)::bigint
+    FROM menu_prices
+""")
+
+CHUNK = """
+    WITH chunk AS MATERIALIZED (
+        SELECT id, total_price, discount_total, created_at, row_number() OVER (ORDER BY id) - 1 AS pos
+        FROM (
+            SELECT id, total_price, discount_total, created_at FROM orders
+            WHERE id > CAST(:after AS uuid) AND id <= CAST(:until AS uuid) AND ({where})
+            ORDER BY id LIMIT :chunk_size
+        ) AS page
+    ),
+    lines AS MATERIALIZED (
+        SELECT row_number() OVER (ORDER BY chunk.pos, item.position) - 1 AS line, chunk.pos, item.id,
+               coalesce(pizza.idx, -1) AS pizza, coalesce(size.idx, -1) AS size, item.topping_ids,
+               item.quantity, item.unit_price, item.discount_total, item.total_price
+        FROM chunk
+        JOIN order_items AS item ON item.order_id = chunk.id
+            -- The id range lets the items come from an index range scan rather than the whole table
+            AND item.order_id > CAST(:after AS uuid) AND item.order_id <= (SELECT id FROM chunk ORDER BY pos DESC LIMIT 1)
+        LEFT JOIN audit_items AS pizza ON pizza.id = item.pizza_id
+        LEFT JOIN audit_items AS size ON size.id = item.size_id
+    )
+    SELECT * FROM (
+        SELECT string_agg(id::text, ',' ORDER BY pos) AS order_ids,
+               string_agg(total_price::text, ',' ORDER BY pos) AS order_totals,
+               string_agg(discount_total::text, ',' ORDER BY pos) AS order_discounts,
+               string_agg((extract(epoch FROM created_at) * 1000)::bigint::text, ',' ORDER BY pos) AS ordered_at
+        FROM chunk
+    ) AS orders, (
+        SELECT string_agg(id::text, ',' ORDER BY line) AS line_ids,
+               string_agg(pos::text, ',' ORDER BY line) AS line_orders,
+               string_agg(pizza::text, ',' ORDER BY line) AS pizzas,
+               string_agg(size::text, ',' ORDER BY line) AS sizes,
+               string_agg(quantity::text, ',' ORDER BY line) AS quantities,
+               string_agg(unit_price::text, ',' ORDER BY line) AS unit_prices,
+               string_agg(discount_total::text, ',' ORDER BY line) AS line_discounts,
+               string_agg(total_price::text, ',' ORDER BY line) AS line_totals
+        FROM lines
+    ) AS items, (
+        SELECT string_agg(lines.line::text, ',' ORDER BY lines.line, topping.ord) AS topping_lines,
+               string_agg(coalesce(known.idx, -1)::text, ',' ORDER BY lines.line, topping.ord) AS toppings
+        FROM lines
+        CROSS JOIN unnest(lines.topping_ids) WITH ORDINALITY AS topping(id, ord)
+        LEFT JOIN audit_items AS known ON known.id = topping.id
+    ) AS toppings
+"""
+
+
+def chunk_query(where: str = "TRUE"):
+    """The chunk query over orders matching `where`, such as the buckets a shard owns"""
+    return text(CHUNK.format(where=where))
+
+REPAIR = text("""
+    WITH repaired AS (
+        UPDATE orders SET total_price = fix.total_price, discount_total = fix.discount_total
+        FROM unnest(CAST(:order_ids AS uuid[]), CAST(:stored AS float8[]),
+                    CAST(:totals AS float8[]), CAST(:discounts AS float8[]))
+            AS fix(id, stored, total_price, discount_total)
+        -- Leave orders alone if their total changed since they were audited
+        WHERE orders.id = fix.id AND orders.total_price = fix.stored
+        RETURNING orders.id, fix.stored, fix.total_price, fix.discount_total
+    ), lines AS (
+        UPDATE order_items SET unit_price = fix.unit_price, total_price = fix.total_price
+        FROM unnest(CAST(:line_ids AS uuid[]), CAST(:units AS float8[]), CAST(:line_totals AS float8[]))
+            AS fix(id, unit_price, total_price)
+        WHERE order_items.id = fix.id AND order_items.order_id IN (SELECT id FROM repaired)
+    )
+    SELECT id, stored, total_price, discount_total FROM repaired
+""")
+
+
+def _ints(column: Optional[str]) -> np.ndarray:
+    return np.fromstring(column, dtype=np.int64, sep=",") if column else np.zeros(0, dtype=np.int64)
+
+
+def _floats(column: Optional[str]) -> np.ndarray:
+    return np.fromstring(column, dtype=np.float64, sep=",") if column else np.zeros(0)
+
+
+@dataclass
+class PriceHistory:
+    """Every menu item's prices over time, searchable for many (item, time) pairs at once.
+
+    Items are dense indexes into `item_ids`. `keys` orders the rows by item,
+    then by time as milliseconds since `origin`, in one integer per row.
+    """
+    item_ids: List[str]
+    keys: np.ndarray
+    prices: np.ndarray
+    # Position of each item's earliest price
+    first: np.ndarray
+    origin: int
+    span: int
+
+    @classmethod
+    def build(cls, item_ids: List[str], items: np.ndarray, valid_from: np.ndarray, prices: np.ndarray,
+              until: int) -> "PriceHistory":
+        """From rows sorted by item index and then time; `until` bounds the times searched for"""
+        origin = int(valid_from.min()) if len(valid_from) else until
+        span = max(until, int(valid_from.max()) if len(valid_from) else until) - origin + 1
+        return cls(
+            item_ids=item_ids,
+            keys=items * span + (valid_from - origin),
+            prices=prices,
+            first=np.searchsorted(items, np.arange(len(item_ids))),
+            origin=origin,
+            span=span,
+        )
+
+    def prices_at(self, items: np.ndarray, at: np.ndarray) -> np.ndarray:
+        """The price of each item at each time in milliseconds; NaN for unknown items (-1)"""
+        if not len(self.prices):
+            return np.full(len(items), np.nan)
+        known = items >= 0
+        items = np.where(known, items, 0)
+        offsets = np.clip(at - self.origin, 0, self.span - 1)
+        positions = np.searchsorted(self.keys, items * self.span + offsets, side="right") - 1
+        # Before an item's first recorded price its earliest known price applies
+        positions = np.maximum(positions, self.first[items])
+        return np.where(known, self.prices[positions], np.nan)
+
+
+@dataclass
+class AuditChunk:
+    """A chunk of orders as arrays; lines point at order positions and toppings at line positions"""
+    order_ids: List[str]
+    order_totals: np.ndarray
+    order_discounts: np.ndarray
+    ordered_at: np.ndarray
+    line_ids: List[str]
+    line_orders: np.ndarray
+    pizzas: np.ndarray
+    sizes: np.ndarray
+    quantities: np.ndarray
+    unit_prices: np.ndarray
+    line_discounts: np.ndarray
+    line_totals: np.ndarray
+    topping_lines: np.ndarray
+    toppings: np.ndarray
+
+
+@dataclass
+class ChunkAudit:
+    units: np.ndarray
+    line_totals: np.ndarray
+    totals: np.ndarray
+    discounts: np.ndarray
+    # Boolean masks over lines and orders
+    wrong_lines: np.ndarray
+    wrong_orders: np.ndarray
+    unpriceable_orders: np.ndarray
+    empty_orders: np.ndarray
+
+
+@dataclass(frozen=True)
+class Mismatch:
+    order_id: str
+    stored_total: float
+    expected_total: float
+    stored_discount: float
+    expected_discount: float
+
+
+@dataclass
+class AuditReport:
+    orders: int = 0
+    lines: int = 0
+    mismatched_orders: int = 0
+    mismatched_lines: int = 0
+    # Orders with an item missing from the price history, or without lines
+    unpriceable_orders: int = 0
+    empty_orders: int = 0
+    # Expected minus stored, summed over mismatched orders
+    total_difference: float = 0.0
+    repaired_orders: int = 0
+    chunks: int = 0
+    elapsed: float = 0.0
+    last_order_id: Optional[str] = None
+
+    @property
+    def rate(self) -> float:
+        return self.orders / self.elapsed if self.elapsed else 0.0
+
+
+def print_audit_progress(report: AuditReport) -> None:
+    print(
+        f"{report.orders} orders audited, {report.mismatched_orders} mismatched "
+        f"({report.total_difference:+.2f}), {report.repaired_orders} repaired, "
+        f"{report.rate:.0f} orders/s (up to {report.last_order_id})"
+    )
+
+
+def audit_chunk(history: PriceHistory, chunk: AuditChunk, tolerance: float = TOLERANCE) -> ChunkAudit:
+    """Expected unit, line and order amounts for a chunk and where they disagree with the stored ones"""
+    orders = len(chunk.order_ids)
+    lines = len(chunk.line_ids)
+    at = chunk.ordered_at[chunk.line_orders]
+    topping_prices = history.prices_at(chunk.toppings, at[chunk.topping_lines])
+    toppings = np.bincount(chunk.topping_lines, weights=topping_prices, minlength=lines)
+    units = np.round(history.prices_at(chunk.pizzas, at) * history.prices_at(chunk.sizes, at) + toppings, 2)
+    line_totals = np.round(units * chunk.quantities - chunk.line_discounts, 2)
+    totals = np.round(np.bincount(chunk.line_orders, weights=line_totals, minlength=orders), 2)
+    discounts = np.round(np.bincount(chunk.line_orders, weights=chunk.line_discounts, minlength=orders), 2)
+
+    unpriceable = np.bincount(chunk.line_orders, weights=np.isnan(units), minlength=orders) > 0
+    empty = np.bincount(chunk.line_orders, minlength=orders) == 0
+    wrong_lines = (
+        (np.abs(units - chunk.unit_prices) > tolerance) | (np.abs(line_totals - chunk.line_totals) > tolerance)
+    ) & ~unpriceable[chunk.line_orders]
+    wrong_orders = (
+        (np.abs(totals - chunk.order_totals) > tolerance)
+        | (np.abs(discounts - chunk.order_discounts) > tolerance)
+        | (np.bincount(chunk.line_orders, weights=wrong_lines, minlength=orders) > 0)
+    ) & ~unpriceable & ~empty
+    return ChunkAudit(
+        units=units, line_totals=line_totals, totals=totals, discounts=discounts,
+        wrong_lines=wrong_lines, wrong_orders=wrong_orders, unpriceable_orders=unpriceable, empty_orders=empty,
+    )
+
+
+def load_price_history(conn: Connection) -> PriceHistory:
+    """Load the price history and map its items to dense indexes in the `audit_items` temporary table"""
+    item_column, valid_from, prices, until = conn.execute(PRICE_HISTORY).one()
+    row_items = item_column.split(",") if item_column else []
+    item_ids = list(dict.fromkeys(row_items))
+    index = {item_id: position for position, item_id in enumerate(item_ids)}
+    conn.execute(text("DROP TABLE IF EXISTS audit_items"))
+    conn.execute(text("CREATE TEMPORARY TABLE audit_items (id uuid PRIMARY KEY, idx integer NOT NULL)"))
+    conn.execute(
+        text("INSERT INTO audit_items SELECT * FROM unnest(CAST(:ids AS uuid[]), CAST(:idxs AS integer[]))"),
+        {"ids": item_ids, "idxs": list(range(len(item_ids)))},
+    )
+    conn.execute(text("ANALYZE audit_items"))
+    return PriceHistory.build(
+        item_ids,
+        np.fromiter((index[item_id] for item_id in row_items), dtype=np.int64, count=len(row_items)),
+        _ints(valid_from), _floats(prices), until,
+    )
+
+
+def load_chunk(conn: Connection, after: str, until: str, chunk_size: int,
+               where: str = "TRUE") -> Optional[AuditChunk]:
+    conn.execute(text(f"SET LOCAL work_mem = '{WORK_MEM}'"))
+    row = conn.execute(chunk_query(where), {"after": after, "until": until, "chunk_size": chunk_size}).one()
+    if row.order_ids is None:
+        return None
+    return AuditChunk(
+        order_ids=row.order_ids.split(","),
+        order_totals=_floats(row.order_totals),
+        order_discounts=_floats(row.order_discounts),
+        ordered_at=_ints(row.ordered_at),
+        line_ids=row.line_ids.split(",") if row.line_ids else [],
+        line_orders=_ints(row.line_orders),
+        pizzas=_ints(row.pizzas),
+        sizes=_ints(row.sizes),
+        quantities=_ints(row.quantities),
+        unit_prices=_floats(row.unit_prices),
+        line_discounts=_floats(row.line_discounts),
+        line_totals=_floats(row.line_totals),
+        topping_lines=_ints(row.topping_lines),
+        toppings=_ints(row.toppings),
+    )
+
+
+def repair_orders(engine: Engine, chunk: AuditChunk, audit: ChunkAudit, throttle: Throttle,
+                  batch_size: int) -> int:
+    """Write the expected amounts of mismatched orders in short batches, logging a `repriced` event each"""
+    repaired = 0
+    orders = np.flatnonzero(audit.wrong_orders)
+    for start in range(0, len(orders), batch_size):
+        batch = orders[start:start + batch_size]
+        lines = np.flatnonzero(np.isin(chunk.line_orders, batch))
+        params = {
+            "order_ids": [chunk.order_ids[position] for position in batch.tolist()],
+            "stored": chunk.order_totals[batch].tolist(),
+            "totals": audit.totals[batch].tolist(),
+            "discounts": audit.discounts[batch].tolist(),
+            "line_ids": [chunk.line_ids[position] for position in lines.tolist()],
+            "units": audit.units[lines].tolist(),
+            "line_totals": audit.line_totals[lines].tolist(),
+        }
+
+        def apply() -> int:
+            with engine.begin() as conn:
+                throttle.wait(conn)
+                conn.execute(text(f"SET LOCAL lock_timeout = '{throttle.lock_timeout}'"))
+                rows = conn.execute(REPAIR, params).all()
+                OrderLogService.append_many(conn, [
+                    (order_id, "repriced", {
+                        "total_price": total, "discount_total": discount, "previous_total_price": stored,
+                    })
+                    for order_id, stored, total, discount in rows
+                ])
+                return len(rows)
+
+        repaired += with_lock_retries(throttle, apply)
+        time.sleep(throttle.pause)
+    return repaired
+
+
+def run_audit(engine: Engine, chunk_size: int = 50000, repair: bool = False, throttle: Optional[Throttle] = None,
+              repair_batch_size: int = 500, after: Optional[UUID] = None, until: Optional[UUID] = None,
+              on_mismatch: Optional[Callable[[List[Mismatch]], None]] = None,
+              report: Callable[[AuditReport], None] = print_audit_progress, where: str = "TRUE") -> AuditReport:
+    """Audit orders with ids after `after` and up to `until`, repairing mismatches when `repair` is set.
+
+    `where` limits the audit to matching orders, e.g. the buckets an order shard owns.
+    """
+    throttle = throttle or Throttle()
+    progress = AuditReport()
+    started = time.perf_counter()
+    last_id = str(after) if after is not None else FIRST_ID
+    until = str(until) if until is not None else LAST_ID
+    with engine.connect() as conn:
+        history = load_price_history(conn)
+        conn.commit()
+        try:
+            while True:
+                chunk = load_chunk(conn, last_id, until, chunk_size, where)
+                # Each chunk reads its own snapshot, so the audit never holds one open for long
+                conn.commit()
+                if chunk is None:
+                    break
+                audit = audit_chunk(history, chunk)
+                wrong = np.flatnonzero(audit.wrong_orders)
+                progress.orders += len(chunk.order_ids)
+                progress.lines += len(chunk.line_ids)
+                progress.mismatched_orders += len(wrong)
+                progress.mismatched_lines += int(audit.wrong_lines.sum())
+                progress.unpriceable_orders += int(audit.unpriceable_orders.sum())
+                progress.empty_orders += int(audit.empty_orders.sum())
+                progress.total_difference = round(
+                    progress.total_difference + float((audit.totals[wrong] - chunk.order_totals[wrong]).sum()), 2
+                )
+                if on_mismatch is not None and len(wrong):
+                    on_mismatch([
+                        Mismatch(chunk.order_ids[position], stored_total, expected_total,
+                                 stored_discount, expected_discount)
+                        for position, stored_total, expected_total, stored_discount, expected_discount in zip(
+                            wrong.tolist(), chunk.order_totals[wrong].tolist(), audit.totals[wrong].tolist(),
+                            chunk.order_discounts[wrong].tolist(), audit.discounts[wrong].tolist(),
+                        )
+                    ])
+                if repair and len(wrong):
+                    progress.repaired_orders += repair_orders(engine, chunk, audit, throttle, repair_batch_size)
+                last_id = chunk.order_ids[-1]
+                progress.last_order_id = last_id
+                progress.chunks += 1
+                progress.elapsed = time.perf_counter() - started
+                report(progress)
+        finally:
+            conn.execute(text("DROP TABLE IF EXISTS audit_items"))
+            conn.commit()
+    return progress
@@ -0,0 +1,74 @@
+import threading
+from typing import Callable, Dict, Optional
+from uuid import UUID
+
+from app.config import settings
+from app.services.notifications import listener
+from app.tools.cache import LRUCache
+
+
+class OrderResponseCache:
+    """Read-through cache of serialized GET /orders/{id}/ bodies.
+
+    Entries are dropped as soon as the order changes, locally straight after
+    the commit and on every other worker through the status notification.
+    A load that overlaps an invalidation of the same order is returned but not
+    stored, so a read racing a write can never put a stale body back. Orders
+    only carry a generation while a load of them is in flight, which keeps
+    the bookkeeping as small as the number of concurrent misses.
+    """
+
+    def __init__(self, cache: LRUCache[bytes]):
+        self.cache = cache
+        # Bumped when the whole cache is dropped
+        self._epoch = 0
+        self._loading: Dict[UUID, int] = {}
+        self._generations: Dict[UUID, int] = {}
+        self._lock = threading.Lock()
+
+    def load(self, order_id: UUID, loader: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+        body = self.cache.get(order_id)
+        if body is not None:
+            return body
+        with self._lock:
+            self._loading[order_id] = self._loading.get(order_id, 0) + 1
+            seen = (self._epoch, self._generations.get(order_id, 0))
+        try:
+            body = loader()
+        finally:
+            with self._lock:
+                if body is not None and seen == (self._epoch, self._generations.get(order_id, 0)):
+                    self.cache.set(order_id, body)
+                self._loading[order_id] -= 1
+                if not self._loading[order_id]:
+                    del self._loading[order_id]
+                    self._generations.pop(order_id, None)
+        return body
+
+    def invalidate(self, order_id: UUID) -> None:
+        with self._lock:
+            if order_id in self._loading:
+                self._generations[order_id] = self._generations.get(order_id, 0) + 1
+            self.cache.pop(order_id)
+
+    def handle_status_notification(self, payload: dict) -> None:
+        try:
+            self.invalidate(UUID(payload["order_id"]))
+        except (KeyError, TypeError, ValueError):
+            return
+
+    def handle_reconnect(self) -> None:
+        # Changes made while the listener was down were never announced
+        with self._lock:
+            self._epoch += 1
+            self.cache.clear()
+
+
+order_responses = OrderResponseCache(LRUCache(
+    settings.ORDER_CACHE_MAX_ENTRIES,
+    ttl=settings.ORDER_CACHE_TTL_SECONDS,
+    max_bytes=settings.ORDER_CACHE_MAX_BYTES,
+))
+
+listener.add_handler(settings.ORDER_STATUS_CHANNEL, order_responses.handle_status_notification)
+listener.add_reconnect_handler(order_responses.handle_reconnect)
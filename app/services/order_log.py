@@ -0,0 +1,227 @@
+import asyncio
+import base64
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import BigInteger, Text, cast, func, insert, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import Insert
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.db.models.order_event import order_event_cursors, order_events
+from app.db.schemas.pizza import OrderEvent, OrderEventPage
+from app.services.notifications import listener, notify
+from app.services.order_shards import Shard, merge_ordered, order_shards
+
+Position = Tuple[int, int]
+# Each shard keeps its own log, so a reader has a position per shard
+Positions = Dict[int, Position]
+START: Position = (0, 0)
+
+# Every transaction older than the snapshot's xmin has finished, so no event
+# can still appear below it
+VISIBLE_HORIZON = cast(cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text), BigInteger)
+
+
+def encode_cursor(positions: Positions) -> str:
+    """"txid|seq" while only the first shard has been read, which is what cursors from before sharding hold"""
+    if set(positions) <= {0}:
+        txid, seq = positions.get(0, START)
+        raw = f"{txid}|{seq}"
+    else:
+        raw = ",".join(f"{shard_id}:{txid}|{seq}" for shard_id, (txid, seq) in sorted(positions.items()))
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Positions:
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    positions: Positions = {}
+    for part in raw.split(","):
+        shard_id, _, position = part.rpartition(":")
+        shard_id = int(shard_id) if shard_id else 0
+        if not 0 <= shard_id < len(order_shards.shards):
+            raise ValueError(f"Unknown shard {shard_id}")
+        txid, seq = position.split("|")
+        positions[shard_id] = (int(txid), int(seq))
+    return positions
+
+
+class _Wakeup:
+    """Futures for long-polling readers, resolved when a transaction with events commits"""
+
+    def __init__(self):
+        self._futures: Set[asyncio.Future] = set()
+
+    def arm(self) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._futures.add(future)
+        return future
+
+    def disarm(self, future: asyncio.Future) -> None:
+        self._futures.discard(future)
+
+    def fire(self, payload: object = None) -> None:
+        for future in self._futures:
+            if not future.done():
+                future.set_result(None)
+
+
+order_log_wakeup = _Wakeup()
+
+
+class OrderLogService:
+    @staticmethod
+    def append(db: Session, order_id: UUID, event_type: str, payload: dict) -> None:
+        OrderLogService.append_many(db, [(order_id, event_type, payload)])
+
+    @staticmethod
+    def append_statement(order_id: UUID, event_type: str, payload: dict) -> Insert:
+        """The insert behind `append`, for callers folding it into a larger statement.
+
+        Unlike `append` it does not notify; the caller must notify ORDER_LOG_CHANNEL
+        in the same transaction.
+        """
+        return insert(order_events).values(order_id=order_id, event_type=event_type, payload=payload)
+
+    @staticmethod
+    def append_many(db: Session, events: Iterable[Tuple[UUID, str, dict]]) -> None:
+        """Record events in the caller's transaction; they become readable once it commits"""
+        rows = [
+            {"order_id": order_id, "event_type": event_type, "payload": payload}
+            for order_id, event_type, payload in events
+        ]
+        if not rows:
+            return
+        db.execute(insert(order_events), rows)
+        # Identical notifications within a transaction are delivered once
+        notify(db, settings.ORDER_LOG_CHANNEL, None)
+
+    @staticmethod
+    def created_payload(values: dict, items: List[dict]) -> dict:
+        return {
+            "customer_name": values["customer_name"],
+            "phone_e164": values["phone_e164"],
+            "pizza_id": str(values["pizza_id"]),
+            "size_id": str(values["size_id"]),
+            "topping_ids": [str(topping_id) for topping_id in items[0]["topping_ids"]],
+            "payment_method": values["payment_method"].value,
+            "total_price": values["total_price"],
+            "discount_total": values["discount_total"],
+            "items": [
+                {
+                    "pizza_id": str(item["pizza_id"]),
+                    "size_id": str(item["size_id"]),
+                    "topping_ids": [str(topping_id) for topping_id in item["topping_ids"]],
+                    "quantity": item["quantity"],
+                    "total_price": item["total_price"],
+                }
+                for item in items
+            ],
+        }
+
+    @staticmethod
+    def read(db: Session, after: Positions, limit: int) -> OrderEventPage:
+        """Events after `after` from every shard, merged by time.
+
+        Each shard is read in commit-safe order using its (txid, seq) index
+        only; merging keeps that order, so a shard's position is its last
+        event returned.
+        """
+        def newer(shard: Shard, session: Session) -> list:
+            return [(shard.id, row) for row in OrderLogService._read_shard(session, after.get(shard.id, START), limit)]
+
+        rows = merge_ordered(order_shards.map_shards(newer, db), key=lambda event: event[1].created_at, limit=limit)
+        positions = dict(after)
+        for shard_id, row in rows:
+            positions[shard_id] = (row.txid, row.seq)
+        return OrderEventPage(
+            events=[
+                OrderEvent(
+                    seq=row.seq, order_id=row.order_id, event_type=row.event_type,
+                    payload=row.payload, created_at=row.created_at,
+                )
+                for _, row in rows
+            ],
+            cursor=encode_cursor(positions),
+        )
+
+    @staticmethod
+    def _read_shard(db: Session, after: Position, limit: int) -> list:
+        return db.execute(
+            select(order_events)
+            .where(tuple_(order_events.c.txid, order_events.c.seq) > after, order_events.c.txid < VISIBLE_HORIZON)
+            .order_by(order_events.c.txid, order_events.c.seq)
+            .limit(limit)
+        ).all()
+
+    @staticmethod
+    def get_position(db: Session, consumer: str) -> Positions:
+        """The consumer's acknowledged position on every shard it has read from"""
+        def position(shard: Shard, session: Session) -> Optional[Position]:
+            row = session.execute(
+                select(order_event_cursors.c.txid, order_event_cursors.c.seq)
+                .where(order_event_cursors.c.consumer == consumer)
+            ).first()
+            return (row.txid, row.seq) if row else None
+
+        return {
+            shard.id: found
+            for shard, found in zip(order_shards.shards, order_shards.map_shards(position, db))
+            if found is not None
+        }
+
+    @staticmethod
+    def acknowledge(db: Session, consumer: str, cursor: str) -> Positions:
+        """Store a consumer's position on each shard in the cursor; positions only ever move forward"""
+        for shard_id, position in decode_cursor(cursor).items():
+            with order_shards.shard_session(db, order_shards.shard(shard_id)) as session:
+                statement = pg_insert(order_event_cursors).values(consumer=consumer, txid=position[0], seq=position[1])
+                session.execute(statement.on_conflict_do_update(
+                    index_elements=[order_event_cursors.c.consumer],
+                    set_={"txid": statement.excluded.txid, "seq": statement.excluded.seq, "updated_at": func.now()},
+                    where=tuple_(order_event_cursors.c.txid, order_event_cursors.c.seq) < position,
+                ))
+                session.commit()
+        return OrderLogService.get_position(db, consumer)
+
+    @staticmethod
+    async def poll(db: Session, consumer: str, limit: int, wait: float,
+                   after: Optional[Positions] = None) -> OrderEventPage:
+        """Read the consumer's next batch, waiting up to `wait` seconds for one to commit"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        if after is None:
+            after = await run_in_threadpool(OrderLogService._position_and_release, db, consumer)
+        while True:
+            # Armed before reading, so a commit landing in between still wakes us
+            wakeup = order_log_wakeup.arm()
+            try:
+                page = await run_in_threadpool(OrderLogService._read_and_release, db, after, limit)
+                remaining = deadline - loop.time()
+                if page.events or remaining <= 0:
+                    return page
+                # Events can stay hidden behind an unrelated open transaction, so re-read periodically
+                await asyncio.wait({wakeup}, timeout=min(remaining, settings.ORDER_LOG_POLL_SECONDS))
+            finally:
+                order_log_wakeup.disarm(wakeup)
+
+    @staticmethod
+    def _position_and_release(db: Session, consumer: str) -> Positions:
+        try:
+            return OrderLogService.get_position(db, consumer)
+        finally:
+            db.rollback()
+
+    @staticmethod
+    def _read_and_release(db: Session, after: Positions, limit: int) -> OrderEventPage:
+        # End the transaction so the connection goes back to the pool while we wait
+        try:
+            return OrderLogService.read(db, after, limit)
+        finally:
+            db.rollback()
+
+
+listener.add_handler(settings.ORDER_LOG_CHANNEL, order_log_wakeup.fire)
+listener.add_reconnect_handler(order_log_wakeup.fire)
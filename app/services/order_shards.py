@@ -0,0 +1,327 @@
+"""Orders split across several databases ("shards") by bucket.
+
+Every order id carries a 16-bit slot in its last two bytes. The slots are cut
+into ORDER_SHARD_BUCKETS equal ranges, the buckets, and the order shard map in
+the main database names the shard holding each bucket, so any order id routes
+without a lookup. Plain version 7 ids have a random slot; with
+ORDER_SHARD_KEY=customer new ids take the slot from a hash of the customer's
+phone, which keeps a customer's orders in one bucket.
+
+An order's items, topping links and events live on its shard. The catalog
+stays in the main database and is copied to every shard by
+`replicate_catalog`, so order rows keep their foreign keys and point reads and
+writes never leave the shard. Listings and analytics run on all shards at
+once with `scatter` and merge what comes back.
+
+Without ORDER_SHARD_URIS the main database is the only shard and nothing is
+read from the map.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import create_engine, false, func, or_, select, true, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.config import settings
+from app.db.database.base import Base
+from app.db.database.session import SessionLocal, engine
+from app.db.models.menu_price import menu_prices
+from app.db.models.order_shard import BUCKET_MOVED, order_shard_map
+from app.db.models.pizza import Pizza
+from app.db.models.size import Size
+from app.db.models.topping import Topping
+from app.services.notifications import listener, notify
+from app.tools.uuid7 import uuid7
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+SLOTS = 1 << 16
+# Copied to every shard, parents first
+CATALOG_TABLES = (Size.__table__, Pizza.__table__, Topping.__table__, menu_prices)
+REPLICATE_BATCH_SIZE = 5000
+
+
+def order_slot(order_id: UUID) -> int:
+    return order_id.int & (SLOTS - 1)
+
+
+def routing_slot(key: str) -> int:
+    return zlib.crc32(key.encode()) & (SLOTS - 1)
+
+
+def is_bucket_moved(error: BaseException) -> bool:
+    """Whether a write failed because its bucket has moved to another shard"""
+    return isinstance(error, DBAPIError) and getattr(error.orig, "sqlstate", None) == BUCKET_MOVED
+
+
+def merge_ordered(results: Iterable[Iterable[T]], key: Callable[[T], Any], reverse: bool = False,
+                  limit: Optional[int] = None) -> List[T]:
+    """Merge per-shard results that are each sorted by `key` into the first `limit` overall"""
+    return list(itertools.islice(heapq.merge(*results, key=key, reverse=reverse), limit))
+
+
+def bucket_runs(owned: np.ndarray) -> List[Tuple[int, int]]:
+    """First and last bucket of each run of consecutive owned buckets"""
+    edges = np.diff(np.concatenate(([0], owned.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1).tolist(), (np.flatnonzero(edges == -1) - 1).tolist()))
+
+
+@dataclass(frozen=True)
+class Shard:
+    id: int
+    engine: Engine
+    session: sessionmaker
+
+
+class OrderShards:
+    def __init__(self, uris: Sequence[str], buckets: int, key: str, threads: int):
+        if not 1 <= buckets <= SLOTS or buckets & (buckets - 1):
+            raise ValueError(f"ORDER_SHARD_BUCKETS must be a power of two up to {SLOTS}, not {buckets}")
+        if key not in ("order", "customer"):
+            raise ValueError(f"ORDER_SHARD_KEY must be 'order' or 'customer', not {key!r}")
+        self.buckets = buckets
+        self.key = key
+        self.shards = [self._connect(shard_id, uri) for shard_id, uri in enumerate(uris)] or [
+            Shard(0, engine, SessionLocal)
+        ]
+        self.sharded = bool(uris)
+        # Every bucket starts on the first shard, the one holding orders from before sharding
+        self._owners = np.zeros(buckets, dtype=np.int64)
+        self._stale = self.sharded
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(threads, thread_name_prefix="shard") if len(self.shards) > 1 else None
+
+    @staticmethod
+    def _connect(shard_id: int, uri: str) -> Shard:
+        if uri == settings.SQLALCHEMY_DATABASE_URI:
+            return Shard(shard_id, engine, SessionLocal)
+        shard_engine = create_engine(
+            uri, pool_pre_ping=True, pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW
+        )
+        return Shard(shard_id, shard_engine, sessionmaker(autocommit=False, autoflush=False, bind=shard_engine))
+
+    def bucket_of(self, order_id: UUID) -> int:
+        return order_slot(order_id) * self.buckets // SLOTS
+
+    def slot_range(self, bucket: int) -> tuple:
+        """First and last slot of a bucket"""
+        width = SLOTS // self.buckets
+        return bucket * width, (bucket + 1) * width - 1
+
+    def owners(self) -> np.ndarray:
+        """The shard id of every bucket"""
+        if self._stale:
+            self.reload()
+        return self._owners
+
+    def reload(self) -> None:
+        """Read the map from the main database, storing the initial one the first time"""
+        with engine.begin() as conn:
+            self.load(conn)
+
+    def load(self, conn: Connection) -> None:
+        rows = conn.execute(select(order_shard_map.c.bucket, order_shard_map.c.shard)).all()
+        if not rows:
+            conn.execute(insert(order_shard_map).on_conflict_do_nothing(), [
+                {"bucket": bucket, "shard": 0} for bucket in range(self.buckets)
+            ])
+            rows = conn.execute(select(order_shard_map.c.bucket, order_shard_map.c.shard)).all()
+        if len(rows) != self.buckets:
+            raise ValueError(f"Order shard map has {len(rows)} buckets, ORDER_SHARD_BUCKETS is {self.buckets}")
+        owners = np.zeros(self.buckets, dtype=np.int64)
+        for bucket, shard_id in rows:
+            if shard_id >= len(self.shards):
+                raise ValueError(f"Bucket {bucket} is on shard {shard_id}, which is not in ORDER_SHARD_URIS")
+            owners[bucket] = shard_id
+        with self._lock:
+            self._owners = owners
+            self._stale = False
+
+    def set_owner(self, bucket: int, shard_id: int) -> None:
+        with self._lock:
+            owners = self._owners.copy()
+            owners[bucket] = shard_id
+            self._owners = owners
+
+    def owned_slot_ranges(self, shard: Shard) -> Optional[List[Tuple[int, int]]]:
+        """Slot ranges of the buckets the map gives `shard`, or None when it has every bucket.
+
+        A moved bucket stays on its old shard until purged, so anything
+        reading a whole shard must keep to these ranges.
+        """
+        if not self.sharded:
+            return None
+        owned = self.owners() == shard.id
+        if owned.all():
+            return None
+        return [(self.slot_range(first)[0], self.slot_range(last)[1]) for first, last in bucket_runs(owned)]
+
+    def owned(self, shard: Shard, order_id: ColumnElement) -> ColumnElement:
+        """Filter on an order id column keeping to the buckets `shard` owns"""
+        ranges = self.owned_slot_ranges(shard)
+        if ranges is None:
+            return true()
+        return or_(false(), *(func.order_slot(order_id).between(first, last) for first, last in ranges))
+
+    def owned_sql(self, shard: Shard, column: str = "id") -> str:
+        """`owned` as SQL text, for queries written as text"""
+        ranges = self.owned_slot_ranges(shard)
+        if ranges is None:
+            return "TRUE"
+        if not ranges:
+            return "FALSE"
+        return " OR ".join(f"order_slot({column}) BETWEEN {first} AND {last}" for first, last in ranges)
+
+    def shard(self, shard_id: int) -> Shard:
+        return self.shards[shard_id]
+
+    def shard_for(self, order_id: UUID) -> Shard:
+        if len(self.shards) == 1:
+            return self.shards[0]
+        return self.shards[self.owners()[self.bucket_of(order_id)]]
+
+    def mint_order_id(self, customer_key: Optional[str] = None) -> UUID:
+        """A new order id, placed in the customer's bucket when sharding by customer"""
+        order_id = uuid7()
+        if self.key == "customer" and customer_key:
+            order_id = UUID(int=order_id.int & ~(SLOTS - 1) | routing_slot(customer_key))
+        return order_id
+
+    def customer_shards(self, customer_key: str) -> List[Shard]:
+        """Shards that can hold a customer's orders"""
+        if self.key != "customer" or len(self.shards) == 1:
+            return self.shards
+        bucket = routing_slot(customer_key) * self.buckets // SLOTS
+        return [self.shards[self.owners()[bucket]]]
+
+    def session_for(self, order_id: UUID) -> Session:
+        return self.shard_for(order_id).session()
+
+    @contextmanager
+    def shard_session(self, db: Session, shard: Shard) -> Iterator[Session]:
+        """A session on `shard`; `db` itself when that is the shard it is bound to, or when unsharded"""
+        if not self.sharded or db.get_bind() is shard.engine:
+            yield db
+            return
+        with shard.session() as session:
+            yield session
+
+    def order_session(self, db: Session, order_id: UUID):
+        """A session on the order's shard, see `shard_session`"""
+        return self.shard_session(db, self.shard_for(order_id))
+
+    def map_shards(self, fn: Callable[[Shard, Session], T], db: Optional[Session] = None,
+                   shards: Optional[Sequence[Shard]] = None) -> List[T]:
+        """Run `fn` with each shard and a session on it in parallel, returning results in shard order.
+
+        The shard `db` is bound to reuses it instead of taking another connection.
+        """
+        shards = self.shards if shards is None else shards
+
+        def run(shard: Shard) -> T:
+            if db is not None:
+                with self.shard_session(db, shard) as session:
+                    return fn(shard, session)
+            with shard.session() as session:
+                return fn(shard, session)
+
+        if self._pool is None or len(shards) == 1:
+            return [run(shard) for shard in shards]
+        return list(self._pool.map(run, shards))
+
+    def scatter(self, fn: Callable[[Session], T], db: Optional[Session] = None,
+                shards: Optional[Sequence[Shard]] = None) -> List[T]:
+        """`map_shards` for functions that only need the session"""
+        return self.map_shards(lambda shard, session: fn(session), db, shards)
+
+    def create_tables(self) -> None:
+        for shard in self.shards:
+            if shard.engine is not engine:
+                Base.metadata.create_all(bind=shard.engine)
+
+    def replicate_catalog(self) -> Dict[int, int]:
+        """Copy the catalog from the main database to every other shard, returning rows written per shard.
+
+        Only new and changed rows are written. Items deleted from the main
+        database are kept on shards, whose orders may still reference them.
+        """
+        if not self.sharded:
+            return {}
+        with engine.connect() as conn:
+            rows = {table.name: [dict(row._mapping) for row in conn.execute(select(table))] for table in CATALOG_TABLES}
+        written = {}
+        for shard in self.shards:
+            if shard.engine is engine:
+                continue
+            with shard.engine.begin() as conn:
+                written[shard.id] = sum(
+                    upsert(conn, table, rows[table.name][start:start + REPLICATE_BATCH_SIZE])
+                    for table in CATALOG_TABLES
+                    for start in range(0, len(rows[table.name]), REPLICATE_BATCH_SIZE)
+                )
+        return written
+
+    def announce(self, db: Session, bucket: int, shard_id: int) -> None:
+        """Record a bucket's new shard in the main database's map and tell every worker on commit"""
+        statement = insert(order_shard_map).values(bucket=bucket, shard=shard_id)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[order_shard_map.c.bucket],
+            set_={"shard": statement.excluded.shard, "updated_at": func.now()},
+        ))
+        notify(db, settings.ORDER_SHARD_CHANNEL, {"bucket": bucket, "shard": shard_id})
+
+    def handle_map_notification(self, payload: dict) -> None:
+        try:
+            self.set_owner(int(payload["bucket"]), int(payload["shard"]))
+        except (KeyError, TypeError, ValueError, IndexError):
+            return
+
+    def handle_reconnect(self) -> None:
+        # Moves made while the listener was down were never announced
+        self._stale = self.sharded
+
+
+def upsert(conn: Connection, table, rows: List[dict]) -> int:
+    """Insert rows or update those that differ, by primary key; returns how many were written"""
+    if not rows:
+        return 0
+    key = [column.name for column in table.primary_key.columns]
+    values = [column.name for column in table.columns if column.name not in key]
+    statement = insert(table)
+    if values:
+        statement = statement.on_conflict_do_update(
+            index_elements=key,
+            set_={column: statement.excluded[column] for column in values},
+            where=tuple_(*(table.c[column] for column in values)).is_distinct_from(
+                tuple_(*(statement.excluded[column] for column in values))
+            ),
+        )
+    else:
+        statement = statement.on_conflict_do_nothing()
+    return len(conn.execute(statement.returning(table.c[key[0]]), rows).all())
+
+
+order_shards = OrderShards(
+    settings.ORDER_SHARD_URIS,
+    settings.ORDER_SHARD_BUCKETS,
+    settings.ORDER_SHARD_KEY,
+    settings.ORDER_SHARD_SCATTER_THREADS,
+)
+
+listener.add_handler(settings.ORDER_SHARD_CHANNEL, order_shards.handle_map_notification)
+listener.add_reconnect_handler(order_shards.handle_reconnect)
@@ -0,0 +1,69 @@
+import asyncio
+from typing import Dict, Optional, Set
+from uuid import UUID
+
+from app.config import settings
+from app.db.models.order import OrderStatus
+from app.services.notifications import listener
+
+# Statuses after which an order will not change again, so streams can close
+TERMINAL_STATUSES = {OrderStatus.DELIVERED.value, OrderStatus.CANCELLED.value}
+
+# Sentinel pushed to subscribers when notifications may have been missed
+RESYNC = None
+
+
+class OrderStatusBroker:
+    """Fans order status notifications out to in-memory subscriber queues.
+
+    Every watcher of an order gets its own bounded queue; a slow consumer only
+    ever loses stale intermediate statuses, never the latest one.
+    """
+
+    def __init__(self, queue_size: int = settings.ORDER_EVENTS_QUEUE_SIZE):
+        self._queue_size = queue_size
+        self._subscribers: Dict[UUID, Set[asyncio.Queue]] = {}
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def subscribe(self, order_id: UUID) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers.setdefault(order_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, order_id: UUID, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(order_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[order_id]
+
+    def publish(self, order_id: UUID, event: Optional[dict]) -> None:
+        for queue in self._subscribers.get(order_id, ()):
+            self._put(queue, event)
+
+    def resync(self) -> None:
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._put(queue, RESYNC)
+
+    def handle_notification(self, payload: dict) -> None:
+        try:
+            order_id = UUID(payload["order_id"])
+        except (KeyError, TypeError, ValueError):
+            return
+        self.publish(order_id, payload)
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, event: Optional[dict]) -> None:
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+
+order_status_broker = OrderStatusBroker()
+listener.add_handler(settings.ORDER_STATUS_CHANNEL, order_status_broker.handle_notification)
+listener.add_reconnect_handler(order_status_broker.resync)
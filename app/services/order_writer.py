@@ -0,0 +1,129 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models.order import Order
+from app.db.models.order_item import OrderItem
+from app.db.models.order_toppings import order_toppings
+from app.services.customer_service import CustomerService
+from app.services.order_log import OrderLogService
+from app.services.order_shards import order_shards
+
+
+@dataclass
+class PendingOrder:
+    values: dict
+    # Line items without order_id; the first one's toppings are linked to the order
+    items: List[dict]
+    done: threading.Event = field(default_factory=threading.Event)
+    order: Optional[Order] = None
+    error: Optional[BaseException] = None
+
+
+class GroupCommitWriter:
+    """Batches concurrent order inserts into one statement and one commit.
+
+    The first request to arrive leads a batch: it waits up to `max_wait`
+    seconds for others to join, or until `max_batch` orders are queued, then
+    inserts them all with its own session while the followers block. Raising
+    `max_wait` trades request latency for fewer, larger commits.
+    """
+
+    def __init__(self, max_batch: int, max_wait: float):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: List[PendingOrder] = []
+        self._condition = threading.Condition()
+        self.stats = {"batches": 0, "orders": 0, "fallbacks": 0}
+
+    def submit(self, db: Session, values: dict, items: List[dict]) -> Order:
+        """Insert an order and its items, returning it detached from any session"""
+        pending = PendingOrder(values, items)
+        with self._condition:
+            self._pending.append(pending)
+            leader = len(self._pending) == 1
+            if len(self._pending) >= self.max_batch:
+                self._condition.notify_all()
+            if leader:
+                deadline = time.monotonic() + self.max_wait
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch, self._pending = self._pending, []
+        if leader:
+            self._write(db, batch)
+        else:
+            pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.order
+
+    def _write(self, db: Session, batch: List[PendingOrder]) -> None:
+        try:
+            self._insert(db, batch)
+            db.commit()
+            self.stats["batches"] += 1
+            self.stats["orders"] += len(batch)
+        except Exception:
+            db.rollback()
+            # One bad order must not fail the rest, so retry them one by one
+            self.stats["fallbacks"] += 1
+            for pending in batch:
+                pending.order = None
+                try:
+                    self._insert(db, [pending])
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    pending.error = e
+        finally:
+            for pending in batch:
+                if pending.order is None and pending.error is None:
+                    pending.error = RuntimeError("Order was not written")
+                pending.done.set()
+
+    @staticmethod
+    def _insert(db: Session, batch: List[PendingOrder]) -> None:
+        table = Order.__table__
+        rows = db.execute(
+            insert(table).returning(*table.c, sort_by_parameter_order=True),
+            [pending.values for pending in batch],
+        ).all()
+        links = [
+            {"order_id": row.id, "topping_id": topping_id}
+            for pending, row in zip(batch, rows)
+            for topping_id in pending.items[0]["topping_ids"]
+        ]
+        if links:
+            db.execute(insert(order_toppings), links)
+        items = [
+            [dict(item, order_id=row.id) for item in pending.items]
+            for pending, row in zip(batch, rows)
+        ]
+        db.execute(insert(OrderItem.__table__), [item for order_items in items for item in order_items])
+        OrderLogService.append_many(db, [
+            (row.id, "created", OrderLogService.created_payload(pending.values, pending.items))
+            for pending, row in zip(batch, rows)
+        ])
+        CustomerService.announce(db, [row.phone_e164 for row in rows])
+        for pending, row, order_items in zip(batch, rows, items):
+            pending.order = Order(**row._mapping)
+            pending.order.items = [OrderItem(**item) for item in order_items]
+
+
+# A batch is one transaction, so each order shard gets a writer of its own
+order_writers = [
+    GroupCommitWriter(
+        max_batch=settings.ORDER_GROUP_COMMIT_MAX_BATCH,
+        max_wait=settings.ORDER_GROUP_COMMIT_MAX_WAIT_MS / 1000,
+    )
+    for _ in order_shards.shards
+]
+order_writer = order_writers[0]
@@ -1,12 +1,32 @@
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
 from app.db.models.pizza import Pizza
 from app.db.models.size import Size
 from app.db.models.topping import Topping
-from app.db.models.order import Order
-from app.db.schemas.pizza import OrderCreate
+from app.db.models.order import Order, OrderStatus
+from app.db.models.order_item import OrderItem
+from app.db.models.order_toppings import order_toppings
+from app.db.schemas.pizza import CartItem, CartOrderCreate, OrderCreate
+from app.services.notifications import notify
+from app.tools.phone import normalize_phone
+from app.tools.uuid7 import uuid7
+from app.services.customer_service import CustomerService
+from app.services.order_cache import order_responses
+from app.services.order_log import OrderLogService
+from app.services.order_shards import is_bucket_moved, order_shards
+from app.services.order_writer import order_writers
+from app.services.pricing import price_cart
+from app.services.promotion_service import PromotionService
+from app.config import settings
+
+logger = logging.getLogger(__name__)
 
 class PizzaService:
     @staticmethod
@@ -23,36 +43,168 @@ class PizzaService:
     
     @staticmethod
     def create_order(db: Session, order_data: OrderCreate) -> Order:
+        """Single-pizza orders are carts with one line"""
+        return PizzaService.create_cart_order(db, CartOrderCreate(
+            customer_name=order_data.customer_name,
+            phone_number=order_data.phone_number,
+            address=order_data.address,
+            payment_method=order_data.payment_method,
+            items=[CartItem(
+                pizza_id=order_data.pizza_id, size_id=order_data.size_id, topping_ids=order_data.topping_ids
+            )]
+        ))
+
+    @staticmethod
+    def create_cart_order(db: Session, cart: CartOrderCreate) -> Order:
         try:
-            print(order_data)
-            # Get pizza and size
-            pizza = db.query(Pizza).get(order_data.pizza_id)
-            size = db.query(Size).get(order_data.size_id)
-            toppings = db.query(Topping).filter(Topping.id.in_(order_data.topping_ids)).all()
-            
-            # Calculate total price
-            base_price = pizza.base_price * size.multiplier
-            toppings_price = sum(topping.price for topping in toppings)
-            total_price = base_price + toppings_price
-            
-            # Create order
-            order = Order(
-                customer_name=order_data.customer_name,
-                phone_number=order_data.phone_number,
-                address=order_data.address,
-                pizza_id=order_data.pizza_id,
-                size_id=order_data.size_id,
-                payment_method=order_data.payment_method,
-                total_price=total_price
-            )        
-            db.add(order)
-            db.commit()
-            db.refresh(order)
+            logger.debug("Creating cart order", extra={"items": len(cart.items)})
+            # Get every pizza, size and topping in the cart
+            pizzas = {pizza.id: pizza for pizza in db.query(Pizza).filter(
+                Pizza.id.in_({item.pizza_id for item in cart.items})
+            )}
+            sizes = {size.id: size for size in db.query(Size).filter(
+                Size.id.in_({item.size_id for item in cart.items})
+            )}
+            toppings = {topping.id: topping for topping in db.query(Topping).filter(
+                Topping.id.in_({topping_id for item in cart.items for topping_id in item.topping_ids})
+            )}
+            for item in cart.items:
+                if item.pizza_id not in pizzas:
+                    raise ValueError(f"Pizza {item.pizza_id} not found")
+                if item.size_id not in sizes:
+                    raise ValueError(f"Size {item.size_id} not found")
+                for topping_id in item.topping_ids:
+                    if topping_id not in toppings:
+                        raise ValueError(f"Topping {topping_id} not found")
+            line_toppings = [
+                [toppings[topping_id] for topping_id in dict.fromkeys(item.topping_ids)] for item in cart.items
+            ]
+
+            # Price all lines net of any running promotions
+            price = price_cart(
+                PromotionService.get_index(db),
+                [pizzas[item.pizza_id] for item in cart.items],
+                [sizes[item.size_id] for item in cart.items],
+                line_toppings,
+                [item.quantity for item in cart.items],
+                datetime.now()
+            )
+            items = [
+                dict(
+                    id=uuid7(),
+                    position=position,
+                    pizza_id=item.pizza_id,
+                    size_id=item.size_id,
+                    topping_ids=[topping.id for topping in line],
+                    quantity=item.quantity,
+                    unit_price=unit_price,
+                    discount_total=discount_total,
+                    discounts=[discount.as_dict() for discount in discounts],
+                    total_price=total_price
+                )
+                for position, (item, line, unit_price, discount_total, total_price, discounts) in enumerate(zip(
+                    cart.items, line_toppings, price.unit_prices.tolist(), price.discount_totals.tolist(),
+                    price.totals.tolist(), price.discounts
+                ))
+            ]
+
+            # Create order on its shard; catalog and promotions above come from the main database
+            phone_e164 = normalize_phone(cart.phone_number)
+            values = dict(
+                id=order_shards.mint_order_id(phone_e164 or cart.phone_number),
+                customer_name=cart.customer_name,
+                phone_number=cart.phone_number,
+                phone_e164=phone_e164,
+                address=cart.address,
+                pizza_id=cart.items[0].pizza_id,
+                size_id=cart.items[0].size_id,
+                payment_method=cart.payment_method,
+                total_price=price.total,
+                discount_total=price.discount_total,
+                discounts=[discount.as_dict() for discounts in price.discounts for discount in discounts]
+            )
+            try:
+                order = PizzaService._write_order(db, values, items)
+            except Exception as e:
+                # A worker that missed a bucket move is refused by the old shard; route once more
+                if not is_bucket_moved(e):
+                    raise
+                order_shards.reload()
+                order = PizzaService._write_order(db, values, items)
+            CustomerService.invalidate(order.phone_e164)
             
             return order
         except Exception as e:
             raise Exception(f"Failed to create order: {str(e)}")
+
+    @staticmethod
+    def _write_order(db: Session, values: dict, items: List[dict]) -> Order:
+        with order_shards.order_session(db, values["id"]) as order_db:
+            try:
+                if settings.ORDER_GROUP_COMMIT_ENABLED:
+                    return order_writers[order_shards.shard_for(values["id"]).id].submit(order_db, values, items)
+                order = PizzaService._insert_order(order_db, values, items)
+                order_db.commit()
+                return order
+            except Exception:
+                order_db.rollback()
+                raise
+
+    @staticmethod
+    def _insert_order(db: Session, values: dict, items: List[dict]) -> Order:
+        """Write the order, its items, topping links and created event in one statement.
+
+        Each write is a data-modifying CTE of a single INSERT, so the whole
+        cart costs one round trip however many lines it has. Returns the
+        order detached from the session.
+        """
+        table = Order.__table__
+        order_id = values["id"]
+        items = [dict(item, order_id=order_id) for item in items]
+        header = insert(table).values(**values).returning(*table.c).cte("header")
+        writes = [
+            insert(OrderItem.__table__).values(items).cte("items"),
+            OrderLogService.append_statement(
+                order_id, "created", OrderLogService.created_payload(values, items)
+            ).cte("events"),
+        ]
+        if items[0]["topping_ids"]:
+            writes.append(insert(order_toppings).values([
+                {"order_id": order_id, "topping_id": topping_id} for topping_id in items[0]["topping_ids"]
+            ]).cte("toppings"))
+        # The notifications ride along instead of costing a statement of their own
+        notifications = [func.pg_notify(settings.ORDER_LOG_CHANNEL, json.dumps(None))]
+        if values.get("phone_e164"):
+            notifications.append(func.pg_notify(
+                settings.CUSTOMER_ORDERS_CHANNEL, json.dumps({"phone_e164": values["phone_e164"]})
+            ))
+        row = db.execute(select(*header.c, *notifications).add_cte(*writes)).one()
+        order = Order(**{column.name: row._mapping[column.name] for column in table.c})
+        order.items = [OrderItem(**item) for item in items]
+        return order
     
     @staticmethod
     def get_order(db: Session, order_id: UUID) -> Order:
-        return db.query(Order).filter(Order.id == order_id).first() 
\ No newline at end of file
+        return db.query(Order).filter(Order.id == order_id).first()
+
+    @staticmethod
+    def update_order_status(db: Session, order: Order, status: OrderStatus, extra: Optional[dict] = None) -> Order:
+        """Persist a status change and notify watchers once it commits"""
+        order.status = status
+        payload = {"order_id": str(order.id), "status": status.value, "at": time.time()}
+        if order.latitude is not None and order.longitude is not None:
+            payload.update(latitude=order.latitude, longitude=order.longitude)
+        if extra:
+            payload.update(extra)
+        if status == OrderStatus.READY:
+            order.ready_at = datetime.fromtimestamp(payload["at"], tz=timezone.utc)
+        OrderLogService.append(
+            db, order.id, "status_changed", {key: value for key, value in payload.items() if key != "order_id"}
+        )
+        notify(db, settings.ORDER_STATUS_CHANNEL, payload)
+        CustomerService.announce(db, [order.phone_e164])
+        db.commit()
+        db.refresh(order)
+        order_responses.invalidate(order.id)
+        CustomerService.invalidate(order.phone_e164)
+        return order
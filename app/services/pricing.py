@@ -0,0 +1,139 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Sequence
+from uuid import UUID
+
+import numpy as np
+
+from app.db.models.pizza import Pizza
+from app.db.models.promotion import PromotionKind
+from app.db.models.size import Size
+from app.db.models.topping import Topping
+from app.services.promotions import PromotionIndex
+
+
+@dataclass(frozen=True)
+class Discount:
+    promotion_id: UUID
+    name: str
+    amount: float
+
+    def as_dict(self) -> dict:
+        return {"promotion_id": str(self.promotion_id), "name": self.name, "amount": self.amount}
+
+
+@dataclass
+class PriceBreakdown:
+    subtotal: float
+    discounts: List[Discount] = field(default_factory=list)
+
+    @property
+    def discount_total(self) -> float:
+        return round(min(sum(discount.amount for discount in self.discounts), self.subtotal), 2)
+
+    @property
+    def total(self) -> float:
+        return round(self.subtotal - self.discount_total, 2)
+
+
+def _discounts(promotions: PromotionIndex, pizza_id: UUID, size_id: UUID, pizza_price: float,
+               topping_prices: Dict[UUID, float], at: datetime) -> List[Discount]:
+    best = None
+    waived = {}
+    for rule in promotions.candidates(at, pizza_id, size_id, list(topping_prices)):
+        if rule.kind == PromotionKind.FREE_TOPPING:
+            if rule.topping_id in topping_prices and rule.topping_id not in waived:
+                waived[rule.topping_id] = Discount(rule.id, rule.name, topping_prices[rule.topping_id])
+            continue
+        if rule.kind == PromotionKind.PERCENT_OFF:
+            amount = pizza_price * rule.value / 100
+        else:
+            amount = min(rule.value, pizza_price)
+        if best is None or amount > best.amount:
+            best = Discount(rule.id, rule.name, round(amount, 2))
+    return ([best] if best is not None else []) + list(waived.values())
+
+
+def price_pizza(promotions: PromotionIndex, pizza: Pizza, size: Size,
+                toppings: Sequence[Topping], at: datetime) -> PriceBreakdown:
+    """Price one pizza and apply the promotions running at `at`.
+
+    The best percentage or amount off the pizza applies, and every free
+    topping rule whose topping is on the pizza waives that topping once.
+    """
+    pizza_price = pizza.base_price * size.multiplier
+    topping_prices: Dict[UUID, float] = {topping.id: topping.price for topping in toppings}
+    return PriceBreakdown(
+        subtotal=round(pizza_price + sum(topping_prices.values()), 2),
+        discounts=_discounts(promotions, pizza.id, size.id, pizza_price, topping_prices, at),
+    )
+
+
+@dataclass
+class CartPrice:
+    """Per-line prices of a cart; arrays are indexed by line position"""
+    unit_prices: np.ndarray
+    quantities: np.ndarray
+    discount_totals: np.ndarray
+    totals: np.ndarray
+    # Discounts applied to each line, amounts covering the whole quantity
+    discounts: List[List[Discount]]
+
+    @property
+    def discount_total(self) -> float:
+        return round(float(self.discount_totals.sum()), 2)
+
+    @property
+    def total(self) -> float:
+        return round(float(self.totals.sum()), 2)
+
+
+def price_cart(promotions: PromotionIndex, pizzas: Sequence[Pizza], sizes: Sequence[Size],
+               toppings: Sequence[Sequence[Topping]], quantities: Sequence[int], at: datetime) -> CartPrice:
+    """Price every line of a cart at once.
+
+    Line subtotals, discount caps and totals are computed as arrays over the
+    whole cart; only the promotion lookup visits each line. Each unit of a
+    line gets the same discounts `price_pizza` would give it.
+    """
+    lines = len(pizzas)
+    counts = np.fromiter((len(line) for line in toppings), dtype=np.int64, count=lines)
+    quantity = np.asarray(quantities, dtype=np.int64)
+    pizza_prices = (
+        np.fromiter((pizza.base_price for pizza in pizzas), dtype=np.float64, count=lines)
+        * np.fromiter((size.multiplier for size in sizes), dtype=np.float64, count=lines)
+    )
+    topping_totals = np.bincount(
+        np.repeat(np.arange(lines), counts),
+        weights=np.fromiter((topping.price for line in toppings for topping in line), dtype=np.float64,
+                            count=int(counts.sum())),
+        minlength=lines,
+    )
+    unit_prices = np.round(pizza_prices + topping_totals, 2)
+
+    unit_discounts = [
+        _discounts(promotions, pizza.id, size.id, pizza_price,
+                   {topping.id: topping.price for topping in line}, at)
+        for pizza, size, line, pizza_price in zip(pizzas, sizes, toppings, pizza_prices.tolist())
+    ]
+    unit_discount_totals = np.minimum(
+        np.fromiter(
+            (sum(discount.amount for discount in line) for line in unit_discounts),
+            dtype=np.float64, count=lines,
+        ),
+        unit_prices,
+    )
+    discount_totals = np.round(unit_discount_totals * quantity, 2)
+    return CartPrice(
+        unit_prices=unit_prices,
+        quantities=quantity,
+        discount_totals=discount_totals,
+        totals=np.round(unit_prices * quantity - discount_totals, 2),
+        discounts=[
+            [
+                Discount(discount.promotion_id, discount.name, round(discount.amount * count, 2))
+                for discount in line
+            ]
+            for line, count in zip(unit_discounts, quantity.tolist())
+        ],
+    )
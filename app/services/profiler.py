@@ -0,0 +1,236 @@
+"""Stack-sampling profiler for live workers.
+
+While a capture runs, a background thread reads every thread's Python stack
+each `interval` seconds and counts identical stacks. Threads that are only
+waiting (an idle event loop, idle pool workers, the log writer) are skipped,
+so the counts show where requests spend their time, including time blocked
+on the database. Nothing runs and nothing is hooked between captures.
+
+Only one capture runs per host at a time: a capture holds an exclusive
+lock on PROFILER_LOCK_PATH, so with several workers only the one that got
+the lock pays the sampling cost.
+"""
+import fcntl
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from types import CodeType, FrameType
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+
+Stack = Tuple[str, ...]
+
+# (module, function) of the innermost frame of a thread that is only waiting
+IDLE_FRAMES = frozenset({
+    ("threading", "Condition.wait"),
+    ("threading", "Event.wait"),
+    ("threading", "Thread._wait_for_tstate_lock"),
+    ("queue", "Queue.get"),
+    ("concurrent.futures.thread", "_worker"),
+    ("selectors", "EpollSelector.select"),
+    ("selectors", "PollSelector.select"),
+    ("selectors", "SelectSelector.select"),
+    ("selectors", "KqueueSelector.select"),
+})
+
+
+def _qualname(frame: FrameType) -> str:
+    """The function's qualified name; before Python 3.11 code objects lack it, so the class comes from self or cls"""
+    code = frame.f_code
+    qualname = getattr(code, "co_qualname", None)
+    if qualname is not None:
+        return qualname
+    if code.co_argcount:
+        first = frame.f_locals.get(code.co_varnames[0])
+        if code.co_varnames[0] == "self" and first is not None:
+            return f"{type(first).__name__}.{code.co_name}"
+        if code.co_varnames[0] == "cls" and isinstance(first, type):
+            return f"{first.__name__}.{code.co_name}"
+    return code.co_name
+
+
+@dataclass
+class Profile:
+    id: str
+    kind: str
+    interval: float
+    started_at: datetime
+    # "METHOD /path" for request captures
+    target: Optional[str] = None
+    request_id: Optional[str] = None
+    running: bool = True
+    duration: float = 0.0
+    ticks: int = 0
+    # Most other requests in flight on this worker at any tick; their stacks are included
+    concurrent_requests: int = 0
+    stacks: Counter = field(default_factory=Counter)
+
+    def snapshot(self) -> Counter:
+        # Copying into an empty Counter is a single dict update, safe while sampling continues
+        return Counter(self.stacks)
+
+    def collapsed(self) -> str:
+        """Folded stacks, one `frame;frame;frame count` line each, for flamegraph tools"""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.snapshot().most_common())
+
+    def functions(self, limit: int = 30) -> List[dict]:
+        """Functions by samples spent in them (self) and under them (total)"""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        stacks = self.snapshot()
+        for stack, count in stacks.items():
+            own[stack[-1]] += count
+            for function in set(stack[1:]):
+                total[function] += count
+        samples = sum(stacks.values()) or 1
+        return [
+            {
+                "function": function,
+                "self": own[function],
+                "total": count,
+                "self_percent": round(100 * own[function] / samples, 1),
+                "total_percent": round(100 * count / samples, 1),
+            }
+            for function, count in total.most_common(limit)
+        ]
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "target": self.target,
+            "request_id": self.request_id,
+            "running": self.running,
+            "started_at": self.started_at,
+            "duration_seconds": round(self.duration, 3),
+            "interval_ms": self.interval * 1000,
+            "ticks": self.ticks,
+            "samples": sum(self.snapshot().values()),
+            "concurrent_requests": self.concurrent_requests,
+        }
+
+
+class Profiler:
+    def __init__(self, lock_path: str = settings.PROFILER_LOCK_PATH,
+                 max_profiles: int = settings.PROFILER_MAX_PROFILES):
+        self.lock_path = lock_path
+        self.max_profiles = max_profiles
+        # Requests in flight on this worker; only touched from the event loop
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._active: Optional[Profile] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_file: Optional[int] = None
+        self._profiles: "OrderedDict[str, Profile]" = OrderedDict()
+        self._labels: Dict[CodeType, str] = {}
+
+    @property
+    def active(self) -> Optional[Profile]:
+        return self._active
+
+    def start(self, kind: str, interval: float, seconds: Optional[float] = None,
+              target: Optional[str] = None, request_id: Optional[str] = None) -> Optional[Profile]:
+        """Start a capture, or return None when one is already running on this host.
+
+        With `seconds` the capture stops by itself, otherwise call `stop`.
+        """
+        with self._lock:
+            if self._active is not None or not self._acquire_host_lock():
+                return None
+            profile = Profile(
+                id=uuid.uuid4().hex, kind=kind, interval=interval,
+                started_at=datetime.now(timezone.utc), target=target, request_id=request_id,
+            )
+            self._active = profile
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._sample, args=(profile, seconds), name="profiler", daemon=True
+            )
+            self._thread.start()
+            return profile
+
+    def stop(self, profile: Profile, wait: bool = True) -> Profile:
+        """Stop `profile` if it is still running, by default waiting for its last sample"""
+        thread = self._thread
+        if self._active is profile:
+            self._stop.set()
+            if wait and thread is not None:
+                thread.join()
+        return profile
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[Profile]:
+        return list(reversed(self._profiles.values()))
+
+    def _sample(self, profile: Profile, seconds: Optional[float]) -> None:
+        own = threading.get_ident()
+        started = time.perf_counter()
+        deadline = started + seconds if seconds is not None else None
+        try:
+            while not self._stop.wait(profile.interval):
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == own:
+                        continue
+                    stack = self._stack(frame)
+                    if stack is not None:
+                        profile.stacks[(names.get(ident, str(ident)),) + stack] += 1
+                profile.ticks += 1
+                profile.concurrent_requests = max(profile.concurrent_requests, self.in_flight - 1)
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+        finally:
+            profile.duration = time.perf_counter() - started
+            profile.running = False
+            with self._lock:
+                self._active = None
+                self._release_host_lock()
+
+    def _stack(self, frame: FrameType) -> Optional[Stack]:
+        labels = []
+        innermost = True
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = f"{frame.f_globals.get('__name__', '?')}:{_qualname(frame)}"
+                self._labels[code] = label
+            if innermost:
+                module, _, function = label.partition(":")
+                if (module, function) in IDLE_FRAMES:
+                    return None
+                innermost = False
+            labels.append(label)
+            frame = frame.f_back
+        return tuple(reversed(labels))
+
+    def _acquire_host_lock(self) -> bool:
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_file = fd
+        return True
+
+    def _release_host_lock(self) -> None:
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            os.close(self._lock_file)
+            self._lock_file = None
+
+
+profiler = Profiler()
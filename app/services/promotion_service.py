@@ -0,0 +1,89 @@
+import threading
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models.promotion import Promotion
+from app.db.schemas.pizza import PromotionCreate
+from app.services.notifications import listener, notify
+from app.services.promotions import PromotionIndex, PromotionRule
+
+
+def weekday_mask(weekdays: Optional[List[int]]) -> Optional[int]:
+    if not weekdays:
+        return None
+    mask = 0
+    for weekday in weekdays:
+        mask |= 1 << weekday
+    return mask
+
+
+class PromotionService:
+    _index = PromotionIndex()
+    _stale = True
+    _refresh_lock = threading.Lock()
+
+    @staticmethod
+    def get_index(db: Session) -> PromotionIndex:
+        if PromotionService._stale:
+            PromotionService.refresh(db)
+        return PromotionService._index
+
+    @staticmethod
+    def refresh(db: Session) -> int:
+        """Recompile the active rules; the old index keeps serving until the swap"""
+        with PromotionService._refresh_lock:
+            if not PromotionService._stale:
+                return len(PromotionService._index)
+            PromotionService._stale = False
+            try:
+                rules = [
+                    PromotionRule(
+                        id=promotion.id, name=promotion.name, kind=promotion.kind, value=promotion.value,
+                        pizza_id=promotion.pizza_id, size_id=promotion.size_id, topping_id=promotion.topping_id,
+                        weekdays=promotion.weekdays, start_time=promotion.start_time, end_time=promotion.end_time,
+                        starts_at=promotion.starts_at, ends_at=promotion.ends_at,
+                    )
+                    for promotion in db.query(Promotion).filter(Promotion.active.is_(True))
+                ]
+            except Exception:
+                PromotionService._stale = True
+                raise
+            PromotionService._index = PromotionIndex(rules)
+            return len(rules)
+
+    @staticmethod
+    def list_promotions(db: Session) -> List[Promotion]:
+        return db.query(Promotion).order_by(Promotion.created_at).all()
+
+    @staticmethod
+    def create_promotion(db: Session, data: PromotionCreate) -> Promotion:
+        promotion = Promotion(**data.model_dump(exclude={"weekdays"}), weekdays=weekday_mask(data.weekdays))
+        db.add(promotion)
+        notify(db, settings.PROMOTIONS_CHANNEL, None)
+        db.commit()
+        PromotionService.mark_stale()
+        db.refresh(promotion)
+        return promotion
+
+    @staticmethod
+    def deactivate_promotion(db: Session, promotion_id: UUID) -> Optional[Promotion]:
+        promotion = db.query(Promotion).filter(Promotion.id == promotion_id).first()
+        if not promotion:
+            return None
+        promotion.active = False
+        notify(db, settings.PROMOTIONS_CHANNEL, None)
+        db.commit()
+        PromotionService.mark_stale()
+        db.refresh(promotion)
+        return promotion
+
+    @staticmethod
+    def mark_stale(payload: object = None) -> None:
+        PromotionService._stale = True
+
+
+listener.add_handler(settings.PROMOTIONS_CHANNEL, PromotionService.mark_stale)
+listener.add_reconnect_handler(PromotionService.mark_stale)
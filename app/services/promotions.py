@@ -0,0 +1,101 @@
+from dataclasses import dataclass
+from datetime import datetime, time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from app.db.models.promotion import PromotionKind
+
+ALL_WEEKDAYS = 0b1111111
+
+BucketKey = Tuple[int, Optional[UUID], Optional[UUID], Optional[UUID]]
+# (days after the rule's weekday, start, end); None leaves that end of the day open
+Window = Tuple[int, Optional[time], Optional[time]]
+
+
+@dataclass(frozen=True)
+class PromotionRule:
+    id: UUID
+    name: str
+    kind: PromotionKind
+    value: float
+    pizza_id: Optional[UUID] = None
+    size_id: Optional[UUID] = None
+    topping_id: Optional[UUID] = None
+    weekdays: Optional[int] = None
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+
+    def runs_at(self, at: datetime) -> bool:
+        """Date range, weekday and time of day"""
+        if not self.in_date_range(at):
+            return False
+        weekdays = ALL_WEEKDAYS if self.weekdays is None else self.weekdays
+        now = at.time()
+        return any(
+            weekdays >> (at.weekday() - offset) % 7 & 1 and _within(now, start, end)
+            for offset, start, end in self.windows()
+        )
+
+    def in_date_range(self, at: datetime) -> bool:
+        if self.starts_at is not None and at < self.starts_at:
+            return False
+        return self.ends_at is None or at < self.ends_at
+
+    def windows(self) -> List[Window]:
+        """(days after the listed weekday, start, end) for each part of the time window.
+
+        Windows such as 22:00-02:00 wrap past midnight, so the part after
+        midnight belongs to the next day.
+        """
+        if self.start_time is not None and self.end_time is not None and self.start_time > self.end_time:
+            return [(0, self.start_time, None), (1, None, self.end_time)]
+        return [(0, self.start_time, self.end_time)]
+
+
+def _within(now: time, start: Optional[time], end: Optional[time]) -> bool:
+    return (start is None or now >= start) and (end is None or now < end)
+
+
+class PromotionIndex:
+    """Rules compiled into buckets keyed by (weekday, pizza, size, topping).
+
+    A rule without a condition on a dimension is filed under None for it, so
+    an order only has to look up its own pizza, size and toppings plus None
+    on each: 4 * (1 + toppings) dictionary probes whatever the rule count.
+    A time window running past midnight is split, with the part after
+    midnight filed under the following weekday.
+    """
+
+    def __init__(self, rules: Iterable[PromotionRule] = ()):
+        self._buckets: Dict[BucketKey, List[Tuple[PromotionRule, Optional[time], Optional[time]]]] = {}
+        self._count = 0
+        for rule in rules:
+            self._count += 1
+            weekdays = ALL_WEEKDAYS if rule.weekdays is None else rule.weekdays
+            for weekday in range(7):
+                if weekdays >> weekday & 1:
+                    for offset, start, end in rule.windows():
+                        key = ((weekday + offset) % 7, rule.pizza_id, rule.size_id, rule.topping_id)
+                        self._buckets.setdefault(key, []).append((rule, start, end))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def candidates(self, at: datetime, pizza_id: UUID, size_id: UUID,
+                   topping_ids: Sequence[UUID]) -> List[PromotionRule]:
+        weekday = at.weekday()
+        now = at.time()
+        buckets = self._buckets
+        found = []
+        for pizza in (pizza_id, None):
+            for size in (size_id, None):
+                for topping in (None, *topping_ids):
+                    bucket = buckets.get((weekday, pizza, size, topping))
+                    if bucket:
+                        found.extend(
+                            rule for rule, start, end in bucket
+                            if _within(now, start, end) and rule.in_date_range(at)
+                        )
+        return found
@@ -0,0 +1,245 @@
+"""Moving order buckets between shards while orders keep being taken.
+
+A move copies the bucket's orders, items and topping links to the target in
+keyset chunks along ix_orders_slot, repeating the copy until a pass finds
+little left to write. It then fences the bucket on the source: under a lock
+that waits for in-flight order writes, the source starts refusing writes in
+the bucket's slots (see app.db.models.order_shard). A last pass copies what
+landed before the fence, and the main database's map is flipped and
+announced, so workers route to the target from then on. A worker that missed
+the announcement is refused by the fence and reloads the map.
+
+The source keeps its copy until `purge_bucket` deletes it after a grace
+period. Order events are not moved: the log already delivered them from the
+source, and the bucket's later events are written on the target.
+"""
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection
+
+from app.db.backfill import Throttle, with_lock_retries
+from app.db.database.session import SessionLocal
+from app.db.models.order import Order
+from app.db.models.order_item import OrderItem
+from app.db.models.order_shard import FENCE_ORDERS_SQL, order_bucket_fences
+from app.db.models.order_toppings import order_toppings
+from app.services.order_shards import Shard, order_shards, order_slot, upsert
+
+orders = Order.__table__
+order_items = OrderItem.__table__
+
+# A pass writing no more rows than this is followed by the fence
+SETTLED_ROWS = 100
+MAX_PASSES = 5
+
+SLOT = func.order_slot(orders.c.id)
+PURGE_BATCH = text("""
+    WITH batch AS (
+        SELECT id FROM orders
+        WHERE order_slot(id) BETWEEN :first_slot AND :last_slot
+        ORDER BY order_slot(id), id
+        LIMIT :batch_size
+    ), toppings AS (
+        DELETE FROM order_toppings WHERE order_id IN (SELECT id FROM batch)
+    ), items AS (
+        DELETE FROM order_items WHERE order_id IN (SELECT id FROM batch)
+    )
+    DELETE FROM orders WHERE id IN (SELECT id FROM batch)
+""")
+FIRST_KEY = (-1, UUID(int=0))
+
+
+@dataclass
+class MoveReport:
+    bucket: int
+    source: int
+    target: int
+    orders: int = 0
+    passes: int = 0
+    rows_written: int = 0
+    # How long writes to the bucket were refused, from fence to announcement
+    fenced_seconds: float = 0.0
+    elapsed: float = 0.0
+
+
+def print_move(report: MoveReport) -> None:
+    print(
+        f"bucket {report.bucket}: shard {report.source} -> {report.target}, pass {report.passes}, "
+        f"{report.orders} orders, {report.rows_written} rows written"
+    )
+
+
+def copy_chunk(source: Connection, target: Connection, rows: list) -> int:
+    """Write a chunk of orders and their lines to the target, returning rows that changed there"""
+    ids = [row.id for row in rows]
+    items = source.execute(select(order_items).where(order_items.c.order_id.in_(ids))).all()
+    toppings = source.execute(select(order_toppings).where(order_toppings.c.order_id.in_(ids))).all()
+    return (
+        upsert(target, orders, [dict(row._mapping) for row in rows])
+        + upsert(target, order_items, [dict(row._mapping) for row in items])
+        + upsert(target, order_toppings, [dict(row._mapping) for row in toppings])
+    )
+
+
+def copy_bucket(source: Shard, target: Shard, bucket: int, throttle: Throttle, batch_size: int,
+                report: MoveReport) -> int:
+    """One pass over the bucket, returning rows written to the target"""
+    first_slot, last_slot = order_shards.slot_range(bucket)
+    after: Tuple[int, UUID] = FIRST_KEY
+    written = orders_seen = 0
+    while True:
+        with source.engine.connect() as conn:
+            throttle.wait(conn)
+
+        def chunk():
+            with source.engine.connect() as source_conn, target.engine.begin() as target_conn:
+                target_conn.execute(text(f"SET LOCAL lock_timeout = '{throttle.lock_timeout}'"))
+                rows = source_conn.execute(
+                    select(orders)
+                    .where(SLOT.between(first_slot, last_slot), tuple_(SLOT, orders.c.id) > after)
+                    .order_by(SLOT, orders.c.id)
+                    .limit(batch_size)
+                ).all()
+                return rows, copy_chunk(source_conn, target_conn, rows) if rows else 0
+
+        rows, chunk_written = with_lock_retries(throttle, chunk)
+        if not rows:
+            report.orders = orders_seen
+            return written
+        orders_seen += len(rows)
+        written += chunk_written
+        after = (order_slot(rows[-1].id), rows[-1].id)
+        time.sleep(throttle.pause)
+
+
+def fence_bucket(source: Shard, target: Shard, bucket: int, throttle: Throttle) -> None:
+    """Make the source refuse order writes in the bucket once writes already in flight commit"""
+    first_slot, last_slot = order_shards.slot_range(bucket)
+
+    def fence():
+        with source.engine.begin() as conn:
+            conn.execute(text(f"SET LOCAL lock_timeout = '{throttle.lock_timeout}'"))
+            # Conflicts with every order write, so the fence starts after the last one commits
+            conn.execute(text("LOCK TABLE orders IN SHARE ROW EXCLUSIVE MODE"))
+            for statement in FENCE_ORDERS_SQL:
+                conn.exec_driver_sql(statement)
+            statement = insert(order_bucket_fences).values(
+                first_slot=first_slot, last_slot=last_slot, moved_to=target.id
+            )
+            conn.execute(statement.on_conflict_do_update(
+                index_elements=[order_bucket_fences.c.first_slot],
+                set_={"last_slot": statement.excluded.last_slot, "moved_to": statement.excluded.moved_to,
+                      "fenced_at": func.now()},
+            ))
+
+    with_lock_retries(throttle, fence)
+
+
+def move_bucket(bucket: int, target_id: int, throttle: Optional[Throttle] = None, batch_size: int = 2000,
+                report: Callable[[MoveReport], None] = print_move) -> MoveReport:
+    """Move a bucket's orders to another shard without stopping order writes"""
+    throttle = throttle or Throttle()
+    order_shards.reload()
+    source = order_shards.shard(int(order_shards.owners()[bucket]))
+    target = order_shards.shard(target_id)
+    if source.id == target.id:
+        raise ValueError(f"Bucket {bucket} is already on shard {target_id}")
+    progress = MoveReport(bucket, source.id, target.id)
+    started = time.monotonic()
+
+    # The bucket may be coming back to a shard it once left
+    with target.engine.begin() as conn:
+        conn.execute(order_bucket_fences.delete().where(
+            order_bucket_fences.c.first_slot == order_shards.slot_range(bucket)[0]
+        ))
+    while True:
+        written = copy_bucket(source, target, bucket, throttle, batch_size, progress)
+        progress.passes += 1
+        progress.rows_written += written
+        report(progress)
+        if written <= SETTLED_ROWS or progress.passes >= MAX_PASSES:
+            break
+
+    fence_bucket(source, target, bucket, throttle)
+    fenced = time.monotonic()
+    progress.rows_written += copy_bucket(source, target, bucket, throttle, batch_size, progress)
+    progress.passes += 1
+    with SessionLocal() as db:
+        order_shards.announce(db, bucket, target.id)
+        db.commit()
+    order_shards.set_owner(bucket, target.id)
+    progress.fenced_seconds = time.monotonic() - fenced
+    progress.elapsed = time.monotonic() - started
+    report(progress)
+    return progress
+
+
+def purge_bucket(bucket: int, shard_id: int, grace_seconds: float, throttle: Optional[Throttle] = None,
+                 batch_size: int = 2000) -> int:
+    """Delete a moved bucket's orders from a shard it left at least `grace_seconds` ago"""
+    throttle = throttle or Throttle()
+    order_shards.reload()
+    if order_shards.owners()[bucket] == shard_id:
+        raise ValueError(f"Bucket {bucket} is still on shard {shard_id}")
+    first_slot, last_slot = order_shards.slot_range(bucket)
+    shard = order_shards.shard(shard_id)
+    with shard.engine.connect() as conn:
+        fenced_for = conn.execute(
+            select(func.extract("epoch", func.now() - order_bucket_fences.c.fenced_at))
+            .where(order_bucket_fences.c.first_slot == first_slot)
+        ).scalar()
+    if fenced_for is None:
+        raise ValueError(f"Bucket {bucket} is not fenced on shard {shard_id}")
+    if fenced_for < grace_seconds:
+        raise ValueError(f"Bucket {bucket} left shard {shard_id} {fenced_for:.0f}s ago, wait {grace_seconds:.0f}s")
+
+    deleted = 0
+    while True:
+        with shard.engine.connect() as conn:
+            throttle.wait(conn)
+
+        def chunk():
+            with shard.engine.begin() as conn:
+                conn.execute(text(f"SET LOCAL lock_timeout = '{throttle.lock_timeout}'"))
+                return conn.execute(PURGE_BATCH, {
+                    "first_slot": first_slot, "last_slot": last_slot, "batch_size": batch_size,
+                }).rowcount
+
+        batch = with_lock_retries(throttle, chunk)
+        if not batch:
+            return deleted
+        deleted += batch
+        time.sleep(throttle.pause)
+
+
+def plan_rebalance(owners: np.ndarray, shard_count: int) -> List[Tuple[int, int, int]]:
+    """(bucket, source, target) moves that even out buckets per shard, moving as few as possible"""
+    counts = np.bincount(owners, minlength=shard_count)
+    # Shards already holding the most keep the odd buckets left over
+    quota = np.full(shard_count, len(owners) // shard_count)
+    quota[np.argsort(-counts, kind="stable")[:len(owners) % shard_count]] += 1
+
+    surplus: List[int] = []
+    for shard_id in range(shard_count):
+        extra = int(counts[shard_id] - quota[shard_id])
+        if extra > 0:
+            surplus.extend(int(bucket) for bucket in np.flatnonzero(owners == shard_id)[-extra:])
+    moves = []
+    for shard_id in range(shard_count):
+        for _ in range(int(quota[shard_id] - counts[shard_id])):
+            bucket = surplus.pop()
+            moves.append((bucket, int(owners[bucket]), shard_id))
+    return moves
+
+
+def shard_status() -> List[Tuple[int, int]]:
+    """(shard, buckets) for every shard, from the main database's map"""
+    order_shards.reload()
+    counts = np.bincount(order_shards.owners(), minlength=len(order_shards.shards))
+    return [(shard.id, int(counts[shard.id])) for shard in order_shards.shards]
@@ -0,0 +1,146 @@
+from collections import namedtuple
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import List
+
+from app.db.backfill import Backfill, Throttle, dry_run, run_backfill
+
+
+def test_chunk_query_resumes_after_the_last_key() -> None:
+    backfill = Backfill("orders.x", "orders", "x IS NULL", apply=lambda conn, rows: 0, columns=("phone_number",))
+    assert str(backfill.chunk_query(False)) == (
+        "SELECT id, phone_number FROM orders WHERE (x IS NULL) ORDER BY id LIMIT :batch_size"
+    )
+    assert "AND id > CAST(:after AS uuid) ORDER BY id" in str(backfill.chunk_query(True))
+
+
+def test_batch_size_follows_the_target_duration() -> None:
+    throttle = Throttle(target_seconds=0.5, min_batch_size=100, max_batch_size=10000)
+    assert throttle.next_batch_size(1000, 1.0) == 500
+    # Growth is capped at double per chunk, and sizes stay within bounds
+    assert throttle.next_batch_size(1000, 0.01) == 2000
+    assert throttle.next_batch_size(8000, 0.01) == 10000
+    assert throttle.next_batch_size(150, 5.0) == 100
+
+
+Item = namedtuple("Item", "id")
+
+
+class Result:
+    def __init__(self, rows=(), scalar=None):
+        self.rows = list(rows)
+        self._scalar = scalar
+
+    def all(self):
+        return self.rows
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def scalar(self):
+        return self._scalar
+
+
+class FakeConnection:
+    """Runs a backfill's statements against `FakeEngine.values`, a dict of id to value"""
+
+    def __init__(self, engine: "FakeEngine"):
+        self.engine = engine
+        self.values = dict(engine.values)
+        self.checkpoint = engine.checkpoint
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def begin(self):
+        return self
+
+    def commit(self):
+        self.engine.values, self.engine.checkpoint = self.values, self.checkpoint
+
+    def rollback(self):
+        self.values, self.checkpoint = dict(self.engine.values), self.engine.checkpoint
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        if sql.startswith("EXPLAIN"):
+            return Result(scalar=[{"Plan": {"Plan Rows": sum(value is None for value in self.values.values())}}])
+        if "backfill_checkpoints" in sql and sql.startswith("SELECT"):
+            return Result([self.checkpoint] if self.checkpoint else [])
+        if "backfill_checkpoints" in sql:
+            values = statement.compile().params
+            self.checkpoint = SimpleNamespace(
+                last_key=values["last_key"], rows_updated=values["rows_updated"],
+                finished_at=None if "finished_at" in values else "now",
+            )
+            return Result()
+        if sql.startswith("SELECT"):
+            after = int(params["after"]) if params["after"] is not None else -1
+            todo = sorted(key for key, value in self.values.items() if value is None and key > after)
+            return Result(Item(key) for key in todo[:params["batch_size"]])
+        return Result()
+
+
+class FakeEngine:
+    def __init__(self, rows: int, checkpoint=None):
+        self.values = dict.fromkeys(range(rows))
+        self.checkpoint = checkpoint
+        self.updates: List[int] = []
+
+    def connect(self):
+        return FakeConnection(self)
+
+    @contextmanager
+    def begin(self):
+        conn = FakeConnection(self)
+        yield conn
+        conn.commit()
+
+
+def fill(conn: FakeConnection, rows) -> int:
+    for row in rows:
+        conn.values[row.id] = "filled"
+    conn.engine.updates.extend(row.id for row in rows)
+    return len(rows)
+
+
+BACKFILL = Backfill("items.value", "items", "value IS NULL", apply=fill, key_type="integer")
+THROTTLE = Throttle(pause=0, max_replication_lag=None, min_batch_size=2, max_batch_size=2)
+
+
+def test_run_backfill_checkpoints_every_chunk_and_finishes() -> None:
+    engine = FakeEngine(5)
+    reports = []
+    progress = run_backfill(engine, BACKFILL, THROTTLE, batch_size=2, report=reports.append)
+    assert progress.rows_updated == 5 and progress.chunks == 3 and len(reports) == 3
+    assert all(value == "filled" for value in engine.values.values())
+    assert engine.checkpoint.last_key == "4" and engine.checkpoint.finished_at is not None
+
+
+def test_run_backfill_resumes_after_its_checkpoint() -> None:
+    checkpoint = SimpleNamespace(last_key="2", rows_updated=3, finished_at=None)
+    engine = FakeEngine(5, checkpoint)
+    progress = run_backfill(engine, BACKFILL, THROTTLE, batch_size=2, report=lambda progress: None)
+    assert engine.updates == [3, 4]
+    assert progress.rows_updated == 5 and engine.checkpoint.rows_updated == 5
+
+
+def test_a_finished_backfill_only_runs_again_on_restart() -> None:
+    checkpoint = SimpleNamespace(last_key="4", rows_updated=5, finished_at="earlier")
+    engine = FakeEngine(3, checkpoint)
+    assert run_backfill(engine, BACKFILL, THROTTLE).rows_updated == 5
+    assert engine.updates == []
+
+    progress = run_backfill(engine, BACKFILL, THROTTLE, batch_size=2, restart=True, report=lambda progress: None)
+    assert engine.updates == [0, 1, 2] and progress.rows_updated == 3
+
+
+def test_dry_run_rolls_back_its_sample() -> None:
+    engine = FakeEngine(10)
+    estimate = dry_run(engine, BACKFILL, THROTTLE, batch_size=2, sample_chunks=3)
+    assert estimate.estimated_rows == 10 and estimate.sampled_rows == 6
+    assert engine.updates == [0, 1, 2, 3, 4, 5]
+    assert all(value is None for value in engine.values.values()) and engine.checkpoint is None
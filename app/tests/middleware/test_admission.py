@@ -0,0 +1,99 @@
+import asyncio
+from typing import Optional
+
+import pytest
+
+from app.config.config import settings
+from app.middleware.admission import (
+    ROUTE_CLASSES,
+    AdmissionControlMiddleware,
+    AdmissionController,
+    ClientRateLimiter,
+    Overloaded,
+    RouteClass,
+    classify,
+)
+
+
+def make_controller(capacity: int = 2, utilisation: float = 0.0, menu_shed: Optional[float] = 0.75) -> AdmissionController:
+    route_classes = {
+        "checkout": RouteClass("checkout", priority=0, max_concurrency=2, max_queue=5, rate=1, burst=1),
+        "menu": RouteClass("menu", priority=3, max_concurrency=2, max_queue=5, rate=1, burst=1,
+                           shed_utilisation=menu_shed),
+    }
+    return AdmissionController(
+        route_classes, capacity=capacity, queue_timeout=0.5, retry_after=1,
+        pool_utilisation=lambda: utilisation,
+    )
+
+
+def test_classify() -> None:
+    assert classify("POST", f"{settings.API_V1_STR}/checkout/abc/") == "checkout"
+    assert classify("POST", f"{settings.API_V1_STR}/orders/") == "order_create"
+    assert classify("POST", f"{settings.API_V1_STR}/orders/cart/") == "order_create"
+    assert classify("GET", f"{settings.API_V1_STR}/pizzas/") == "menu"
+    assert classify("GET", f"{settings.API_V1_STR}/orders/abc/") == "other"
+    assert classify("GET", f"{settings.API_V1_STR}/orders/abc/events") is None
+    assert classify("GET", f"{settings.API_V1_STR}/order-log/pos/") is None
+
+
+def test_route_classes_come_from_settings() -> None:
+    assert set(ROUTE_CLASSES) == {"checkout", "order_create", "other", "menu"}
+    assert ROUTE_CLASSES["checkout"].shed_utilisation is None
+    assert isinstance(ROUTE_CLASSES["menu"].max_queue, int)
+
+
+def test_client_key_header_needs_a_trusted_proxy(monkeypatch) -> None:
+    scope = {"headers": [(b"x-client-key", b"key-1")], "client": ("10.0.0.1", 1234)}
+    assert AdmissionControlMiddleware._client_key(scope) == "10.0.0.1"
+    monkeypatch.setattr(settings, "ADMISSION_TRUST_CLIENT_KEY_HEADER", True)
+    assert AdmissionControlMiddleware._client_key(scope) == "key-1"
+
+
+def test_token_bucket_refills() -> None:
+    now = [0.0]
+    limiter = ClientRateLimiter(clock=lambda: now[0])
+    route_class = RouteClass("menu", priority=3, max_concurrency=1, max_queue=1, rate=2, burst=2)
+    assert limiter.check("client", route_class) == 0
+    assert limiter.check("client", route_class) == 0
+    assert limiter.check("client", route_class) == pytest.approx(0.5)
+    assert limiter.check("other-client", route_class) == 0
+    now[0] = 0.5
+    assert limiter.check("client", route_class) == 0
+
+
+def test_sheds_browsing_under_pool_pressure() -> None:
+    controller = make_controller(utilisation=0.8)
+
+    async def scenario() -> None:
+        with pytest.raises(Overloaded):
+            await controller.acquire("menu")
+        await controller.acquire("checkout")
+        controller.release("checkout")
+
+    asyncio.run(scenario())
+    assert controller.stats["menu"]["shed"] == 1
+    assert controller.stats["checkout"]["admitted"] == 1
+
+
+def test_checkout_is_admitted_before_queued_browsing() -> None:
+    controller = make_controller(capacity=1, menu_shed=None)
+    order = []
+
+    async def request(name: str) -> None:
+        await controller.acquire(name)
+        order.append(name)
+        await asyncio.sleep(0.01)
+        controller.release(name)
+
+    async def scenario() -> None:
+        await controller.acquire("menu")
+        menu = asyncio.create_task(request("menu"))
+        await asyncio.sleep(0)
+        checkout = asyncio.create_task(request("checkout"))
+        await asyncio.sleep(0)
+        controller.release("menu")
+        await asyncio.gather(menu, checkout)
+
+    asyncio.run(scenario())
+    assert order == ["checkout", "menu"]
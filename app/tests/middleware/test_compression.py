@@ -0,0 +1,89 @@
+import asyncio
+import gzip
+import zlib
+from typing import List, Optional
+
+from app.config.config import settings
+from app.middleware.compression import CODECS, CompressionMiddleware, negotiate
+from app.tools.cache import LRUCache
+
+GZIP = next(codec for codec in CODECS if codec.name == "gzip")
+
+
+def make_app(chunks: List[bytes], content_type: str = "application/json"):
+    async def app(scope, receive, send):
+        headers = [(b"content-type", content_type.encode())]
+        if len(chunks) == 1:
+            headers.append((b"content-length", str(len(chunks[0])).encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+
+    return app
+
+
+def call(app, path: str = "/orders/", accept_encoding: str = "gzip", cache: Optional[LRUCache] = None):
+    cache = LRUCache(maxsize=8) if cache is None else cache
+    middleware = CompressionMiddleware(app, minimum_size=100, codecs=[GZIP], cache=cache)
+    scope = {
+        "type": "http", "method": "GET", "path": f"{settings.API_V1_STR}{path}",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    }
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, None, send))
+    headers = {key.decode(): value.decode() for key, value in messages[0]["headers"]}
+    return headers, [message["body"] for message in messages[1:]]
+
+
+def test_negotiate() -> None:
+    assert negotiate("gzip, deflate", [GZIP]) is GZIP
+    assert negotiate("gzip;q=0", [GZIP]) is None
+    assert negotiate("*", [GZIP]) is GZIP
+    assert negotiate("identity", [GZIP]) is None
+
+
+def test_compresses_large_responses_only() -> None:
+    payload = b'{"items": [' + b'{"name": "Margherita"},' * 50 + b"]}"
+    headers, body = call(make_app([payload]))
+    assert headers["content-encoding"] == "gzip"
+    assert headers["content-length"] == str(len(body[0]))
+    assert headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(body[0]) == payload
+
+    headers, body = call(make_app([b'{"ok": true}']))
+    assert "content-encoding" not in headers
+    assert body == [b'{"ok": true}']
+
+    headers, body = call(make_app([payload], content_type="image/png"))
+    assert "content-encoding" not in headers
+
+
+def test_streams_are_flushed_per_chunk() -> None:
+    chunks = [b"data: one\n\n", b"data: two\n\n", b""]
+    headers, body = call(make_app(chunks, content_type="text/event-stream"))
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    decompressor = zlib.decompressobj(31)
+    # Each event can be decoded as soon as it arrives
+    assert decompressor.decompress(body[0]) == chunks[0]
+    assert decompressor.decompress(body[1]) == chunks[1]
+    decompressor.decompress(body[2])
+    assert decompressor.eof
+
+
+def test_menu_responses_reuse_stored_variants() -> None:
+    payload = b'[' + b'{"name": "Pepperoni"},' * 50 + b"]"
+    cache = LRUCache(maxsize=8)
+    call(make_app([payload]), path="/pizzas/", cache=cache)
+    assert len(cache) == 1
+    _, body = call(make_app([payload]), path="/pizzas/", cache=cache)
+    assert len(cache) == 1
+    assert gzip.decompress(body[0]) == payload
+    call(make_app([payload]), path="/orders/", cache=cache)
+    # Search results are one-offs, so they are compressed at the dynamic level and not stored
+    call(make_app([payload]), path="/menu/search", cache=cache)
+    assert len(cache) == 1
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import logging
+import time
+from typing import List
+
+from app.log_config import DebugSampler, JsonFormatter, build_pipeline, request_id
+from app.middleware.request_id import RequestIdMiddleware
+
+logger = logging.getLogger("app.tests.request_id")
+
+
+class ListSink(logging.Handler):
+    def __init__(self, delay: float = 0.0):
+        super().__init__()
+        self.delay = delay
+        self.lines: List[dict] = []
+        self.setFormatter(JsonFormatter())
+
+    def emit(self, record: logging.LogRecord) -> None:
+        time.sleep(self.delay)
+        self.lines.append(json.loads(self.format(record)))
+
+
+def call(headers: list) -> dict:
+    async def app(scope, receive, send):
+        logger.warning("handling %s", scope["path"], extra={"table": "orders"})
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/orders/", "headers": headers}
+    asyncio.run(RequestIdMiddleware(app, header="X-Request-ID", access_log=False)(scope, None, send))
+    return {key.decode(): value.decode() for key, value in messages[0]["headers"]}
+
+
+def test_records_carry_the_request_id() -> None:
+    sink = ListSink()
+    handler, writer = build_pipeline(sink, queue_size=100, debug_sample_rate=1.0)
+    logger.addHandler(handler)
+    writer.start()
+    try:
+        generated = call([])["x-request-id"]
+        assert call([(b"x-request-id", b"edge-42")])["x-request-id"] == "edge-42"
+        assert call([(b"x-request-id", b"bad id\n")])["x-request-id"] != "bad id\n"
+    finally:
+        logger.removeHandler(handler)
+        writer.stop()
+    assert [line["request_id"] for line in sink.lines[:2]] == [generated, "edge-42"]
+    assert sink.lines[0]["message"] == "handling /orders/"
+    assert sink.lines[0]["table"] == "orders"
+    assert request_id.get() is None
+
+
+def test_slow_sink_never_blocks_callers() -> None:
+    sink = ListSink(delay=0.05)
+    handler, writer = build_pipeline(sink, queue_size=10, debug_sample_rate=1.0)
+    logger.addHandler(handler)
+    writer.start()
+    try:
+        started = time.perf_counter()
+        for index in range(50):
+            logger.warning("record %d", index)
+        elapsed = time.perf_counter() - started
+    finally:
+        logger.removeHandler(handler)
+        writer.stop()
+    # Waiting on the sink would cost one delay for each of the 40 records that overflow the queue
+    assert elapsed < sink.delay * 10
+    assert handler.dropped > 0
+    assert sink.lines[-1]["message"].startswith("record")
+    assert any(line.get("dropped") for line in sink.lines)
+
+
+def test_debug_sampling_is_decided_per_request() -> None:
+    sampler = DebugSampler(0.5)
+    debug = logging.makeLogRecord({"levelno": logging.DEBUG})
+    kept = 0
+    for index in range(200):
+        token = request_id.set(f"request-{index}")
+        decisions = {sampler.filter(debug) for _ in range(5)}
+        request_id.reset(token)
+        assert len(decisions) == 1
+        kept += decisions.pop()
+    assert 60 < kept < 140
+    assert sampler.filter(logging.makeLogRecord({"levelno": logging.INFO}))
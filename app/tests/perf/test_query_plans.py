@@ -0,0 +1,197 @@
+"""Query-plan regression checks for the service layer.
+
+Each scenario drives a service method against a seeded scratch database,
+captures the SQL it issues and runs EXPLAIN on every statement. A test fails
+when a statement gains a sequential scan or its estimated cost grows beyond
+the tolerance over `query_plan_baseline.json`.
+
+The harness drops and recreates every table, so it only runs when
+QUERY_PLAN_DATABASE_URI points at a scratch database:
+
+    QUERY_PLAN_DATABASE_URI=postgresql+psycopg://postgres@localhost/pizza_plans pytest app/tests/perf
+
+Set UPDATE_QUERY_PLAN_BASELINE=1 to rewrite the baseline after an intended change.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, Generator, List, Tuple
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db.database.base import Base
+from app.db.schemas.pizza import CartItem, CartOrderCreate, DeliveryDetails
+from app.services.checkout_service import CheckoutService
+from app.services.customer_service import CustomerService, customer_orders_cache
+from app.services.dispatch_service import DispatchService
+from app.services.kitchen_service import KitchenService
+from app.services.order_log import OrderLogService
+from app.services.pizza_service import PizzaService
+from app.services.promotion_service import PromotionService
+
+DATABASE_URI = os.environ.get("QUERY_PLAN_DATABASE_URI")
+UPDATE_BASELINE = os.environ.get("UPDATE_QUERY_PLAN_BASELINE") == "1"
+BASELINE_PATH = Path(__file__).with_name("query_plan_baseline.json")
+COST_TOLERANCE = float(os.environ.get("QUERY_PLAN_COST_TOLERANCE", "0.25"))
+SEED_ORDERS = 100_000
+
+pytestmark = pytest.mark.skipif(not DATABASE_URI, reason="QUERY_PLAN_DATABASE_URI is not set")
+
+SEED_SQL = [
+    """INSERT INTO sizes (id, name, multiplier)
+       SELECT gen_random_uuid(), 'Size ' || g, 1 + g * 0.5 FROM generate_series(0, 2) g""",
+    """INSERT INTO pizzas (id, name, description, base_price)
+       SELECT gen_random_uuid(), 'Pizza ' || g, 'Description ' || g, 8 + g % 7 FROM generate_series(1, 50) g""",
+    """INSERT INTO toppings (id, name, price)
+       SELECT gen_random_uuid(), 'Topping ' || g, 0.5 + g % 4 FROM generate_series(1, 30) g""",
+    """INSERT INTO orders (id, customer_name, phone_number, phone_e164, address, pizza_id, size_id,
+                           payment_method, total_price, status, created_at)
+       SELECT gen_random_uuid(), 'Customer ' || g, '+1555' || lpad((g % 20000)::text, 7, '0'),
+              '+1555' || lpad((g % 20000)::text, 7, '0'), g || ' Main St', p.ids[1 + g % 50], s.ids[1 + g % 3], 'CASH', 12.5,
+              (CASE g % 100 WHEN 0 THEN 'CONFIRMED' WHEN 1 THEN 'READY' ELSE 'DELIVERED' END)::orderstatus,
+              now() - make_interval(secs => g * 30)
+       FROM generate_series(1, :orders) g,
+            (SELECT array_agg(id ORDER BY name) AS ids FROM pizzas) p,
+            (SELECT array_agg(id ORDER BY name) AS ids FROM sizes) s""",
+    """INSERT INTO order_toppings (order_id, topping_id)
+       SELECT o.id, t.ids[1 + (abs(hashtext(o.id::text)) + k * 7) % 30]
+       FROM orders o, generate_series(0, 1) k, (SELECT array_agg(id ORDER BY name) AS ids FROM toppings) t""",
+    """INSERT INTO order_items (id, order_id, position, pizza_id, size_id, topping_ids, quantity, unit_price, total_price)
+       SELECT gen_random_uuid(), o.id, 0, o.pizza_id, o.size_id, array_agg(ot.topping_id), 1, 12.5, 12.5
+       FROM orders o JOIN order_toppings ot ON ot.order_id = o.id GROUP BY o.id""",
+    """INSERT INTO order_events (txid, order_id, event_type, payload)
+       SELECT 1000 + row_number() OVER (ORDER BY created_at), id, 'created', '{}'::jsonb FROM orders""",
+]
+
+Sample = Dict[str, object]
+
+SCENARIOS: Dict[str, Callable[[Session, Sample], object]] = {
+    "menu.pizzas": lambda db, sample: PizzaService.get_all_pizzas(db),
+    "menu.sizes": lambda db, sample: PizzaService.get_all_sizes(db),
+    "menu.toppings": lambda db, sample: PizzaService.get_all_toppings(db),
+    "orders.get": lambda db, sample: PizzaService.get_order(db, sample["order_id"]),
+    "checkout.process": lambda db, sample: CheckoutService.process_checkout(db, sample["pending_order_id"], DeliveryDetails(
+        name="Plan", address="1 Main St", phone="+15550000000", email=None,
+        payment_method="cash", special_instructions=None, latitude=0.0, longitude=0.0,
+    )),
+    "customers.orders": lambda db, sample: (
+        customer_orders_cache.clear(), CustomerService.get_orders(db, sample["phone_e164"], 20)
+    ),
+    "orders.create_cart": lambda db, sample: (
+        PromotionService.mark_stale(), PizzaService.create_cart_order(db, CartOrderCreate(
+            customer_name="Plan", phone_number="+15550000000", address="1 Main St", payment_method="cash",
+            items=[CartItem(pizza_id=sample["pizza_id"], size_id=sample["size_id"], topping_ids=sample["topping_ids"],
+                            quantity=quantity) for quantity in (1, 2, 3)],
+        ))
+    ),
+    "kitchen.load_pending": lambda db, sample: KitchenService.load_pending(db),
+    "dispatch.load_pending": lambda db, sample: DispatchService.load_pending(db),
+    "order_log.read": lambda db, sample: OrderLogService.read(db, {0: sample["log_position"]}, 1000),
+}
+
+
+@pytest.fixture(scope="module")
+def plan_connection() -> Generator[Connection, None, None]:
+    engine = create_engine(DATABASE_URI)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for statement in SEED_SQL:
+            conn.execute(text(statement), {"orders": SEED_ORDERS})
+        conn.execute(text("UPDATE orders SET status = 'PENDING' WHERE id = (SELECT id FROM orders ORDER BY created_at LIMIT 1)"))
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+    with engine.connect() as conn:
+        yield conn
+    engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def sample(plan_connection: Connection) -> Sample:
+    with plan_connection.begin():
+        return {
+            "order_id": plan_connection.execute(
+                text("SELECT id FROM orders ORDER BY created_at DESC LIMIT 1")
+            ).scalar(),
+            "pending_order_id": plan_connection.execute(
+                text("SELECT id FROM orders WHERE status = 'PENDING'")
+            ).scalar(),
+            "phone_e164": plan_connection.execute(
+                text("SELECT phone_e164 FROM orders ORDER BY created_at DESC LIMIT 1")
+            ).scalar(),
+            "pizza_id": plan_connection.execute(text("SELECT id FROM pizzas ORDER BY name LIMIT 1")).scalar(),
+            "size_id": plan_connection.execute(text("SELECT id FROM sizes ORDER BY name LIMIT 1")).scalar(),
+            "topping_ids": plan_connection.execute(text("SELECT id FROM toppings ORDER BY name LIMIT 2")).scalars().all(),
+            "log_position": tuple(plan_connection.execute(
+                text("SELECT txid, seq FROM order_events ORDER BY txid, seq OFFSET :offset LIMIT 1"),
+                {"offset": SEED_ORDERS // 2},
+            ).one()),
+        }
+
+
+def capture_statements(conn: Connection, scenario: Callable[[Session, Sample], object],
+                       sample: Sample) -> List[Tuple[str, object]]:
+    """Run a scenario inside a transaction that is always rolled back, recording its SQL"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(("SAVEPOINT", "RELEASE", "ROLLBACK")):
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+    transaction = conn.begin()
+    event.listen(conn, "before_cursor_execute", record)
+    try:
+        with Session(bind=conn, join_transaction_mode="create_savepoint") as db:
+            scenario(db, sample)
+    finally:
+        event.remove(conn, "before_cursor_execute", record)
+    try:
+        return [(statement, explain(conn, statement, parameters)) for statement, parameters in statements]
+    finally:
+        transaction.rollback()
+
+
+def explain(conn: Connection, statement: str, parameters: object) -> dict:
+    plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()[0]["Plan"]
+    seq_scans = set()
+    nodes = [plan]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan":
+            seq_scans.add(node["Relation Name"])
+        nodes.extend(node.get("Plans", ()))
+    return {"cost": plan["Total Cost"], "seq_scans": sorted(seq_scans)}
+
+
+def load_baseline() -> dict:
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text())
+    return {}
+
+
+@pytest.mark.parametrize("name", sorted(SCENARIOS))
+def test_query_plan(name: str, plan_connection: Connection, sample: Sample) -> None:
+    summaries = capture_statements(plan_connection, SCENARIOS[name], sample)
+    assert summaries, f"{name} issued no SQL"
+
+    baseline = load_baseline()
+    if UPDATE_BASELINE:
+        baseline[name] = [{"sql": statement, **summary} for statement, summary in summaries]
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        return
+
+    expected = baseline.get(name)
+    assert expected is not None, f"No baseline for {name}; run with UPDATE_QUERY_PLAN_BASELINE=1"
+    assert len(summaries) == len(expected), (
+        f"{name} now issues {len(summaries)} statements, baseline has {len(expected)}"
+    )
+    for (statement, summary), previous in zip(summaries, expected):
+        new_scans = set(summary["seq_scans"]) - set(previous["seq_scans"])
+        assert not new_scans, f"{name}: new sequential scan on {sorted(new_scans)} in\n{statement}"
+        limit = previous["cost"] * (1 + COST_TOLERANCE)
+        assert summary["cost"] <= limit, (
+            f"{name}: estimated cost {summary['cost']} exceeds baseline {previous['cost']} in\n{statement}"
+        )
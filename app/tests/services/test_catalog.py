@@ -0,0 +1,35 @@
+import pytest
+
+from app.services.catalog_service import UPSERTS, CatalogService
+
+
+def test_parse_csv_groups_items_by_type() -> None:
+    catalog = CatalogService.parse_csv(
+        "type,name,description,base_price,image,multiplier,price,icon\n"
+        "pizza, Diavola ,Spicy salami,12.5,,,,\n"
+        "Size,Family,,,,2.5,,\n"
+        "topping,Capers,,,,,0.75,\n"
+    )
+    assert [(pizza.name, pizza.description, pizza.base_price, pizza.image) for pizza in catalog.pizzas] == [
+        ("Diavola", "Spicy salami", 12.5, None)
+    ]
+    assert [(size.name, size.multiplier) for size in catalog.sizes] == [("Family", 2.5)]
+    assert [(topping.name, topping.price, topping.icon) for topping in catalog.toppings] == [("Capers", 0.75, None)]
+
+
+def test_parse_csv_reports_the_bad_line() -> None:
+    with pytest.raises(ValueError, match="Line 3"):
+        CatalogService.parse_csv("type,name,price\ntopping,Capers,0.75\ntopping,Olives,-1\n")
+    with pytest.raises(ValueError, match="unknown type 'drink'"):
+        CatalogService.parse_csv("type,name,price\ndrink,Cola,2\n")
+    with pytest.raises(ValueError, match="missing columns: type"):
+        CatalogService.parse_csv("name,price\nCapers,0.75\n")
+
+
+def test_upsert_keeps_optional_columns_left_empty() -> None:
+    statement = str(UPSERTS["pizzas"])
+    assert "description = COALESCE(excluded.description, pizzas.description)" in statement
+    assert "image = COALESCE(excluded.image, pizzas.image)" in statement
+    # Required columns are always set from the import
+    assert "base_price = excluded.base_price" in statement
+    assert "icon = COALESCE(excluded.icon, toppings.icon)" in str(UPSERTS["toppings"])
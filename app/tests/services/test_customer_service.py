@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.db.schemas.pizza import CustomerOrdersResponse
+from app.services import customer_service
+from app.services.customer_service import CustomerService, customer_orders_cache, decode_cursor, encode_cursor
+
+PHONE = "+15550100199"
+
+
+def test_cursor_round_trips() -> None:
+    created_at, order_id = datetime(2024, 5, 1, 18, 30, 15, 250000, tzinfo=timezone.utc), uuid4()
+    assert decode_cursor(encode_cursor(created_at, order_id)) == (created_at, order_id)
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(created_at, order_id)[:-4] + "AAAA")
+
+
+class OneShard:
+    """Answers every customer lookup with the same rows, newest first"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def customer_shards(self, phone_e164):
+        return []
+
+    def map_shards(self, fn, db, shards):
+        return [self.rows]
+
+
+def test_caching_a_page_leaves_the_cached_pages_alone(monkeypatch) -> None:
+    start = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    rows = [(start - timedelta(minutes=n), uuid4(), None) for n in range(3)]
+    monkeypatch.setattr(customer_service, "order_shards", OneShard(rows))
+    customer_orders_cache.clear()
+    monkeypatch.setattr(customer_service, "CustomerOrdersResponse", CustomerOrdersResponse.model_construct)
+
+    first = CustomerService.get_orders(None, PHONE, limit=2)
+    assert first.next_cursor == encode_cursor(*rows[1][:2])
+    pages = customer_orders_cache.get(PHONE)
+    second = CustomerService.get_orders(None, PHONE, limit=2, cursor=first.next_cursor)
+    assert list(pages) == [(None, 2)]
+    assert set(customer_orders_cache.get(PHONE)) == {(None, 2), (first.next_cursor, 2)}
+    assert CustomerService.get_orders(None, PHONE, limit=2, cursor=first.next_cursor) is second
+
+    CustomerService.invalidate(PHONE)
+    assert customer_orders_cache.get(PHONE) is None
+
+
+def test_a_lookup_racing_an_invalidation_is_not_stored(monkeypatch) -> None:
+    rows = [(datetime(2024, 5, 1, tzinfo=timezone.utc), uuid4(), None)]
+    shards = OneShard(rows)
+    monkeypatch.setattr(customer_service, "order_shards", shards)
+    monkeypatch.setattr(customer_service, "CustomerOrdersResponse", CustomerOrdersResponse.model_construct)
+    customer_orders_cache.clear()
+
+    def read_while_another_worker_writes(fn, db, shards_to_read):
+        # Arrives through the listener from whichever worker wrote the order
+        CustomerService.handle_notification({"phone_e164": PHONE})
+        return [rows]
+
+    monkeypatch.setattr(shards, "map_shards", read_while_another_worker_writes)
+    CustomerService.get_orders(None, PHONE, limit=2)
+    assert customer_orders_cache.get(PHONE) is None
+
+    monkeypatch.setattr(shards, "map_shards", lambda fn, db, shards_to_read: [rows])
+    CustomerService.get_orders(None, PHONE, limit=2)
+    assert customer_orders_cache.get(PHONE) is not None
+    CustomerService.handle_reconnect()
+    assert customer_orders_cache.get(PHONE) is None
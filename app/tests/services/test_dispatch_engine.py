@@ -0,0 +1,150 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.services import dispatch_service
+from app.services.dispatch_engine import DispatchEngine, GridIndex, PendingDelivery, distance_km
+from app.services.dispatch_service import DispatchService
+
+DEPOT = (52.52, 13.40)
+# About 1.1 km per 0.01 degrees of latitude
+NEAR = (52.53, 13.40)
+NEARBY = (52.531, 13.401)
+FAR = (52.70, 13.40)
+
+
+def delivery(latitude: float, longitude: float) -> PendingDelivery:
+    return PendingDelivery(uuid4(), latitude, longitude, ready_at=0.0, deadline=2700.0)
+
+
+def test_grid_index_finds_deliveries_within_the_radius_nearest_first() -> None:
+    index = GridIndex(cell_km=1.0, reference_latitude=DEPOT[0])
+    near, nearby, far = delivery(*NEAR), delivery(*NEARBY), delivery(*FAR)
+    for pending in (far, nearby, near):
+        index.insert(pending)
+    found = index.within(*NEAR, radius_km=3.0)
+    assert [pending for _, pending in found] == [near, nearby]
+    assert found[1][0] == pytest.approx(distance_km(*NEAR, *NEARBY))
+
+    index.remove(nearby.order_id)
+    index.remove(nearby.order_id)
+    assert [pending for _, pending in index.within(*NEAR, radius_km=3.0)] == [near]
+    assert len(index) == 2
+
+
+def test_grid_index_moves_a_reinserted_delivery() -> None:
+    index = GridIndex(cell_km=1.0, reference_latitude=DEPOT[0])
+    pending = delivery(*NEAR)
+    index.insert(pending)
+    index.insert(PendingDelivery(pending.order_id, *FAR, ready_at=0.0, deadline=2700.0))
+    assert index.within(*NEAR, radius_km=3.0) == []
+    assert len(index) == 1
+
+
+def engine() -> DispatchEngine:
+    return DispatchEngine(depot=DEPOT, batch_radius_km=3.0, window_minutes=15, max_delivery_minutes=45)
+
+
+def test_next_batch_groups_nearby_orders_up_to_capacity() -> None:
+    dispatch = engine()
+    near, nearby, far = uuid4(), uuid4(), uuid4()
+    dispatch.add(near, *NEAR, ready_at=0.0)
+    dispatch.add(nearby, *NEARBY, ready_at=0.0)
+    dispatch.add(far, *FAR, ready_at=0.0)
+
+    run = dispatch.next_batch(capacity=2, now=0.0)
+    assert {stop.order_id for stop in run.stops} == {near, nearby}
+    assert [stop.eta for stop in run.stops] == sorted(stop.eta for stop in run.stops)
+    assert [stop.order_id for stop in dispatch.next_batch(capacity=2, now=0.0).stops] == [far]
+    assert dispatch.next_batch(capacity=2, now=0.0).stops == []
+
+
+def test_restore_puts_a_run_back_with_its_deadlines() -> None:
+    dispatch = engine()
+    first, second = uuid4(), uuid4()
+    dispatch.add(first, *NEAR, ready_at=0.0)
+    dispatch.add(second, *FAR, ready_at=600.0)
+    run = dispatch.next_batch(capacity=1, now=0.0)
+    assert len(dispatch) == 1
+
+    dispatch.restore(run.deliveries)
+    assert len(dispatch) == 2
+    # Still the most urgent, since its original ready time was kept
+    assert [stop.order_id for stop in dispatch.next_batch(capacity=1, now=0.0).stops] == [first]
+
+
+def test_plan_routes_a_subset_from_the_same_start() -> None:
+    dispatch = engine()
+    near, nearby = uuid4(), uuid4()
+    dispatch.add(near, *NEAR, ready_at=0.0)
+    dispatch.add(nearby, *NEARBY, ready_at=0.0)
+    run = dispatch.next_batch(capacity=2, now=100.0)
+
+    kept = [pending for pending in run.deliveries if pending.order_id == nearby]
+    replanned = dispatch.plan(kept, run.start)
+    assert [stop.order_id for stop in replanned.stops] == [nearby]
+    assert replanned.distance_km == pytest.approx(distance_km(*DEPOT, *NEARBY))
+    assert replanned.stops[0].eta == pytest.approx(100.0 + replanned.distance_km / dispatch.speed)
+
+
+@pytest.fixture
+def dispatch(monkeypatch) -> DispatchEngine:
+    dispatch = engine()
+    monkeypatch.setattr(dispatch_service, "dispatch_engine", dispatch)
+    return dispatch
+
+
+def test_next_batch_routes_only_the_claimed_stops(dispatch, monkeypatch) -> None:
+    near, nearby = uuid4(), uuid4()
+    dispatch.add(near, *NEAR)
+    dispatch.add(nearby, *NEARBY)
+
+    def claim_nearby(db, order_ids, claimed):
+        claimed.add(nearby)
+        return claimed
+
+    monkeypatch.setattr(DispatchService, "_claim", staticmethod(claim_nearby))
+    run = DispatchService.next_batch(None, "driver", capacity=2)
+    assert [stop.order_id for stop in run.stops] == [nearby]
+    assert run.distance_km == pytest.approx(distance_km(*DEPOT, *NEARBY), abs=0.001)
+
+
+def test_next_batch_restores_the_run_when_claiming_fails(dispatch, monkeypatch) -> None:
+    order_id = uuid4()
+    dispatch.add(order_id, *NEAR)
+
+    def fail(db, order_ids, claimed):
+        raise OperationalError("UPDATE orders", {}, Exception("lock timeout"))
+
+    monkeypatch.setattr(DispatchService, "_claim", staticmethod(fail))
+    with pytest.raises(OperationalError):
+        DispatchService.next_batch(None, "driver", capacity=2)
+    assert len(dispatch) == 1
+
+
+def test_next_batch_keeps_orders_claimed_before_a_shard_failed(dispatch, monkeypatch) -> None:
+    committed, failed = uuid4(), uuid4()
+    dispatch.add(committed, *NEAR)
+    dispatch.add(failed, *NEARBY)
+
+    def claim_one_shard(db, order_ids, claimed):
+        claimed.add(committed)
+        raise OperationalError("UPDATE orders", {}, Exception("connection lost"))
+
+    monkeypatch.setattr(DispatchService, "_claim", staticmethod(claim_one_shard))
+    run = DispatchService.next_batch(None, "driver", capacity=2)
+    assert [stop.order_id for stop in run.stops] == [committed]
+    assert [stop.order_id for stop in dispatch.next_batch(capacity=2).stops] == [failed]
+
+
+def test_load_pending_keeps_the_deadlines_of_waiting_orders(dispatch, monkeypatch) -> None:
+    ready_at = datetime(2024, 5, 1, 18, 0, tzinfo=timezone.utc)
+    order_id = uuid4()
+    monkeypatch.setattr(dispatch_service.order_shards, "map_shards",
+                        lambda fn, db: [[(order_id, *NEAR, ready_at)]])
+    assert DispatchService.load_pending(None) == 1
+    run = dispatch.next_batch(capacity=1, now=ready_at.timestamp())
+    assert run.deliveries[0].ready_at == ready_at.timestamp()
+    assert run.deliveries[0].deadline == ready_at.timestamp() + dispatch.max_delivery
@@ -0,0 +1,26 @@
+import numpy as np
+
+from app.services.forecasting import fit_holt_winters
+
+
+def seasonal_history(series: int, seasons: int, season: int, seed: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    pattern = rng.uniform(0, 4, (series, season))
+    return np.tile(pattern, seasons) + rng.normal(0, 0.1, (series, season * seasons))
+
+
+def test_forecast_repeats_the_seasonal_pattern() -> None:
+    history = seasonal_history(series=3, seasons=6, season=8)
+    fit = fit_holt_winters(history, season=8)
+    expected = history[:, -8:]
+    assert np.abs(fit.forecast(0, 8) - expected).max() < 0.5
+    # Skipping ahead keeps the forecast aligned with the season
+    assert np.allclose(fit.forecast(3, 5), fit.forecast(0, 8)[:, 3:])
+
+
+def test_series_are_fitted_independently() -> None:
+    history = seasonal_history(series=4, seasons=4, season=6)
+    together = fit_holt_winters(history, season=6)
+    alone = fit_holt_winters(history[2:3], season=6)
+    assert np.allclose(together.forecast(0, 6)[2], alone.forecast(0, 6)[0])
+    assert together.alpha[2] == alone.alpha[0]
@@ -0,0 +1,71 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.db.models.order import OrderStatus
+from app.services import kitchen_service
+from app.services.kitchen_scheduler import KitchenScheduler
+from app.services.kitchen_service import KitchenService
+from app.services.pizza_service import PizzaService
+
+
+def make_scheduler(ovens: int = 1) -> KitchenScheduler:
+    return KitchenScheduler(prep_stations=1, ovens=ovens, prep_minutes=1, bake_minutes=10, now=0)
+
+
+def test_larger_sizes_take_longer_slots() -> None:
+    scheduler = make_scheduler()
+    small, large = uuid.uuid4(), uuid.uuid4()
+    assert scheduler.assign(small, 1.0, at=0) == pytest.approx(60 + 600)
+    # Prepped while the small bakes, then waits for the oven
+    assert scheduler.assign(large, 2.0, at=0) == pytest.approx(660 + 1200)
+
+
+def test_uses_earliest_free_oven() -> None:
+    scheduler = make_scheduler(ovens=2)
+    first, second = uuid.uuid4(), uuid.uuid4()
+    scheduler.assign(first, 1.0, at=0)
+    assert scheduler.assign(second, 1.0, at=0) == pytest.approx(120 + 600)
+
+
+def test_completion_shifts_remaining_bookings() -> None:
+    scheduler = make_scheduler()
+    first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    scheduler.assign(first, 1.0, at=0)
+    scheduler.assign(second, 1.0, at=0)
+    scheduler.assign(third, 1.0, at=0)
+    assert scheduler.ready_at(third) == pytest.approx(1860)
+
+    # The first pizza comes out two minutes late
+    scheduler.complete(first, at=780)
+    assert scheduler.ready_at(first) is None
+    assert scheduler.ready_at(second) == pytest.approx(1380)
+    assert scheduler.ready_at(third) == pytest.approx(1980)
+
+    # The second comes out early, pulling the third forward again
+    scheduler.complete(second, at=1200)
+    assert scheduler.ready_at(third) == pytest.approx(1800)
+
+
+def test_assign_is_idempotent() -> None:
+    scheduler = make_scheduler()
+    order_id = uuid.uuid4()
+    ready_at = scheduler.assign(order_id, 1.0, at=0)
+    assert scheduler.assign(order_id, 1.0, at=100) == ready_at
+    assert len(scheduler) == 1
+
+
+def test_prep_done_only_announces_confirmed_orders(monkeypatch) -> None:
+    orders = {uuid.UUID(int=1): SimpleNamespace(id=uuid.UUID(int=1), status=OrderStatus.CONFIRMED),
+              uuid.UUID(int=2): SimpleNamespace(id=uuid.UUID(int=2), status=OrderStatus.READY)}
+    announced = []
+    monkeypatch.setattr(PizzaService, "get_order", staticmethod(lambda db, order_id: orders.get(order_id)))
+    monkeypatch.setattr(kitchen_service, "notify", lambda db, channel, payload: announced.append(payload["order_id"]))
+    db = SimpleNamespace(commit=lambda: None)
+
+    assert KitchenService.prep_done(db, uuid.UUID(int=1)) is orders[uuid.UUID(int=1)]
+    assert KitchenService.prep_done(db, uuid.UUID(int=3)) is None
+    with pytest.raises(ValueError, match="only confirmed orders"):
+        KitchenService.prep_done(db, uuid.UUID(int=2))
+    assert announced == [str(uuid.UUID(int=1))]
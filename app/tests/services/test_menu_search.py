@@ -0,0 +1,51 @@
+import uuid
+
+from app.services.menu_search import MenuDocument, MenuSearchIndex
+
+
+def build_index() -> MenuSearchIndex:
+    index = MenuSearchIndex()
+    for kind, name, description in [
+        ("pizza", "Margherita", "Fresh tomatoes, mozzarella, basil"),
+        ("pizza", "Pepperoni", "Pepperoni, cheese, tomato sauce"),
+        ("pizza", "Veggie Supreme", "Bell peppers, mushrooms, onions, olives, and tomatoes"),
+        ("topping", "Mushrooms", None),
+        ("topping", "Pepperoni", None),
+    ]:
+        index.upsert(MenuDocument(kind, uuid.uuid4(), name, description))
+    return index
+
+
+def names(results) -> list:
+    return [document.name for document, _ in results]
+
+
+def test_prefix_matches_rank_names_above_descriptions() -> None:
+    results = build_index().search("pep")
+    assert names(results)[:2] == ["Pepperoni", "Pepperoni"]
+    assert "Veggie Supreme" in names(results)
+    assert results[0][1] > results[-1][1]
+
+
+def test_every_term_must_match() -> None:
+    assert names(build_index().search("veggie mush")) == ["Veggie Supreme"]
+
+
+def test_tolerates_typos() -> None:
+    assert names(build_index().search("margarita"))[0] == "Margherita"
+    assert "Mushrooms" in names(build_index().search("mushroms"))
+
+
+def test_incremental_updates() -> None:
+    index = build_index()
+    document = MenuDocument("pizza", uuid.uuid4(), "BBQ Chicken", "Grilled chicken")
+    index.upsert(document)
+    assert names(index.search("bbq")) == ["BBQ Chicken"]
+
+    index.upsert(MenuDocument("pizza", document.id, "Hawaiian", "Ham and pineapple"))
+    assert index.search("bbq") == []
+    assert names(index.search("hawa")) == ["Hawaiian"]
+
+    index.remove(document.id)
+    assert index.search("hawa") == []
+    assert len(index) == 5
@@ -0,0 +1,46 @@
+import numpy as np
+
+from app.services.order_audit import AuditChunk, PriceHistory, audit_chunk
+
+# Items 0: pizza, 1: size, 2: topping; times in milliseconds
+HISTORY = PriceHistory.build(
+    ["pizza", "size", "topping"],
+    items=np.array([0, 0, 1, 2, 2]),
+    valid_from=np.array([1000, 5000, 1000, 1000, 3000]),
+    prices=np.array([10.0, 12.0, 1.5, 1.0, 2.0]),
+    until=10_000,
+)
+
+
+def test_prices_at_uses_the_price_valid_at_each_time() -> None:
+    prices = HISTORY.prices_at(np.array([0, 0, 0, 2, 2, 1, -1]), np.array([500, 4999, 5000, 2999, 9000, 7000, 7000]))
+    # Before the first recorded price the earliest one applies; unknown items have no price
+    np.testing.assert_array_equal(prices, [10.0, 10.0, 12.0, 1.0, 2.0, 1.5, np.nan])
+
+
+def test_audit_chunk_flags_orders_priced_differently() -> None:
+    chunk = AuditChunk(
+        order_ids=["right", "wrong", "unknown", "empty"],
+        order_totals=np.array([34.0, 17.0, 5.0, 0.0]),
+        order_discounts=np.array([2.0, 0.0, 0.0, 0.0]),
+        ordered_at=np.array([2000, 6000, 2000, 2000]),
+        line_ids=["a", "b", "c"],
+        line_orders=np.array([0, 1, 2]),
+        pizzas=np.array([0, 0, 0]),
+        sizes=np.array([1, 1, -1]),
+        quantities=np.array([2, 1, 1]),
+        unit_prices=np.array([18.0, 17.0, 5.0]),
+        line_discounts=np.array([2.0, 0.0, 0.0]),
+        line_totals=np.array([34.0, 17.0, 5.0]),
+        # Two toppings on the first line, one on the second
+        topping_lines=np.array([0, 0, 1]),
+        toppings=np.array([2, 2, 2]),
+    )
+    audit = audit_chunk(HISTORY, chunk)
+    # 10 * 1.5 + 1 + 1 = 17 a pizza before the price changes; 12 * 1.5 + 2 = 20 after
+    np.testing.assert_array_equal(audit.units[:2], [17.0, 20.0])
+    np.testing.assert_array_equal(audit.totals[:2], [32.0, 20.0])
+    assert audit.wrong_orders.tolist() == [True, True, False, False]
+    assert audit.wrong_lines.tolist() == [True, True, False]
+    assert audit.unpriceable_orders.tolist() == [False, False, True, False]
+    assert audit.empty_orders.tolist() == [False, False, False, True]
@@ -0,0 +1,56 @@
+import uuid
+
+from app.services.order_cache import OrderResponseCache
+from app.tools.cache import LRUCache
+
+
+def test_evicts_by_total_size_and_counts() -> None:
+    now = [0.0]
+    cache = LRUCache(maxsize=10, ttl=5, clock=lambda: now[0], max_bytes=10)
+    cache.set("a", b"aaaa")
+    cache.set("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"
+    cache.set("c", b"cccc")
+    # "b" was least recently used once "a" was read
+    assert cache.get("b") is None
+    assert cache.bytes == 8
+    cache.set("huge", b"x" * 11)
+    assert cache.get("huge") is None
+    now[0] = 6
+    assert cache.get("a") is None
+    assert cache.stats == {"hits": 1, "misses": 3, "evictions": 1, "expirations": 1}
+
+
+def test_load_racing_an_invalidation_is_not_stored() -> None:
+    responses = OrderResponseCache(LRUCache(maxsize=10))
+    order_id = uuid.uuid4()
+
+    def stale_load() -> bytes:
+        responses.handle_status_notification({"order_id": str(order_id), "status": "confirmed"})
+        return b"pending"
+
+    assert responses.load(order_id, stale_load) == b"pending"
+    assert order_id not in responses.cache._entries
+    assert responses.load(order_id, lambda: b"confirmed") == b"confirmed"
+    assert responses.load(order_id, lambda: b"unused") == b"confirmed"
+
+
+def test_invalidating_another_order_does_not_stop_a_load_being_stored() -> None:
+    responses = OrderResponseCache(LRUCache(maxsize=10))
+    order_id, other_id = uuid.uuid4(), uuid.uuid4()
+
+    def load() -> bytes:
+        responses.invalidate(other_id)
+        return b"pending"
+
+    assert responses.load(order_id, load) == b"pending"
+    assert responses.load(order_id, lambda: b"unused") == b"pending"
+    # Generations are only kept while a load is in flight
+    assert responses._generations == {} and responses._loading == {}
+
+    def reconnecting_load() -> bytes:
+        responses.handle_reconnect()
+        return b"confirmed"
+
+    assert responses.load(other_id, reconnecting_load) == b"confirmed"
+    assert other_id not in responses.cache._entries
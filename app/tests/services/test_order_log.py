@@ -0,0 +1,95 @@
+import base64
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services import order_log
+from app.services.order_log import OrderLogService, decode_cursor, encode_cursor
+
+GUARD = "WHERE (order_event_cursors.txid, order_event_cursors.seq) < ("
+START = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+
+def event(txid: int, seq: int, minute: int) -> SimpleNamespace:
+    return SimpleNamespace(txid=txid, seq=seq, order_id=uuid4(), event_type="status_changed", payload={},
+                           created_at=START + timedelta(minutes=minute))
+
+
+class ShardSession:
+    """One shard's event log and stored consumer position"""
+
+    def __init__(self, events):
+        self.events = events
+        self.position = None
+
+    def execute(self, statement):
+        compiled = statement.compile(dialect=postgresql.dialect())
+        if str(compiled).startswith("INSERT INTO order_event_cursors"):
+            # Stands in for the upsert, including its WHERE when one is given
+            params = compiled.params
+            new = (params["txid"], params["seq"])
+            if self.position is None or GUARD not in str(compiled) or self.position < new:
+                self.position = new
+            return None
+        return SimpleNamespace(first=lambda: SimpleNamespace(txid=self.position[0], seq=self.position[1])
+                               if self.position else None)
+
+    def commit(self) -> None:
+        pass
+
+
+class FakeShards:
+    def __init__(self, *logs):
+        self.shards = [SimpleNamespace(id=shard_id) for shard_id in range(len(logs))]
+        self.sessions = [ShardSession(log) for log in logs]
+
+    def shard(self, shard_id):
+        return self.shards[shard_id]
+
+    def map_shards(self, fn, db=None):
+        return [fn(shard, self.sessions[shard.id]) for shard in self.shards]
+
+    @contextmanager
+    def shard_session(self, db, shard):
+        yield self.sessions[shard.id]
+
+
+@pytest.fixture
+def shards(monkeypatch) -> FakeShards:
+    shards = FakeShards(
+        [event(10, 1, 0), event(10, 2, 2), event(12, 3, 4)],
+        [event(7, 1, 1), event(9, 2, 3)],
+    )
+    monkeypatch.setattr(order_log, "order_shards", shards)
+    monkeypatch.setattr(OrderLogService, "_read_shard", staticmethod(
+        lambda session, after, limit: [row for row in session.events if (row.txid, row.seq) > after][:limit]
+    ))
+    return shards
+
+
+def test_read_pages_through_every_shard_in_time_order(shards) -> None:
+    first = OrderLogService.read(None, {}, limit=3)
+    assert [row.seq for row in first.events] == [1, 1, 2]
+    assert decode_cursor(first.cursor) == {0: (10, 2), 1: (7, 1)}
+
+    second = OrderLogService.read(None, decode_cursor(first.cursor), limit=3)
+    assert [(row.seq, row.created_at.minute) for row in second.events] == [(2, 3), (3, 4)]
+    assert decode_cursor(second.cursor) == {0: (12, 3), 1: (9, 2)}
+    # An empty page keeps the position
+    assert OrderLogService.read(None, decode_cursor(second.cursor), limit=3).cursor == second.cursor
+
+
+def test_acknowledge_never_moves_a_position_back(shards) -> None:
+    assert OrderLogService.acknowledge(None, "pos", encode_cursor({0: (12, 3), 1: (7, 1)})) == {0: (12, 3), 1: (7, 1)}
+    assert OrderLogService.acknowledge(None, "pos", encode_cursor({0: (10, 2), 1: (9, 2)})) == {0: (12, 3), 1: (9, 2)}
+
+
+def test_decode_cursor_rejects_malformed_cursors(shards) -> None:
+    assert decode_cursor(encode_cursor({1: (9, 2)})) == {1: (9, 2)}
+    for raw in (b"2:1|1", b"12", b"a|b", b"0:1|2|3"):
+        with pytest.raises(ValueError):
+            decode_cursor(base64.urlsafe_b64encode(raw).decode())
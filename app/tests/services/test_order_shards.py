@@ -0,0 +1,98 @@
+import base64
+from uuid import UUID
+
+import numpy as np
+import pytest
+
+from app.scripts import backfill_phone_numbers
+from app.services.order_audit import chunk_query
+from app.services.order_log import decode_cursor, encode_cursor
+from app.services.order_shards import OrderShards, merge_ordered, order_slot, routing_slot
+from app.services.shard_rebalance import plan_rebalance
+
+
+def test_buckets_split_the_slots_evenly() -> None:
+    shards = OrderShards([], buckets=16, key="order", threads=1)
+    assert shards.slot_range(0) == (0, 4095)
+    assert shards.slot_range(15) == (61440, 65535)
+    assert shards.bucket_of(UUID(int=4095)) == 0
+    assert shards.bucket_of(UUID(int=(1 << 64) | 4096)) == 1
+    with pytest.raises(ValueError):
+        OrderShards([], buckets=12, key="order", threads=1)
+
+
+def test_customer_keyed_ids_land_in_the_customers_bucket() -> None:
+    shards = OrderShards([], buckets=256, key="customer", threads=1)
+    first, second = shards.mint_order_id("+15550100"), shards.mint_order_id("+15550100")
+    assert order_slot(first) == order_slot(second) == routing_slot("+15550100")
+    # Still version 7 ids, ordered by time
+    assert first.version == 7 and first < second
+
+
+def test_merge_ordered_keeps_each_shards_order() -> None:
+    merged = merge_ordered([[9, 5, 1], [8, 7], []], key=lambda value: value, reverse=True, limit=4)
+    assert merged == [9, 8, 7, 5]
+
+
+def test_plan_rebalance_moves_as_few_buckets_as_possible() -> None:
+    owners = np.zeros(8, dtype=np.int64)
+    moves = plan_rebalance(owners, 3)
+    assert len(moves) == 5
+    after = owners.copy()
+    for bucket, source, target in moves:
+        assert after[bucket] == source
+        after[bucket] = target
+    assert sorted(np.bincount(after, minlength=3)) == [2, 3, 3]
+    assert plan_rebalance(after, 3) == []
+
+
+def test_order_log_cursor_keeps_the_unsharded_format() -> None:
+    legacy = base64.urlsafe_b64encode(b"12|34").decode()
+    assert encode_cursor({0: (12, 34)}) == legacy
+    assert decode_cursor(legacy) == {0: (12, 34)}
+    # Unsharded, cursors for other shards are refused
+    with pytest.raises(ValueError):
+        decode_cursor(base64.urlsafe_b64encode(b"0:12|34,1:5|6").decode())
+
+
+class MapConnection:
+    """Stands in for the main database, returning a fixed order shard map"""
+
+    def __init__(self, owners):
+        self.rows = list(enumerate(owners))
+
+    def execute(self, statement, *args):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+def sharded(owners, shards=2) -> OrderShards:
+    order_shards = OrderShards([f"postgresql+psycopg://shard{n}@/pizza" for n in range(shards)],
+                               buckets=len(owners), key="order", threads=1)
+    order_shards.load(MapConnection(owners))
+    return order_shards
+
+
+def test_shards_keep_to_the_buckets_they_own() -> None:
+    # Bucket 1 has moved to shard 1; shard 0 still holds a copy until it is purged
+    order_shards = sharded([0, 1, 0, 0])
+    first, second = order_shards.shards
+    assert order_shards.owned_slot_ranges(first) == [(0, 16383), (32768, 65535)]
+    assert order_shards.owned_slot_ranges(second) == [(16384, 32767)]
+    assert order_shards.owned_sql(second) == "order_slot(id) BETWEEN 16384 AND 32767"
+    unmoved = sharded([0, 0, 0, 0])
+    assert unmoved.owned_sql(unmoved.shards[0]) == "TRUE"
+    assert unmoved.owned_sql(unmoved.shards[1]) == "FALSE"
+
+
+def test_scripts_skip_copies_of_moved_buckets(monkeypatch) -> None:
+    # Rows of a moved bucket are fenced on the old shard, so updating them would fail
+    order_shards = sharded([0, 1, 0, 0])
+    monkeypatch.setattr(backfill_phone_numbers, "order_shards", order_shards)
+    backfill = backfill_phone_numbers.shard_phone_numbers(order_shards.shards[1])
+    assert backfill.where == "phone_e164 IS NULL AND (order_slot(id) BETWEEN 16384 AND 32767)"
+    assert "AND (order_slot(id) BETWEEN 0 AND 16383 OR order_slot(id) BETWEEN 32768 AND 65535)" in str(
+        chunk_query(order_shards.owned_sql(order_shards.shards[0]))
+    )
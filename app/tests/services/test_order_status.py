@@ -0,0 +1,105 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.db.models.order import OrderStatus
+from app.routes.v1 import pizza
+from app.services.notifications import NotificationListener
+from app.services.order_status_broker import RESYNC, OrderStatusBroker
+
+
+def test_broker_fans_out_to_every_watcher_of_the_order() -> None:
+    async def scenario() -> None:
+        broker = OrderStatusBroker(queue_size=2)
+        order_id, other_id = uuid4(), uuid4()
+        first, second, other = broker.subscribe(order_id), broker.subscribe(order_id), broker.subscribe(other_id)
+        broker.handle_notification({"order_id": str(order_id), "status": "confirmed"})
+        broker.handle_notification({"order_id": "not-a-uuid", "status": "ready"})
+        broker.handle_notification({"status": "ready"})
+        assert first.get_nowait() == second.get_nowait() == {"order_id": str(order_id), "status": "confirmed"}
+        assert other.empty()
+
+        # A full queue drops its oldest event, never the latest
+        for status in ("ready", "out_for_delivery", "delivered"):
+            broker.publish(order_id, {"status": status})
+        assert [first.get_nowait()["status"] for _ in range(2)] == ["out_for_delivery", "delivered"]
+
+        broker.resync()
+        assert other.get_nowait() is RESYNC
+        broker.unsubscribe(order_id, first)
+        broker.unsubscribe(order_id, second)
+        broker.unsubscribe(order_id, second)
+        assert broker.subscriber_count == 1
+
+    asyncio.run(scenario())
+
+
+def test_listener_dispatches_to_every_handler_of_the_channel() -> None:
+    listener = NotificationListener(dsn="postgresql://unused")
+    received = []
+
+    async def async_handler(payload) -> None:
+        received.append(("async", payload))
+
+    def failing_handler(payload) -> None:
+        raise RuntimeError("handler bug")
+
+    listener.add_handler("orders", failing_handler)
+    listener.add_handler("orders", received.append)
+    listener.add_handler("orders", async_handler)
+    listener.add_handler("menu", received.append)
+
+    asyncio.run(listener.dispatch("orders", json.dumps({"order_id": "1"})))
+    # A failing handler does not stop the others, and payloads that are not JSON pass through
+    assert received == [{"order_id": "1"}, ("async", {"order_id": "1"})]
+    asyncio.run(listener.dispatch("menu", "plain"))
+    asyncio.run(listener.dispatch("unknown", "{}"))
+    assert received[-1] == "plain" and len(received) == 3
+
+
+class Connected:
+    async def is_disconnected(self) -> bool:
+        return False
+
+
+class Session:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def close(self) -> None:
+        pass
+
+
+def test_order_events_stream_until_the_order_is_delivered(monkeypatch) -> None:
+    broker = OrderStatusBroker()
+    order_id = uuid4()
+    statuses = iter([OrderStatus.PENDING, OrderStatus.OUT_FOR_DELIVERY])
+    monkeypatch.setattr(pizza, "order_status_broker", broker)
+    monkeypatch.setattr(pizza.PizzaService, "get_order",
+                        staticmethod(lambda db, order_id: SimpleNamespace(status=next(statuses))))
+    monkeypatch.setattr(pizza.order_shards, "session_for", lambda order_id: Session())
+
+    async def scenario():
+        response = await pizza.order_events(order_id, Connected(), Session())
+        events = response.body_iterator
+        frames = [await events.__anext__()]
+        broker.publish(order_id, {"order_id": str(order_id), "status": "confirmed"})
+        broker.publish(order_id, {"order_id": str(order_id), "status": "confirmed"})
+        frames.append(await events.__anext__())
+        # After a reconnect the stream rereads the order instead of trusting the queue
+        broker.resync()
+        frames.append(await events.__anext__())
+        broker.publish(order_id, {"order_id": str(order_id), "status": "delivered"})
+        frames.extend([frame async for frame in events])
+        return frames
+
+    frames = asyncio.run(scenario())
+    assert [json.loads(frame.split("data: ")[1])["status"] for frame in frames] == [
+        "pending", "confirmed", "out_for_delivery", "delivered",
+    ]
+    assert all(frame.startswith("event: status\n") for frame in frames)
+    assert broker.subscriber_count == 0
@@ -0,0 +1,57 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import pytest
+
+from app.services.order_writer import GroupCommitWriter, PendingOrder
+
+
+class FakeSession:
+    def __init__(self):
+        self.commits = 0
+
+    def commit(self) -> None:
+        self.commits += 1
+
+    def rollback(self) -> None:
+        pass
+
+
+class RecordingWriter(GroupCommitWriter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batches: List[List[str]] = []
+        self._lock = threading.Lock()
+
+    def _insert(self, db, batch: List[PendingOrder]) -> None:
+        names = [pending.values["customer_name"] for pending in batch]
+        with self._lock:
+            self.batches.append(names)
+        if "bad" in names:
+            raise ValueError("bad order")
+        for pending in batch:
+            pending.order = pending.values["customer_name"]
+
+
+def test_concurrent_orders_share_a_commit() -> None:
+    writer = RecordingWriter(max_batch=4, max_wait=5.0)
+    session = FakeSession()
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda name: writer.submit(session, {"customer_name": name}, []), "abcd"))
+    assert results == list("abcd")
+    # The batch filled up long before the wait expired
+    assert sorted(writer.batches[0]) == list("abcd")
+    assert session.commits == 1
+
+
+def test_failed_batch_falls_back_to_single_inserts() -> None:
+    writer = RecordingWriter(max_batch=2, max_wait=5.0)
+    session = FakeSession()
+    with ThreadPoolExecutor(2) as pool:
+        good = pool.submit(writer.submit, session, {"customer_name": "good"}, [])
+        bad = pool.submit(writer.submit, session, {"customer_name": "bad"}, [])
+        assert good.result() == "good"
+        with pytest.raises(ValueError):
+            bad.result()
+    assert writer.stats["fallbacks"] == 1
@@ -0,0 +1,50 @@
+import threading
+import time
+
+from app.services.profiler import Profiler
+
+
+def spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_captures_busy_threads_and_skips_idle_ones(tmp_path) -> None:
+    profiler = Profiler(lock_path=str(tmp_path / "profiler.lock"))
+    stop = threading.Event()
+    busy = threading.Thread(target=spin, args=(stop,), name="busy")
+    idle = threading.Thread(target=stop.wait, name="idle")
+    busy.start()
+    idle.start()
+    try:
+        profile = profiler.start("window", 0.002, seconds=0.2)
+        time.sleep(0.2)
+        profiler.stop(profile)
+    finally:
+        stop.set()
+        busy.join()
+        idle.join()
+
+    assert not profile.running and profile.ticks > 10
+    threads = {stack[0] for stack in profile.stacks}
+    assert "busy" in threads and "idle" not in threads
+    assert "busy;threading:Thread._bootstrap" in profile.collapsed()
+    functions = {row["function"]: row for row in profile.functions(limit=100)}
+    spinning = functions[f"{__name__}:spin"]
+    assert spinning["total"] >= profile.ticks * 0.9
+    assert profiler.get(profile.id) is profile
+
+
+def test_one_capture_per_host(tmp_path) -> None:
+    lock_path = str(tmp_path / "profiler.lock")
+    worker, other_worker = Profiler(lock_path=lock_path), Profiler(lock_path=lock_path)
+    profile = worker.start("window", 0.01, seconds=5)
+    try:
+        assert worker.start("window", 0.01) is None
+        assert other_worker.start("window", 0.01) is None
+    finally:
+        worker.stop(profile)
+    second = other_worker.start("window", 0.01)
+    assert second is not None
+    other_worker.stop(second)
+    assert not second.running
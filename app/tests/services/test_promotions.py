@@ -0,0 +1,67 @@
+import uuid
+from datetime import datetime, time
+from types import SimpleNamespace
+
+from app.db.models.promotion import PromotionKind
+from app.services.pricing import price_cart, price_pizza
+from app.services.promotions import PromotionIndex, PromotionRule
+
+PIZZA = SimpleNamespace(id=uuid.uuid4(), base_price=10.0)
+LARGE = SimpleNamespace(id=uuid.uuid4(), multiplier=2.0)
+OLIVES = SimpleNamespace(id=uuid.uuid4(), price=1.5)
+TUESDAY_NOON = datetime(2026, 10, 20, 12, 0)
+
+
+def rule(kind: PromotionKind, value: float = 0.0, **conditions) -> PromotionRule:
+    return PromotionRule(uuid.uuid4(), kind.value, kind, value, **conditions)
+
+
+def test_candidates_match_on_every_dimension() -> None:
+    tuesday_large = rule(PromotionKind.PERCENT_OFF, 20, size_id=LARGE.id, weekdays=1 << 1)
+    other_pizza = rule(PromotionKind.AMOUNT_OFF, 5, pizza_id=uuid.uuid4())
+    late_night = rule(PromotionKind.AMOUNT_OFF, 1, start_time=time(22), end_time=time(2))
+    index = PromotionIndex([tuesday_large, other_pizza, late_night])
+
+    assert index.candidates(TUESDAY_NOON, PIZZA.id, LARGE.id, []) == [tuesday_large]
+    assert index.candidates(datetime(2026, 10, 21, 12), PIZZA.id, LARGE.id, []) == []
+    assert index.candidates(datetime(2026, 10, 21, 1), PIZZA.id, uuid.uuid4(), []) == [late_night]
+
+
+
+def test_windows_past_midnight_carry_into_the_next_day() -> None:
+    monday_late = rule(PromotionKind.AMOUNT_OFF, 2, weekdays=1 << 0, start_time=time(22), end_time=time(2))
+    index = PromotionIndex([monday_late])
+    monday, tuesday = datetime(2026, 10, 19, 23), datetime(2026, 10, 20, 1)
+    for at, expected in ((monday, [monday_late]), (tuesday, [monday_late]),
+                         (datetime(2026, 10, 19, 1), []), (datetime(2026, 10, 20, 23), [])):
+        assert index.candidates(at, PIZZA.id, LARGE.id, []) == expected
+        assert monday_late.runs_at(at) == bool(expected)
+
+def test_best_pizza_discount_and_free_toppings() -> None:
+    index = PromotionIndex([
+        rule(PromotionKind.PERCENT_OFF, 20, size_id=LARGE.id),
+        rule(PromotionKind.AMOUNT_OFF, 3, pizza_id=PIZZA.id),
+        rule(PromotionKind.FREE_TOPPING, pizza_id=PIZZA.id, topping_id=OLIVES.id),
+    ])
+    price = price_pizza(index, PIZZA, LARGE, [OLIVES], TUESDAY_NOON)
+    assert price.subtotal == 21.5
+    assert sorted(discount.amount for discount in price.discounts) == [1.5, 4.0]
+    assert price.total == 16.0
+
+    assert price_pizza(index, PIZZA, LARGE, [], TUESDAY_NOON).total == 16.0
+
+
+def test_cart_lines_are_priced_like_single_pizzas() -> None:
+    small = SimpleNamespace(id=uuid.uuid4(), multiplier=1.0)
+    index = PromotionIndex([
+        rule(PromotionKind.PERCENT_OFF, 20, size_id=LARGE.id),
+        rule(PromotionKind.FREE_TOPPING, topping_id=OLIVES.id),
+    ])
+    cart = price_cart(index, [PIZZA, PIZZA], [LARGE, small], [[OLIVES], []], [3, 1], TUESDAY_NOON)
+    single = price_pizza(index, PIZZA, LARGE, [OLIVES], TUESDAY_NOON)
+
+    assert cart.unit_prices.tolist() == [single.subtotal, 10.0]
+    assert cart.totals.tolist() == [single.total * 3, 10.0]
+    assert [discount.amount for discount in cart.discounts[0]] == [12.0, 4.5]
+    assert cart.total == 58.0
+    assert cart.discount_total == 16.5
@@ -0,0 +1,19 @@
+from app.tools.phone import normalize_phone
+
+
+def test_normalizes_to_e164() -> None:
+    assert normalize_phone("(555) 010-0199") == "+15550100199"
+    assert normalize_phone("1 555 010 0199") == "+15550100199"
+    assert normalize_phone("+44 20 7946 0018") == "+442079460018"
+    assert normalize_phone("0044 20 7946 0018") == "+442079460018"
+    # A trunk zero is dropped before the country code is added
+    assert normalize_phone("020 7946 0018", country_code="44") == "+442079460018"
+    assert normalize_phone("555-010-0199 ext. 12") == "+15550100199"
+
+
+def test_rejects_what_cannot_be_a_number() -> None:
+    assert normalize_phone("") is None
+    assert normalize_phone(None) is None
+    assert normalize_phone("call me") is None
+    assert normalize_phone("12345") is None
+    assert normalize_phone("+1234567890123456") is None
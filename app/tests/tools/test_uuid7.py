@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.tools.uuid7 import uuid7, uuid7_floor, uuid7_time
+
+
+def test_ids_increase_and_carry_their_creation_time() -> None:
+    before = datetime.now(timezone.utc) - timedelta(milliseconds=1)
+    ids = [uuid7() for _ in range(10_000)]
+    after = datetime.now(timezone.utc)
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert all(value.version == 7 and value.variant == ids[0].variant for value in ids)
+    # The counter may borrow a millisecond or two under a tight loop
+    assert before <= uuid7_time(ids[0]) <= uuid7_time(ids[-1]) <= after + timedelta(milliseconds=5)
+
+
+def test_floor_bounds_ids_generated_from_then() -> None:
+    at = datetime.now(timezone.utc)
+    value = uuid7()
+    assert uuid7_floor(at - timedelta(milliseconds=1)) <= value
+    assert uuid7_floor(at.replace(tzinfo=None) + timedelta(seconds=1)) > value
+
+
+def test_time_rejects_other_versions() -> None:
+    with pytest.raises(ValueError):
+        uuid7_time(uuid4())
@@ -0,0 +1,31 @@
+import re
+from typing import Optional
+
+from app.config import settings
+
+_EXTENSION = re.compile(r"(?:ext\.?|x|#).*$", re.IGNORECASE)
+
+
+def normalize_phone(raw: str, country_code: Optional[str] = None) -> Optional[str]:
+    """Normalize a phone number to E.164, or return None if it cannot be one.
+
+    Numbers without an international prefix are assumed to belong to
+    `country_code` (DEFAULT_PHONE_COUNTRY_CODE by default); a single trunk
+    zero is dropped first, as in 020 7946 0018 -> +442079460018.
+    """
+    country_code = country_code or settings.DEFAULT_PHONE_COUNTRY_CODE
+    number = _EXTENSION.sub("", raw or "").strip()
+    digits = re.sub(r"\D", "", number)
+    if not digits:
+        return None
+    if number.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif digits.startswith("0"):
+        digits = country_code + digits[1:]
+    elif not (country_code == "1" and len(digits) == 11 and digits.startswith("1")):
+        digits = country_code + digits
+    if not 8 <= len(digits) <= 15 or digits.startswith("0"):
+        return None
+    return "+" + digits
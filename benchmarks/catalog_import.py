@@ -0,0 +1,70 @@
+"""Benchmark importing a large franchise menu.
+
+Imports 50k items from CSV three times: into an empty catalog, again
+unchanged, and with a tenth of the prices changed. Items are named
+"Benchmark ..." in the database from SQLALCHEMY_DATABASE_URI and are deleted
+afterwards with their price history. Run from the repository root:
+
+    python -m benchmarks.catalog_import
+"""
+import csv
+import io
+import time
+
+from sqlalchemy import create_engine, delete, select
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.db.models.menu_price import menu_prices
+from app.db.models.pizza import Pizza
+from app.db.models.topping import Topping
+from app.services.catalog_service import CatalogService
+
+PIZZAS = 45_000
+TOPPINGS = 5_000
+PREFIX = "Benchmark"
+
+
+def menu_csv(price_bump: int = 0) -> str:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(("type", "name", "description", "base_price", "price", "icon"))
+    for index in range(PIZZAS):
+        bump = 1 if price_bump and index % price_bump == 0 else 0
+        writer.writerow(("pizza", f"{PREFIX} pizza {index}", f"Store special number {index}",
+                         10 + index % 7 + bump, "", ""))
+    for index in range(TOPPINGS):
+        writer.writerow(("topping", f"{PREFIX} topping {index}", "", "", 1 + index % 3, ""))
+    return out.getvalue()
+
+
+def main() -> None:
+    engine = create_engine(settings.SQLALCHEMY_DATABASE_URI)
+    Session = sessionmaker(autoflush=False, bind=engine)
+    print(f"{'import':>10} {'parse s':>8} {'upsert s':>9} {'inserted':>9} {'updated':>8} {'unchanged':>10}")
+    try:
+        for label, content in (("new", menu_csv()), ("unchanged", menu_csv()), ("10% price", menu_csv(10))):
+            started = time.perf_counter()
+            catalog = CatalogService.parse_csv(content)
+            parsed = time.perf_counter()
+            with Session() as db:
+                counts = CatalogService.import_catalog(db, catalog)
+            finished = time.perf_counter()
+            totals = {name: sum(table[name] for table in counts.values())
+                      for name in ("inserted", "updated", "unchanged")}
+            print(f"{label:>10} {parsed - started:>8.2f} {finished - parsed:>9.2f} "
+                  f"{totals['inserted']:>9} {totals['updated']:>8} {totals['unchanged']:>10}")
+    finally:
+        with Session() as db:
+            benchmark_items = select(Pizza.id).where(Pizza.name.startswith(PREFIX)).union_all(
+                select(Topping.id).where(Topping.name.startswith(PREFIX))
+            )
+            db.execute(delete(menu_prices).where(menu_prices.c.item_id.in_(benchmark_items)))
+            db.execute(delete(Pizza).where(Pizza.name.startswith(PREFIX)))
+            db.execute(delete(Topping).where(Topping.name.startswith(PREFIX)))
+            db.commit()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark compression CPU cost against bandwidth saved at several payload sizes.
+
+Run from the repository root:
+
+    python -m benchmarks.compression
+
+Codecs whose optional package (brotli, zstandard) is not installed are skipped.
+"""
+import json
+import random
+import time
+
+from app.middleware.compression import CODECS
+
+SIZES = (1_000, 16_000, 256_000, 2_000_000)
+# A slow mobile link, where bandwidth matters most
+LINK_BYTES_PER_SECOND = 2_000_000 / 8
+
+
+def payload(size: int, rng: random.Random) -> bytes:
+    names = ["Margherita", "Pepperoni", "Veggie Supreme", "BBQ Chicken", "Hawaiian"]
+    # Each serialised item is a little over 100 bytes
+    items = [
+        {
+            "id": f"{rng.getrandbits(128):032x}",
+            "name": rng.choice(names),
+            "price": round(rng.uniform(6, 20), 2),
+            "status": rng.choice(["CONFIRMED", "READY", "DELIVERED"]),
+        }
+        for _ in range(size // 100 + 1)
+    ]
+    return json.dumps(items).encode()[:size]
+
+
+def measure(compress, data: bytes) -> tuple:
+    runs = max(3, int(2_000_000 / len(data)))
+    started = time.perf_counter()
+    for _ in range(runs):
+        compressed = compress(data)
+    return (time.perf_counter() - started) / runs, len(compressed)
+
+
+def main() -> None:
+    rng = random.Random(3)
+    print(f"{'size':>9} {'codec':>6} {'level':>5} {'ratio':>6} {'cpu ms':>8} {'wire ms':>8} {'total ms':>9}")
+    for size in SIZES:
+        data = payload(size, rng)
+        raw_wire = len(data) / LINK_BYTES_PER_SECOND * 1000
+        print(f"{len(data):>9} {'none':>6} {'-':>5} {1.0:>6.2f} {0.0:>8.2f} {raw_wire:>8.2f} {raw_wire:>9.2f}")
+        for codec in CODECS:
+            for level in (codec.level, codec.stored_level):
+                seconds, compressed = measure(lambda body: codec.compress(body, level), data)
+                cpu = seconds * 1000
+                wire = compressed / LINK_BYTES_PER_SECOND * 1000
+                print(f"{'':>9} {codec.name:>6} {level:>5} {len(data) / compressed:>6.2f} "
+                      f"{cpu:>8.2f} {wire:>8.2f} {cpu + wire:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Benchmark delivery batching with 10k pending orders.
+
+Run from the repository root:
+
+    python -m benchmarks.dispatch_batching
+"""
+import random
+import time
+import uuid
+
+from app.services.dispatch_engine import DispatchEngine
+
+DEPOT = (51.5074, -0.1278)
+PENDING_ORDERS = 10_000
+CITY_RADIUS_DEGREES = 0.12  # roughly 13 km north-south
+
+
+def main() -> None:
+    rng = random.Random(42)
+    engine = DispatchEngine(depot=DEPOT)
+    now = time.time()
+
+    started = time.perf_counter()
+    for _ in range(PENDING_ORDERS):
+        engine.add(
+            uuid.uuid4(),
+            DEPOT[0] + rng.uniform(-CITY_RADIUS_DEGREES, CITY_RADIUS_DEGREES),
+            DEPOT[1] + rng.uniform(-CITY_RADIUS_DEGREES, CITY_RADIUS_DEGREES),
+            ready_at=now - rng.uniform(0, 20 * 60),
+        )
+    indexed = time.perf_counter() - started
+
+    timings = []
+    stops = 0
+    runs = 0
+    while len(engine):
+        started = time.perf_counter()
+        run = engine.next_batch(capacity=5, now=now)
+        timings.append(time.perf_counter() - started)
+        stops += len(run.stops)
+        runs += 1
+    timings.sort()
+
+    print(f"indexed {PENDING_ORDERS} orders in {indexed * 1000:.1f} ms")
+    print(f"planned {runs} runs ({stops / runs:.2f} stops per run) in {sum(timings):.2f} s")
+    print(
+        f"next_batch latency: p50 {timings[len(timings) // 2] * 1000:.2f} ms, "
+        f"p99 {timings[int(len(timings) * 0.99)] * 1000:.2f} ms, max {timings[-1] * 1000:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Benchmark fitting the demand forecast on a year of 15-minute slots.
+
+Generates Poisson order counts with a daily and weekend pattern for every
+pizza and size, fits all series at once and compares the next week's forecast
+with a seasonal naive one (last week repeated). Run from the repository root:
+
+    python -m benchmarks.forecast
+"""
+import time
+
+import numpy as np
+
+from app.services.forecasting import fit_holt_winters
+
+SLOTS_PER_DAY = 96
+SEASON = 7 * SLOTS_PER_DAY
+SLOTS = 365 * SLOTS_PER_DAY
+SERIES_COUNTS = (30, 150, 600)
+
+
+def demand(series: int, rng: np.random.Generator) -> np.ndarray:
+    slot = np.arange(SLOTS + SEASON)
+    # Lunch and dinner peaks, busier at weekends, slowly growing
+    daily = np.maximum(np.sin(2 * np.pi * (slot % SLOTS_PER_DAY) / SLOTS_PER_DAY - 1.5), 0)
+    weekend = 1 + 0.3 * ((slot // SLOTS_PER_DAY) % 7 >= 5)
+    growth = 1 + 0.2 * slot / SLOTS
+    return rng.uniform(0.2, 3, (series, 1)) * (daily * weekend * growth)[None, :]
+
+
+def main() -> None:
+    rng = np.random.default_rng(7)
+    print(f"{'series':>7} {'fit s':>7} {'mae':>7} {'naive mae':>10}")
+    for series in SERIES_COUNTS:
+        rates = demand(series, rng)
+        history = rng.poisson(rates[:, :SLOTS]).astype(np.float64)
+        started = time.perf_counter()
+        fit = fit_holt_winters(history, SEASON)
+        elapsed = time.perf_counter() - started
+        actual = rates[:, SLOTS:]
+        mae = np.abs(fit.forecast(0, SEASON) - actual).mean()
+        naive = np.abs(history[:, -SEASON:] - actual).mean()
+        print(f"{series:>7} {elapsed:>7.2f} {mae:>7.3f} {naive:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark the time a request thread spends in a logging call.
+
+Logs the same records through a handler that writes on the calling thread
+and through the queue pipeline from app.log_config, against a sink that is
+fast and one that takes a millisecond per line (a congested pipe or log
+shipper). Run from the repository root:
+
+    python -m benchmarks.logging_overhead
+"""
+import io
+import logging
+import time
+
+import numpy as np
+
+from app.log_config import JsonFormatter, build_pipeline, request_id
+
+RECORDS = 2000
+
+
+class Sink(logging.StreamHandler):
+    def __init__(self, delay: float):
+        super().__init__(io.StringIO())
+        self.delay = delay
+        self.setFormatter(JsonFormatter())
+
+    def emit(self, record: logging.LogRecord) -> None:
+        super().emit(record)
+        if self.delay:
+            time.sleep(self.delay)
+
+
+def measure(logger: logging.Logger) -> np.ndarray:
+    timings = np.empty(RECORDS)
+    for index in range(RECORDS):
+        started = time.perf_counter()
+        logger.info("order %s created", index, extra={"items": 3, "total": 24.5})
+        timings[index] = time.perf_counter() - started
+    return timings * 1e6
+
+
+def main() -> None:
+    request_id.set("benchmark")
+    print(f"{'sink ms':>7} {'pipeline':>9} {'p50 us':>7} {'p99 us':>8} {'max us':>8}")
+    for delay in (0.0, 0.001):
+        for name in ("direct", "queue"):
+            logger = logging.getLogger(f"benchmark.{name}.{delay}")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            sink = Sink(delay)
+            if name == "direct":
+                logger.addHandler(sink)
+                timings = measure(logger)
+            else:
+                # Large enough to absorb the whole burst, so nothing is dropped
+                handler, writer = build_pipeline(sink, queue_size=RECORDS * 2)
+                logger.addHandler(handler)
+                writer.start()
+                timings = measure(logger)
+                writer.stop()
+            print(f"{delay * 1000:>7.1f} {name:>9} {np.percentile(timings, 50):>7.1f} "
+                  f"{np.percentile(timings, 99):>8.1f} {timings.max():>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Benchmark menu search latency over a large franchise menu.
+
+Run from the repository root:
+
+    python -m benchmarks.menu_search
+"""
+import random
+import time
+import uuid
+
+from app.services.menu_search import MenuDocument, MenuSearchIndex
+
+WORDS = (
+    "margherita pepperoni veggie supreme bbq chicken hawaiian ham pineapple mushroom olive onion "
+    "basil mozzarella cheddar goat spinach artichoke sausage bacon jalapeno garlic truffle pesto "
+    "anchovy salami prosciutto rocket ricotta chorizo tuna sweetcorn capers feta aubergine"
+).split()
+# A deliberately small vocabulary, so every query matches hundreds of items
+ITEMS = 5_000
+QUERIES = ["pep", "marg", "chick bbq", "mushrom", "truf", "prosciuto", "veg sup", "ja"]
+
+
+def main() -> None:
+    rng = random.Random(7)
+    index = MenuSearchIndex()
+    started = time.perf_counter()
+    for number in range(ITEMS):
+        name = " ".join(rng.sample(WORDS, 2)).title() + f" {number}"
+        description = ", ".join(rng.sample(WORDS, 5))
+        index.upsert(MenuDocument(rng.choice(["pizza", "topping"]), uuid.uuid4(), name, description))
+    print(f"indexed {ITEMS} items in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    for query in QUERIES:
+        runs = 200
+        started = time.perf_counter()
+        for _ in range(runs):
+            results = index.search(query, limit=10)
+        elapsed = (time.perf_counter() - started) / runs
+        print(f"{query!r:14} {elapsed * 1e6:8.1f} us  top: {results[0][0].name if results else '-'}")
+
+
+if __name__ == "__main__":
+    main()
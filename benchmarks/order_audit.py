@@ -0,0 +1,83 @@
+"""Benchmark auditing and repairing stored order totals.
+
+Seeds a million single-line orders over the last year with two toppings
+each, priced from the current menu, and makes every hundredth total a unit
+too high. Audits the seeded orders, repairs the mismatches and audits again.
+Orders are named "Benchmark audit" in the database from
+SQLALCHEMY_DATABASE_URI and are deleted afterwards, with their items and
+events. Run from the repository root:
+
+    python -m benchmarks.order_audit
+"""
+import time
+
+from sqlalchemy import create_engine, text
+
+from app.config import settings
+from app.db.backfill import Throttle
+from app.services.order_audit import run_audit
+
+ORDERS = 1_000_000
+NAME = "Benchmark audit"
+
+SEED_ORDERS = text("""
+    INSERT INTO orders (id, created_at, customer_name, phone_number, address, pizza_id, size_id,
+                        payment_method, total_price)
+    SELECT uuid_generate_v7(), localtimestamp - (n % 365) * interval '1 day' - (n % 86400) * interval '1 second',
+           :name, '+15550100', '1 Main St', pizza.id, size.id, 'CASH',
+           round((pizza.base_price * size.multiplier + 2 * topping.price)::numeric, 2) + CASE WHEN n % 100 = 0 THEN 1 ELSE 0 END
+    FROM generate_series(1, :orders) AS n,
+         (SELECT id, base_price FROM pizzas ORDER BY id LIMIT 1) AS pizza,
+         (SELECT id, multiplier FROM sizes ORDER BY id LIMIT 1) AS size,
+         (SELECT price FROM toppings ORDER BY id LIMIT 1) AS topping
+""")
+SEED_ITEMS = text("""
+    INSERT INTO order_items (order_id, position, pizza_id, size_id, topping_ids, quantity, unit_price, total_price)
+    SELECT orders.id, 0, orders.pizza_id, orders.size_id, ARRAY[topping.id, topping.id], 1,
+           round((pizza.base_price * size.multiplier + 2 * topping.price)::numeric, 2),
+           round((pizza.base_price * size.multiplier + 2 * topping.price)::numeric, 2)
+    FROM orders
+    JOIN pizzas AS pizza ON pizza.id = orders.pizza_id
+    JOIN sizes AS size ON size.id = orders.size_id,
+         (SELECT id, price FROM toppings ORDER BY id LIMIT 1) AS topping
+    WHERE orders.customer_name = :name
+""")
+
+
+def quiet(report) -> None:
+    pass
+
+
+def main() -> None:
+    engine = create_engine(settings.SQLALCHEMY_DATABASE_URI)
+    try:
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            # Ids are time-ordered, so the seeded orders fall between these two
+            after = conn.execute(text("SELECT uuid_generate_v7()")).scalar()
+            conn.execute(SEED_ORDERS, {"name": NAME, "orders": ORDERS})
+            conn.execute(SEED_ITEMS, {"name": NAME})
+            until = conn.execute(text("SELECT uuid_generate_v7()")).scalar()
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM ANALYZE orders"))
+            conn.execute(text("VACUUM ANALYZE order_items"))
+        print(f"Seeded {ORDERS} orders in {time.perf_counter() - started:.1f}s")
+
+        throttle = Throttle(pause=0, max_replication_lag=None)
+        print(f"{'run':>8} {'orders':>9} {'seconds':>8} {'orders/s':>9} {'mismatched':>11} {'repaired':>9} "
+              f"{'10M est. s':>11}")
+        for label, repair in (("audit", False), ("repair", True), ("re-audit", False)):
+            report = run_audit(engine, repair=repair, throttle=throttle, after=after,
+                                until=until, report=quiet)
+            print(f"{label:>8} {report.orders:>9} {report.elapsed:>8.2f} {report.rate:>9.0f} "
+                  f"{report.mismatched_orders:>11} {report.repaired_orders:>9} {10_000_000 / report.rate:>11.0f}")
+    finally:
+        with engine.begin() as conn:
+            benchmark_orders = "SELECT id FROM orders WHERE customer_name = :name"
+            conn.execute(text(f"DELETE FROM order_events WHERE order_id IN ({benchmark_orders})"), {"name": NAME})
+            conn.execute(text(f"DELETE FROM order_items WHERE order_id IN ({benchmark_orders})"), {"name": NAME})
+            conn.execute(text("DELETE FROM orders WHERE customer_name = :name"), {"name": NAME})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark order creation throughput with and without group commit.
+
+Needs the database from SQLALCHEMY_DATABASE_URI with the menu seeded (start
+the app once). Orders created by the run, and their order log events, are
+deleted afterwards. Run from the repository root:
+
+    python -m benchmarks.order_group_commit
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, delete, select
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.db.models.order import Order
+from app.db.models.order_event import order_events
+from app.db.models.order_item import OrderItem
+from app.db.models.order_toppings import order_toppings
+from app.db.models.pizza import Pizza
+from app.db.models.size import Size
+from app.db.models.topping import Topping
+from app.db.schemas.pizza import OrderCreate
+from app.services.order_writer import order_writer
+from app.services.pizza_service import PizzaService
+
+CUSTOMER = "group-commit-benchmark"
+ORDERS_PER_RUN = 600
+CONCURRENCY = (1, 8, 32)
+# (label, group commit enabled, max wait in ms)
+MODES = (("direct", False, 0.0), ("group 1ms", True, 1.0), ("group 5ms", True, 5.0))
+
+
+def main() -> None:
+    engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_size=max(CONCURRENCY))
+    Session = sessionmaker(autoflush=False, bind=engine)
+    with Session() as db:
+        order_data = OrderCreate(
+            customer_name=CUSTOMER,
+            phone_number="555 010 0000",
+            address="1 Benchmark Road",
+            pizza_id=db.scalars(select(Pizza.id)).first(),
+            size_id=db.scalars(select(Size.id)).first(),
+            topping_ids=db.scalars(select(Topping.id).limit(2)).all(),
+            payment_method="cash",
+        )
+
+    def create() -> float:
+        started = time.perf_counter()
+        with Session() as db:
+            PizzaService.create_order(db, order_data)
+        return time.perf_counter() - started
+
+    print(f"{'mode':>10} {'threads':>7} {'orders/s':>9} {'p50 ms':>7} {'p99 ms':>7}")
+    try:
+        for label, enabled, max_wait_ms in MODES:
+            settings.ORDER_GROUP_COMMIT_ENABLED = enabled
+            order_writer.max_wait = max_wait_ms / 1000
+            for threads in CONCURRENCY:
+                with ThreadPoolExecutor(threads) as pool:
+                    started = time.perf_counter()
+                    latencies = sorted(pool.map(lambda _: create(), range(ORDERS_PER_RUN)))
+                    elapsed = time.perf_counter() - started
+                print(f"{label:>10} {threads:>7} {ORDERS_PER_RUN / elapsed:>9.0f} "
+                      f"{statistics.median(latencies) * 1000:>7.1f} "
+                      f"{latencies[int(len(latencies) * 0.99)] * 1000:>7.1f}")
+    finally:
+        with Session() as db:
+            created = select(Order.id).where(Order.customer_name == CUSTOMER)
+            db.execute(delete(order_toppings).where(order_toppings.c.order_id.in_(created)))
+            db.execute(delete(OrderItem).where(OrderItem.order_id.in_(created)))
+            db.execute(delete(order_events).where(order_events.c.order_id.in_(created)))
+            db.execute(delete(Order).where(Order.customer_name == CUSTOMER))
+            db.commit()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark promotion evaluation per order as the number of active rules grows.
+
+Run from the repository root:
+
+    python -m benchmarks.promotions
+
+Compares the compiled index against checking every rule for every order.
+"""
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.db.models.promotion import PromotionKind
+from app.services.pricing import price_pizza
+from app.services.promotions import PromotionIndex, PromotionRule
+
+RULE_COUNTS = (100, 1_000, 10_000)
+# A large franchise menu; rules spread over it as they would across stores
+PIZZAS = [SimpleNamespace(id=uuid.uuid4(), base_price=8 + i % 7) for i in range(2_000)]
+SIZES = [SimpleNamespace(id=uuid.uuid4(), multiplier=1 + i * 0.5) for i in range(3)]
+TOPPINGS = [SimpleNamespace(id=uuid.uuid4(), price=0.5 + i % 4) for i in range(40)]
+ORDERS = 5_000
+
+
+def make_rule(rng: random.Random) -> PromotionRule:
+    kind = rng.choice(list(PromotionKind))
+    pizza = rng.choice(PIZZAS)
+    return PromotionRule(
+        id=uuid.uuid4(),
+        name=f"{kind.value} {pizza.id.hex[:6]}",
+        kind=kind,
+        value=rng.choice([10, 15, 20]) if kind == PromotionKind.PERCENT_OFF else 2.0,
+        pizza_id=pizza.id,
+        size_id=rng.choice(SIZES).id if rng.random() < 0.5 else None,
+        topping_id=rng.choice(TOPPINGS).id if kind == PromotionKind.FREE_TOPPING else None,
+        weekdays=rng.getrandbits(7) or None,
+    )
+
+
+def linear_candidates(rules, at, pizza_id, size_id, topping_ids):
+    toppings = set(topping_ids)
+    return [
+        rule for rule in rules
+        if rule.pizza_id in (None, pizza_id)
+        and rule.size_id in (None, size_id)
+        and (rule.topping_id is None or rule.topping_id in toppings)
+        and rule.runs_at(at)
+    ]
+
+
+def main() -> None:
+    rng = random.Random(11)
+    start = datetime(2026, 10, 19)
+    orders = [
+        (rng.choice(PIZZAS), rng.choice(SIZES), rng.sample(TOPPINGS, rng.randint(0, 4)),
+         start + timedelta(minutes=rng.randrange(7 * 24 * 60)))
+        for _ in range(ORDERS)
+    ]
+    print(f"{'rules':>7} {'compile ms':>10} {'indexed us/order':>17} {'linear us/order':>16}")
+    for count in RULE_COUNTS:
+        rules = [make_rule(rng) for _ in range(count)]
+        started = time.perf_counter()
+        index = PromotionIndex(rules)
+        compile_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        for pizza, size, toppings, at in orders:
+            price_pizza(index, pizza, size, toppings, at)
+        indexed = (time.perf_counter() - started) / ORDERS * 1e6
+
+        sample = orders[:200]
+        started = time.perf_counter()
+        for pizza, size, toppings, at in sample:
+            linear_candidates(rules, at, pizza.id, size.id, [topping.id for topping in toppings])
+        linear = (time.perf_counter() - started) / len(sample) * 1e6
+        print(f"{count:>7} {compile_ms:>10.1f} {indexed:>17.1f} {linear:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark inserts keyed by random (v4) and time-ordered (v7) UUIDs.
+
+Inserts the same number of rows into two scratch tables that differ only in
+how ids are generated, then reports insert throughput, primary key index
+size and the WAL written. Ids are generated by the server so the numbers
+measure the index, not the client; use enough rows for the v4 index to
+outgrow shared_buffers, which is where random keys hurt most. The scratch
+tables live in the database from SQLALCHEMY_DATABASE_URI and are dropped
+afterwards. Run from the repository root:
+
+    python -m benchmarks.uuid7_keys
+"""
+import time
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, create_engine, func, text
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.config import settings
+from app.tools.uuid7 import UUID7_FUNCTION_SQL
+
+ROWS = 5_000_000
+BATCH = 10_000
+GENERATORS = (("uuid4", "gen_random_uuid()"), ("uuid7", "uuid_generate_v7()"))
+
+
+def scratch_table(metadata: MetaData, name: str) -> Table:
+    return Table(
+        f"benchmark_keys_{name}", metadata,
+        Column("id", UUID(as_uuid=True), primary_key=True),
+        Column("customer_name", String, nullable=False),
+        Column("created_at", DateTime, nullable=False, server_default=func.now()),
+    )
+
+
+def main() -> None:
+    engine = create_engine(settings.SQLALCHEMY_DATABASE_URI)
+    metadata = MetaData()
+    tables = {name: scratch_table(metadata, name) for name, _ in GENERATORS}
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text(UUID7_FUNCTION_SQL))
+    print(f"{'ids':>6} {'rows/s':>9} {'index MB':>9} {'WAL MB':>7}")
+    try:
+        for name, generate in GENERATORS:
+            table = tables[name]
+            with engine.connect() as conn:
+                wal_before = conn.execute(text("SELECT pg_current_wal_lsn()")).scalar()
+                conn.commit()
+                started = time.perf_counter()
+                batch = text(
+                    f"INSERT INTO {table.name} (id, customer_name) "
+                    f"SELECT {generate}, 'Benchmark' FROM generate_series(1, :rows)"
+                )
+                for _ in range(ROWS // BATCH):
+                    conn.execute(batch, {"rows": BATCH})
+                    conn.commit()
+                elapsed = time.perf_counter() - started
+                wal = conn.execute(
+                    text("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), :before)"), {"before": wal_before}
+                ).scalar()
+                index_size = conn.execute(
+                    text("SELECT pg_relation_size(:index)"), {"index": f"{table.name}_pkey"}
+                ).scalar()
+            print(f"{name:>6} {ROWS / elapsed:>9.0f} {index_size / 2**20:>9.1f} {float(wal) / 2**20:>7.1f}")
+    finally:
+        metadata.drop_all(engine)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
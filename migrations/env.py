@@ -50,16 +50,20 @@ def run_migrations_online():
     In this scenario we need to create an Engine
     and associate a connection with the context.
 
+    Order shards share the main database's schema, so each one is
+    migrated after it in turn.
     """
     configuration = config.get_section(config.config_ini_section)
-    configuration["sqlalchemy.url"] = settings.SQLALCHEMY_DATABASE_URI
-    connectable = engine_from_config(configuration, prefix="sqlalchemy.", poolclass=pool.NullPool)
+    uris = list(dict.fromkeys([settings.SQLALCHEMY_DATABASE_URI, *settings.ORDER_SHARD_URIS]))
+    for uri in uris:
+        configuration["sqlalchemy.url"] = uri
+        connectable = engine_from_config(configuration, prefix="sqlalchemy.", poolclass=pool.NullPool)
 
-    with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata, compare_type=True)
+        with connectable.connect() as connection:
+            context.configure(connection=connection, target_metadata=target_metadata, compare_type=True)
 
-        with context.begin_transaction():
-            context.run_migrations()
+            with context.begin_transaction():
+                context.run_migrations()
 
 
 if context.is_offline_mode():
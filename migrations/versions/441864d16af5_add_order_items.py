@@ -0,0 +1,54 @@
+"""add order items
+
+Revision ID: 441864d16af5
+Revises: c41452b66645
+Create Date: 2026-10-19 00:03:02.237859
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '441864d16af5'
+down_revision = 'c41452b66645'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('order_items',
+    sa.Column('order_id', sa.UUID(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('pizza_id', sa.UUID(), nullable=False),
+    sa.Column('size_id', sa.UUID(), nullable=False),
+    sa.Column('topping_ids', postgresql.ARRAY(sa.UUID()), server_default='{}', nullable=False),
+    sa.Column('quantity', sa.Integer(), server_default='1', nullable=False),
+    sa.Column('unit_price', sa.Float(), nullable=False),
+    sa.Column('discount_total', sa.Float(), server_default='0', nullable=False),
+    sa.Column('discounts', postgresql.JSONB(astext_type=sa.Text()), server_default='[]', nullable=False),
+    sa.Column('total_price', sa.Float(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.ForeignKeyConstraint(['pizza_id'], ['pizzas.id'], ),
+    sa.ForeignKeyConstraint(['size_id'], ['sizes.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'], unique=False)
+    # Existing orders become one-line carts
+    op.execute(
+        "INSERT INTO order_items (id, created_at, order_id, position, pizza_id, size_id, topping_ids, quantity, "
+        "unit_price, discount_total, discounts, total_price) "
+        "SELECT gen_random_uuid(), o.created_at, o.id, 0, o.pizza_id, o.size_id, "
+        "coalesce(array_agg(ot.topping_id) FILTER (WHERE ot.topping_id IS NOT NULL), '{}'), 1, "
+        "o.total_price + o.discount_total, o.discount_total, o.discounts, o.total_price "
+        "FROM orders o LEFT JOIN order_toppings ot ON ot.order_id = o.id "
+        "WHERE o.pizza_id IS NOT NULL AND o.size_id IS NOT NULL "
+        "GROUP BY o.id"
+    )
+
+
+def downgrade():
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+    op.drop_table('order_items')
@@ -0,0 +1,34 @@
+"""add normalized phone number
+
+Revision ID: 85fce057eebb
+Revises: cf3aa60bc2a2
+Create Date: 2026-10-18 12:41:56.027311
+
+Existing rows are filled in afterwards, outside the migration, with
+`python -m app.scripts.backfill_phone_numbers`.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '85fce057eebb'
+down_revision = 'cf3aa60bc2a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('orders', sa.Column('phone_e164', sa.String(), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_phone_e164', 'orders', ['phone_e164'],
+            postgresql_using='hash', postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_orders_phone_e164', table_name='orders', postgresql_concurrently=True)
+    op.drop_column('orders', 'phone_e164')
@@ -0,0 +1,31 @@
+"""add delivery coordinates
+
+Revision ID: 96995e86f2da
+Revises: ba409d79f827
+Create Date: 2026-10-18 10:02:47.918364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '96995e86f2da'
+down_revision = 'ba409d79f827'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ALTER TYPE ... ADD VALUE cannot run inside a transaction block on older Postgres
+    with op.get_context().autocommit_block():
+        for value in ('READY', 'OUT_FOR_DELIVERY', 'DELIVERED'):
+            op.execute(f"ALTER TYPE orderstatus ADD VALUE IF NOT EXISTS '{value}'")
+    op.add_column('orders', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('orders', sa.Column('longitude', sa.Float(), nullable=True))
+
+
+def downgrade():
+    # Postgres cannot drop enum values; the extra statuses are left in place
+    op.drop_column('orders', 'longitude')
+    op.drop_column('orders', 'latitude')
@@ -0,0 +1,44 @@
+"""use uuid7 ids
+
+Revision ID: 9e1e2a20b7a5
+Revises: b1f6b8ef797a
+Create Date: 2026-10-19 00:11:40.808664
+
+New rows get time-ordered version 7 ids, from the application and from this
+server-side default. Existing ids are left alone: they are referenced from
+other tables, from the order event log and by customers holding order links.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e1e2a20b7a5'
+down_revision = 'b1f6b8ef797a'
+branch_labels = None
+depends_on = None
+
+TABLES = ('pizzas', 'sizes', 'toppings', 'orders', 'order_items', 'promotions')
+
+
+def upgrade():
+    op.execute("""
+        CREATE OR REPLACE FUNCTION uuid_generate_v7() RETURNS uuid AS $$
+            SELECT encode(
+                set_bit(set_bit(
+                    overlay(uuid_send(gen_random_uuid())
+                            PLACING substring(int8send(floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint) FROM 3)
+                            FROM 1 FOR 6),
+                    52, 1), 53, 1),
+                'hex')::uuid
+        $$ LANGUAGE sql VOLATILE
+    """)
+    for table in TABLES:
+        op.alter_column(table, 'id', existing_type=sa.UUID(), server_default=sa.text('uuid_generate_v7()'))
+
+
+def downgrade():
+    for table in TABLES:
+        op.alter_column(table, 'id', existing_type=sa.UUID(), server_default=None)
+    op.execute("DROP FUNCTION uuid_generate_v7()")
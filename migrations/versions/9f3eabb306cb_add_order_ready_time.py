@@ -0,0 +1,27 @@
+"""add order ready time
+
+Revision ID: 9f3eabb306cb
+Revises: dc73a8114e13
+Create Date: 2026-10-19 01:43:31.557839
+
+Runs on the main database and every order shard. Orders already READY keep
+a NULL ready time; dispatch falls back to their creation time.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9f3eabb306cb'
+down_revision = 'dc73a8114e13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('orders', sa.Column('ready_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    op.drop_column('orders', 'ready_at')
@@ -0,0 +1,32 @@
+"""add backfill checkpoints
+
+Revision ID: b1f6b8ef797a
+Revises: 441864d16af5
+Create Date: 2026-10-19 00:06:36.235722
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b1f6b8ef797a'
+down_revision = '441864d16af5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('backfill_checkpoints',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('last_key', sa.String(), nullable=True),
+    sa.Column('rows_updated', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('backfill_checkpoints')
@@ -0,0 +1,45 @@
+"""add order event log
+
+Revision ID: b3ef49a720d6
+Revises: 85fce057eebb
+Create Date: 2026-10-18 23:52:02.151503
+
+Orders created before this revision have no events; consumers start from
+the first order written afterwards.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'b3ef49a720d6'
+down_revision = '85fce057eebb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('order_event_cursors',
+    sa.Column('consumer', sa.String(), nullable=False),
+    sa.Column('txid', sa.BigInteger(), nullable=False),
+    sa.Column('seq', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('consumer')
+    )
+    op.create_table('order_events',
+    sa.Column('seq', sa.BigInteger(), sa.Identity(always=False), nullable=False),
+    sa.Column('txid', sa.BigInteger(), server_default=sa.text('(pg_current_xact_id()::text::bigint)'), nullable=False),
+    sa.Column('order_id', sa.UUID(), nullable=False),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('seq')
+    )
+    op.create_index('ix_order_events_txid_seq', 'order_events', ['txid', 'seq'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_order_events_txid_seq', table_name='order_events')
+    op.drop_table('order_events')
+    op.drop_table('order_event_cursors')
@@ -0,0 +1,29 @@
+"""add order status
+
+Revision ID: ba409d79f827
+Revises: fda5c6444af5
+Create Date: 2026-10-18 09:12:31.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ba409d79f827'
+down_revision = 'fda5c6444af5'
+branch_labels = None
+depends_on = None
+
+
+order_status = sa.Enum('PENDING', 'CONFIRMED', 'CANCELLED', name='orderstatus')
+
+
+def upgrade():
+    order_status.create(op.get_bind(), checkfirst=True)
+    op.add_column('orders', sa.Column('status', order_status, server_default='PENDING', nullable=False))
+
+
+def downgrade():
+    op.drop_column('orders', 'status')
+    order_status.drop(op.get_bind(), checkfirst=True)
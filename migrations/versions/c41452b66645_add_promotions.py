@@ -0,0 +1,48 @@
+"""add promotions
+
+Revision ID: c41452b66645
+Revises: b3ef49a720d6
+Create Date: 2026-10-18 23:58:02.334975
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'c41452b66645'
+down_revision = 'b3ef49a720d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('promotions',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('kind', sa.Enum('PERCENT_OFF', 'AMOUNT_OFF', 'FREE_TOPPING', name='promotionkind'), nullable=False),
+    sa.Column('value', sa.Float(), nullable=False),
+    sa.Column('pizza_id', sa.UUID(), nullable=True),
+    sa.Column('size_id', sa.UUID(), nullable=True),
+    sa.Column('topping_id', sa.UUID(), nullable=True),
+    sa.Column('weekdays', sa.Integer(), nullable=True),
+    sa.Column('start_time', sa.Time(), nullable=True),
+    sa.Column('end_time', sa.Time(), nullable=True),
+    sa.Column('starts_at', sa.DateTime(), nullable=True),
+    sa.Column('ends_at', sa.DateTime(), nullable=True),
+    sa.Column('active', sa.Boolean(), server_default='true', nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['pizza_id'], ['pizzas.id'], ),
+    sa.ForeignKeyConstraint(['size_id'], ['sizes.id'], ),
+    sa.ForeignKeyConstraint(['topping_id'], ['toppings.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.add_column('orders', sa.Column('discount_total', sa.Float(), server_default='0', nullable=False))
+    op.add_column('orders', sa.Column('discounts', postgresql.JSONB(astext_type=sa.Text()), server_default='[]', nullable=False))
+
+
+def downgrade():
+    op.drop_column('orders', 'discounts')
+    op.drop_column('orders', 'discount_total')
+    op.drop_table('promotions')
+    sa.Enum(name='promotionkind').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,55 @@
+"""add order access path indexes
+
+Revision ID: cf3aa60bc2a2
+Revises: 96995e86f2da
+Create Date: 2026-10-18 11:20:05.184629
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cf3aa60bc2a2'
+down_revision = '96995e86f2da'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Duplicate and half-empty links cannot be part of a primary key
+    op.execute("DELETE FROM order_toppings WHERE order_id IS NULL OR topping_id IS NULL")
+    op.execute(
+        "DELETE FROM order_toppings a USING order_toppings b "
+        "WHERE a.ctid < b.ctid AND a.order_id = b.order_id AND a.topping_id = b.topping_id"
+    )
+    op.alter_column('order_toppings', 'order_id', existing_type=sa.UUID(), nullable=False)
+    op.alter_column('order_toppings', 'topping_id', existing_type=sa.UUID(), nullable=False)
+    op.create_primary_key('order_toppings_pkey', 'order_toppings', ['order_id', 'topping_id'])
+
+    # Build the orders indexes without blocking writes
+    with op.get_context().autocommit_block():
+        op.create_index('ix_orders_pizza_id', 'orders', ['pizza_id'], postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_orders_size_id', 'orders', ['size_id'], postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_orders_created_at', 'orders', ['created_at'], postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(
+            'ix_orders_status_active', 'orders', ['status'],
+            postgresql_where=sa.text("status IN ('CONFIRMED', 'READY')"),
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_order_toppings_topping_id', 'order_toppings', ['topping_id'],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_order_toppings_topping_id', table_name='order_toppings', postgresql_concurrently=True)
+        op.drop_index('ix_orders_status_active', table_name='orders', postgresql_concurrently=True)
+        op.drop_index('ix_orders_created_at', table_name='orders', postgresql_concurrently=True)
+        op.drop_index('ix_orders_size_id', table_name='orders', postgresql_concurrently=True)
+        op.drop_index('ix_orders_pizza_id', table_name='orders', postgresql_concurrently=True)
+    op.drop_constraint('order_toppings_pkey', 'order_toppings', type_='primary')
+    op.alter_column('order_toppings', 'topping_id', existing_type=sa.UUID(), nullable=True)
+    op.alter_column('order_toppings', 'order_id', existing_type=sa.UUID(), nullable=True)
@@ -0,0 +1,71 @@
+"""add menu price history
+
+Revision ID: d914f3fab62c
+Revises: feab1beb4207
+Create Date: 2026-10-19 00:27:36.164417
+
+Statement-level triggers on the menu tables record every price change from
+here on. Earlier prices were never kept, so each item starts with its current
+price as of its creation; audits treat it as the price before that too.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd914f3fab62c'
+down_revision = 'feab1beb4207'
+branch_labels = None
+depends_on = None
+
+PRICE_COLUMNS = {'pizzas': 'base_price', 'sizes': 'multiplier', 'toppings': 'price'}
+
+
+def upgrade():
+    op.create_table('menu_prices',
+    sa.Column('item_id', sa.UUID(), nullable=False),
+    sa.Column('valid_from', sa.DateTime(), server_default=sa.text('LOCALTIMESTAMP'), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('item_id', 'valid_from')
+    )
+    op.execute("""
+        CREATE OR REPLACE FUNCTION record_menu_prices() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                EXECUTE format(
+                    'INSERT INTO menu_prices (item_id, valid_from, price) '
+                    'SELECT id, localtimestamp, %I FROM new_rows '
+                    'ON CONFLICT (item_id, valid_from) DO UPDATE SET price = excluded.price',
+                    TG_ARGV[0]);
+            ELSE
+                EXECUTE format(
+                    'INSERT INTO menu_prices (item_id, valid_from, price) '
+                    'SELECT new_rows.id, localtimestamp, new_rows.%1$I FROM new_rows JOIN old_rows USING (id) '
+                    'WHERE new_rows.%1$I IS DISTINCT FROM old_rows.%1$I '
+                    'ON CONFLICT (item_id, valid_from) DO UPDATE SET price = excluded.price',
+                    TG_ARGV[0]);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for table, column in PRICE_COLUMNS.items():
+        op.execute(f"INSERT INTO menu_prices (item_id, valid_from, price) SELECT id, created_at, {column} FROM {table}")
+        op.execute(
+            f"CREATE TRIGGER {table}_price_insert AFTER INSERT ON {table} "
+            f"REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION record_menu_prices('{column}')"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_price_update AFTER UPDATE ON {table} "
+            f"REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION record_menu_prices('{column}')"
+        )
+
+
+def downgrade():
+    for table in PRICE_COLUMNS:
+        op.execute(f"DROP TRIGGER {table}_price_update ON {table}")
+        op.execute(f"DROP TRIGGER {table}_price_insert ON {table}")
+    op.execute("DROP FUNCTION record_menu_prices()")
+    op.drop_table('menu_prices')
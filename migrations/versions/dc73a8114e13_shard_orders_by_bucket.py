@@ -0,0 +1,58 @@
+"""shard orders by bucket
+
+Revision ID: dc73a8114e13
+Revises: d914f3fab62c
+Create Date: 2026-10-19 01:06:02.074649
+
+Runs on the main database and every order shard. Only the main database's
+order_shard_map is read; it is filled with every bucket on the first shard
+when the application starts.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'dc73a8114e13'
+down_revision = 'd914f3fab62c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('order_bucket_fences',
+    sa.Column('first_slot', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('last_slot', sa.Integer(), nullable=False),
+    sa.Column('moved_to', sa.Integer(), nullable=False),
+    sa.Column('fenced_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('first_slot')
+    )
+    op.create_table('order_shard_map',
+    sa.Column('bucket', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('bucket')
+    )
+    op.execute("""
+        CREATE OR REPLACE FUNCTION order_slot(id uuid) RETURNS integer AS $$
+            SELECT get_byte(uuid_send(id), 14) * 256 + get_byte(uuid_send(id), 15)
+        $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    """)
+    # Build the slot index without blocking order writes
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_slot', 'orders', [sa.literal_column('order_slot(id)'), 'id'],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_orders_slot', table_name='orders', postgresql_concurrently=True)
+    op.execute("DROP TRIGGER IF EXISTS orders_fence_insert ON orders")
+    op.execute("DROP TRIGGER IF EXISTS orders_fence_update ON orders")
+    op.execute("DROP FUNCTION IF EXISTS refuse_fenced_orders()")
+    op.execute("DROP FUNCTION IF EXISTS order_slot(uuid)")
+    op.drop_table('order_shard_map')
+    op.drop_table('order_bucket_fences')
@@ -1,7 +1,7 @@
 """bug fix for courtes relationship
 
 Revision ID: fda5c6444af5
-Revises: 8b9108e07f53
+Revises: 9b37cccb6b33
 Create Date: 2024-11-29 03:31:43.623629
 
 """
@@ -11,7 +11,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision = 'fda5c6444af5'
-down_revision = '8b9108e07f53'
+down_revision = '9b37cccb6b33'
 branch_labels = None
 depends_on = None
 
@@ -0,0 +1,41 @@
+"""add catalog name keys
+
+Revision ID: feab1beb4207
+Revises: 9e1e2a20b7a5
+Create Date: 2026-10-19 00:23:11.675683
+
+Menu names become unique so catalog imports can upsert on them. Duplicate
+names cannot be merged automatically because orders reference both rows, so
+the upgrade stops and lists them instead.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'feab1beb4207'
+down_revision = '9e1e2a20b7a5'
+branch_labels = None
+depends_on = None
+
+TABLES = ('pizzas', 'sizes', 'toppings')
+
+
+def upgrade():
+    conn = op.get_bind()
+    for table in TABLES:
+        duplicates = conn.execute(sa.text(
+            f"SELECT name FROM {table} GROUP BY name HAVING count(*) > 1 ORDER BY name"
+        )).scalars().all()
+        if duplicates:
+            raise RuntimeError(f"Rename duplicate {table} before upgrading: {', '.join(duplicates)}")
+    op.create_index('ix_pizzas_name', 'pizzas', ['name'], unique=True)
+    op.create_index('ix_sizes_name', 'sizes', ['name'], unique=True)
+    op.create_index('ix_toppings_name', 'toppings', ['name'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_toppings_name', table_name='toppings')
+    op.drop_index('ix_sizes_name', table_name='sizes')
+    op.drop_index('ix_pizzas_name', table_name='pizzas')